@@ -1,6 +1,7 @@
 import azure.functions as func
 import logging
 import json
+import hashlib
 from samples.agents.semantickernel.agent_card import agent_card
 
 async def main(req: func.HttpRequest) -> func.HttpResponse:
@@ -20,7 +21,14 @@ async def main(req: func.HttpRequest) -> func.HttpResponse:
         modified_card.url = f"{base_url}/v1"
 
         agent_card_json = modified_card.model_dump_json(by_alias=True, exclude_none=True)
-        return func.HttpResponse(agent_card_json, mimetype='application/json')
+        etag = '"' + hashlib.sha256(agent_card_json.encode()).hexdigest()[:32] + '"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "public, max-age=300, stale-while-revalidate=3600",
+        }
+        if etag in req.headers.get("If-None-Match", ""):
+            return func.HttpResponse(status_code=304, headers=headers)
+        return func.HttpResponse(agent_card_json, mimetype='application/json', headers=headers)
     except Exception as e:
         logging.error(f"Error generating AgentCard JSON: {e}")
         return func.HttpResponse("Error generating AgentCard JSON.", status_code=500)
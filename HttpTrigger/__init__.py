@@ -2,13 +2,69 @@ import azure.functions as func
 import logging
 import json
 import asyncio
+import os
 import uuid
 from samples.agents.semantickernel.agent import SemanticKernelTravelAgent
+from samples.common.utils.background_tasks import BackgroundTaskRunner
 from samples.common.types import Message, SendMessageRequest
+from samples.common.utils.deadline import DeadlineExceededError, deadline_scope, parse_deadline, remaining_timeout
+from samples.common.utils.push_notification_auth import PushNotificationSenderAuth
+from samples.common.utils.push_notification_dispatcher import PushNotificationDispatcher
 
 # Initialize the SemanticKernelTravelAgent
 travel_agent = SemanticKernelTravelAgent()
 
+# Background tasks live in this process, so GetTask and SubscribeToTask only
+# find them if every request reaches the same instance, and the turn only
+# finishes if the instance is not frozen after responding. Enable them with
+# the A2A_BACKGROUND_TASKS app setting only where both hold, e.g. a Premium
+# or Dedicated plan scaled to a single always-ready instance.
+BACKGROUND_TASKS_ENABLED = os.environ.get("A2A_BACKGROUND_TASKS", "").lower() in ("1", "true")
+
+# Signs push notifications; the public keys are served by the Jwks function.
+notification_sender_auth = PushNotificationSenderAuth()
+notification_sender_auth.generate_jwk()
+
+# Runs non-blocking SendMessage turns after their request has returned.
+background_runner = BackgroundTaskRunner(
+    travel_agent,
+    notification_dispatcher=PushNotificationDispatcher(notification_sender_auth),
+)
+
+# Longest a SubscribeToTask request waits for the task to finish. Azure's
+# load balancer drops HTTP requests after 230 seconds; clients resubscribe
+# to follow the task further.
+SUBSCRIBE_MAX_WAIT_SECONDS = 200.0
+
+
+def deadline_exceeded_response(jsonrpc_id) -> func.HttpResponse:
+    return func.HttpResponse(json.dumps({
+        "jsonrpc": "2.0",
+        "error": {"code": -32000, "message": "Deadline exceeded"},
+        "id": jsonrpc_id
+    }), status_code=504, mimetype="application/json")
+
+def task_not_found_response(jsonrpc_id) -> func.HttpResponse:
+    return func.HttpResponse(json.dumps({
+        "jsonrpc": "2.0",
+        "error": {"code": -32001, "message": "Task not found"},
+        "id": jsonrpc_id
+    }), status_code=404, mimetype="application/json")
+
+def unsupported_operation_response(jsonrpc_id, message: str) -> func.HttpResponse:
+    return func.HttpResponse(json.dumps({
+        "jsonrpc": "2.0",
+        "error": {"code": -32004, "message": message},
+        "id": jsonrpc_id
+    }), status_code=400, mimetype="application/json")
+
+def requested_task_id(params: dict) -> str | None:
+    """Task id of a GetTask or SubscribeToTask request ("id" or "name": "tasks/{id}")."""
+    if params.get("id"):
+        return params["id"]
+    name = params.get("name") or ""
+    return name.removeprefix("tasks/") or None
+
 async def main(req: func.HttpRequest) -> func.HttpResponse: # Changed return type implicitly
     logging.info('Python HTTP trigger function processed a request.')
 
@@ -24,13 +80,38 @@ async def main(req: func.HttpRequest) -> func.HttpResponse: # Changed return typ
             try:
                 send_request = SendMessageRequest.model_validate(params)
                 session_id = send_request.message.context_id or str(uuid.uuid4())
-                
-                result_task = await travel_agent.send_message(send_request.message, session_id)
+                # The caller's deadline bounds the whole turn, including the
+                # model calls; work stops once it has passed.
+                deadline = parse_deadline(req.headers, send_request.metadata)
+                configuration = send_request.configuration or {}
+
+                if configuration.get("blocking") is False:
+                    if not BACKGROUND_TASKS_ENABLED:
+                        return unsupported_operation_response(
+                            jsonrpc_id, "Non-blocking SendMessage is not enabled on this deployment"
+                        )
+                    # Return the submitted task right away; the turn goes on
+                    # in the background and is followed with GetTask,
+                    # SubscribeToTask or a push notification.
+                    submitted_task = await background_runner.submit(
+                        send_request.message,
+                        session_id,
+                        deadline,
+                        configuration.get("pushNotificationConfig"),
+                    )
+                    response = {"jsonrpc": "2.0", "result": {"task": submitted_task.model_dump(by_alias=True, exclude_none=True)}, "id": jsonrpc_id}
+                    return func.HttpResponse(json.dumps(response), mimetype="application/json")
+
+                with deadline_scope(deadline):
+                    result_task = await travel_agent.send_message(send_request.message, session_id)
                 
                 response_data = result_task.model_dump(by_alias=True, exclude_none=True)
                 
                 response = {"jsonrpc": "2.0", "result": {"task": response_data}, "id": jsonrpc_id}
                 return func.HttpResponse(json.dumps(response), mimetype="application/json")
+            except DeadlineExceededError:
+                logging.warning("Deadline exceeded processing SendMessage")
+                return deadline_exceeded_response(jsonrpc_id)
             except Exception as e:
                 logging.error(f"Error processing SendMessage: {e}")
                 return func.HttpResponse(json.dumps({
@@ -44,20 +125,24 @@ async def main(req: func.HttpRequest) -> func.HttpResponse: # Changed return typ
             try:
                 send_request = SendMessageRequest.model_validate(params)
                 session_id = send_request.message.context_id or str(uuid.uuid4())
+                deadline = parse_deadline(req.headers, send_request.metadata)
 
-                response_stream = travel_agent.stream(send_request.message, session_id)
-                
                 # Collect all events into a list and join them
                 response_data = []
-                async for response in response_stream:
-                    formatted_event = f"data: {json.dumps(response)}\n\n"
-                    response_data.append(formatted_event)
+                with deadline_scope(deadline):
+                    response_stream = travel_agent.stream(send_request.message, session_id)
+                    async for response in response_stream:
+                        formatted_event = f"data: {json.dumps(response)}\n\n"
+                        response_data.append(formatted_event)
 
                 return func.HttpResponse(
                     "".join(response_data),
                     mimetype="text/event-stream"
                 )
 
+            except DeadlineExceededError:
+                logging.warning("Deadline exceeded processing SendStreamingMessage")
+                return deadline_exceeded_response(jsonrpc_id)
             except Exception as e:
                 logging.error(f"Error processing SendStreamingMessage: {e}")
                 return func.HttpResponse(json.dumps({
@@ -66,6 +151,46 @@ async def main(req: func.HttpRequest) -> func.HttpResponse: # Changed return typ
                     "id": jsonrpc_id
                 }), status_code=500, mimetype="application/json")
         
+        elif method == "GetTask":
+            task = background_runner.store.get(requested_task_id(params) or "")
+            if task is None:
+                return task_not_found_response(jsonrpc_id)
+            task_data = task.model_dump(by_alias=True, exclude_none=True)
+            history_length = params.get("historyLength")
+            if history_length is not None and task_data.get("history"):
+                task_data["history"] = task_data["history"][-history_length:] if history_length else []
+            response = {"jsonrpc": "2.0", "result": task_data, "id": jsonrpc_id}
+            return func.HttpResponse(json.dumps(response), mimetype="application/json")
+
+        elif method == "SubscribeToTask":
+            try:
+                # Like SendStreamingMessage, the events are collected until
+                # the task is final and returned together.
+                response_data = []
+
+                async def collect_events():
+                    async for response in background_runner.store.subscribe(requested_task_id(params) or ""):
+                        response_data.append(f"data: {json.dumps(response)}\n\n")
+
+                with deadline_scope(parse_deadline(req.headers, params.get("metadata"))):
+                    timeout = remaining_timeout(SUBSCRIBE_MAX_WAIT_SECONDS)
+                    try:
+                        await asyncio.wait_for(collect_events(), timeout)
+                    except asyncio.TimeoutError as e:
+                        if timeout < SUBSCRIBE_MAX_WAIT_SECONDS:
+                            raise DeadlineExceededError("Request deadline exceeded") from e
+                        # Still running: end the stream with the events so
+                        # far, the client resubscribes for the rest.
+                return func.HttpResponse(
+                    "".join(response_data),
+                    mimetype="text/event-stream"
+                )
+            except KeyError:
+                return task_not_found_response(jsonrpc_id)
+            except DeadlineExceededError:
+                logging.warning("Deadline exceeded processing SubscribeToTask")
+                return deadline_exceeded_response(jsonrpc_id)
+
         else:
             return func.HttpResponse(json.dumps({
                 "jsonrpc": "2.0",
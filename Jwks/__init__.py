@@ -0,0 +1,13 @@
+import azure.functions as func
+import logging
+import json
+from HttpTrigger import notification_sender_auth
+
+async def main(req: func.HttpRequest) -> func.HttpResponse:
+    # Receivers fetch the keys from <agent url>/.well-known/jwks.json to
+    # verify the push notifications signed by the HttpTrigger function.
+    logging.info('Serving the push notification JWKS.')
+    return func.HttpResponse(
+        json.dumps({"keys": notification_sender_auth.public_keys}),
+        mimetype="application/json",
+    )
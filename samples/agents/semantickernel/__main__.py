@@ -4,7 +4,11 @@ import click
 
 from samples.agents.semantickernel.task_manager import TaskManager
 from samples.common.server import A2AServer
-from samples.common.utils.push_notification_auth import PushNotificationSenderAuth
+from samples.common.utils.blob_store import BlobStore
+from samples.common.utils.push_notification_auth import (
+    SUPPORTED_SIGNING_ALGORITHMS,
+    PushNotificationSenderAuth,
+)
 from samples.agents.semantickernel.agent_card import agent_card  # Import the AgentCard from the new module
 from dotenv import load_dotenv
 
@@ -18,31 +22,52 @@ load_dotenv()
 @click.command()
 @click.option('--host', default='localhost')
 @click.option('--port', default=10020)
-def main(host, port):
+@click.option(
+    '--push_signing_algorithm',
+    default='RS256',
+    type=click.Choice(SUPPORTED_SIGNING_ALGORITHMS),
+)
+@click.option('--workers', default=1)
+@click.option(
+    '--blob_dir',
+    default=None,
+    help='Directory for uploaded file content; a temporary one if omitted.',
+)
+def main(host, port, push_signing_algorithm, workers, blob_dir):
     """Starts the Semantic Kernel Agent server using A2A."""
 
     # Prepare push notification system
-    notification_sender_auth = PushNotificationSenderAuth()
+    notification_sender_auth = PushNotificationSenderAuth(
+        algorithm=push_signing_algorithm
+    )
     notification_sender_auth.generate_jwk()
 
-    # Create the server
+    # Create the server. All workers share the blob store directory.
+    blob_store = BlobStore(blob_dir)
     task_manager = TaskManager(
-        notification_sender_auth=notification_sender_auth
+        notification_sender_auth=notification_sender_auth,
+        blob_store=blob_store,
     )
     server = A2AServer(
         agent_card=agent_card,  # Use the imported AgentCard
         task_manager=task_manager,
         host=host,
-        port=port
+        port=port,
+        blob_store=blob_store,
     )
     server.app.add_route(
         '/.well-known/jwks.json',
         notification_sender_auth.handle_jwks_endpoint,
         methods=['GET'],
     )
+    server.app.add_route(
+        '/metrics/scheduler',
+        task_manager.scheduler.handle_metrics_endpoint,
+        methods=['GET'],
+    )
 
     logger.info(f'Starting the Semantic Kernel agent server on {host}:{port}')
-    server.start()
+    server.start(workers=workers)
 
 
 if __name__ == '__main__':
@@ -1,3 +1,6 @@
+import asyncio
+import base64
+import binascii
 import logging
 import os
 import uuid
@@ -11,6 +14,7 @@ from typing import TYPE_CHECKING, Annotated, Any, Literal
 import httpx
 
 from dotenv import load_dotenv
+from openai import AsyncOpenAI
 from pydantic import BaseModel
 from semantic_kernel.agents import ChatCompletionAgent, ChatHistoryAgentThread
 from semantic_kernel.connectors.ai.open_ai import (
@@ -26,6 +30,7 @@ from semantic_kernel.contents import (
 from semantic_kernel.functions import kernel_function
 from semantic_kernel.functions.kernel_arguments import KernelArguments
 from samples.common.types import (
+    FilePart,
     Message,
     Part,
     Task,
@@ -33,6 +38,14 @@ from samples.common.types import (
     TaskStatusUpdateEvent,
     TextPart,
 )
+from samples.common.utils.blob_store import BlobStore
+from samples.common.utils.deadline import (
+    DeadlineExceededError,
+    deadline_errors,
+    remaining_timeout,
+    shorten_request_timeout,
+)
+from samples.common.utils.in_memory_cache import InMemoryCache
 
 
 if TYPE_CHECKING:
@@ -54,7 +67,7 @@ class CurrencyPlugin:
     @kernel_function(
         description='Retrieves exchange rate between currency_from and currency_to using Frankfurter API'
     )
-    def get_exchange_rate(
+    async def get_exchange_rate(
         self,
         currency_from: Annotated[
             str, 'Currency code to convert from, e.g. USD'
@@ -65,13 +78,14 @@ class CurrencyPlugin:
         date: Annotated[str, "Date or 'latest'"] = 'latest',
     ) -> str:
         try:
-            response = httpx.get(
-                f'https://api.frankfurter.app/{date}',
-                params={'from': currency_from, 'to': currency_to},
-                timeout=10.0,
+            # Historical rates never change; latest rates are refreshed in the
+            # background while the previous value keeps being served.
+            data = await InMemoryCache().get_or_compute(
+                f'frankfurter:{date}:{currency_from}:{currency_to}',
+                lambda: self._fetch_rates(currency_from, currency_to, date),
+                ttl=600 if date == 'latest' else 24 * 60 * 60,
+                stale_ttl=600 if date == 'latest' else None,
             )
-            response.raise_for_status()
-            data = response.json()
             if 'rates' not in data or currency_to not in data['rates']:
                 return f'Could not retrieve rate for {currency_from} to {currency_to}'
             rate = data['rates'][currency_to]
@@ -79,6 +93,18 @@ class CurrencyPlugin:
         except Exception as e:
             return f'Currency API call failed: {e!s}'
 
+    @staticmethod
+    async def _fetch_rates(
+        currency_from: str, currency_to: str, date: str
+    ) -> dict[str, Any]:
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.get(
+                f'https://api.frankfurter.app/{date}',
+                params={'from': currency_from, 'to': currency_to},
+            )
+            response.raise_for_status()
+            return response.json()
+
 
 # endregion
 
@@ -104,18 +130,34 @@ class SemanticKernelTravelAgent:
     thread: ChatHistoryAgentThread = None
     SUPPORTED_CONTENT_TYPES = ['text', 'text/plain']
 
-    def __init__(self):
+    def __init__(self, blob_store: BlobStore | None = None):
+        """Initialize the agents.
+
+        Args:
+            blob_store: Store that file parts of incoming messages may refer
+                to by URI, usually the one the A2AServer serves.
+        """
+        self.blob_store = blob_store
         api_key = os.getenv('OPENAI_API_KEY', None)
         if not api_key:
             raise ValueError('OPENAI_API_KEY environment variable not set.')
 
         model_id = os.getenv('OPENAI_CHAT_MODEL_ID', 'gpt-4.1')
 
+        # One OpenAI client for all agents. Every HTTP call it makes is cut
+        # short by the deadline of the request being served, if any.
+        openai_client = AsyncOpenAI(
+            api_key=api_key,
+            http_client=httpx.AsyncClient(
+                event_hooks={'request': [shorten_request_timeout]}
+            ),
+        )
+
         # Define a CurrencyExchangeAgent to handle currency-related tasks
         currency_exchange_agent = ChatCompletionAgent(
             service=OpenAIChatCompletion(
-                api_key=api_key,
                 ai_model_id=model_id,
+                async_client=openai_client,
             ),
             name='CurrencyExchangeAgent',
             instructions=(
@@ -130,8 +172,8 @@ class SemanticKernelTravelAgent:
         # Define an ActivityPlannerAgent to handle activity-related tasks
         activity_planner_agent = ChatCompletionAgent(
             service=OpenAIChatCompletion(
-                api_key=api_key,
                 ai_model_id=model_id,
+                async_client=openai_client,
             ),
             name='ActivityPlannerAgent',
             instructions=(
@@ -146,8 +188,8 @@ class SemanticKernelTravelAgent:
         # Define the main TravelManagerAgent to delegate tasks to the appropriate agents
         self.agent = ChatCompletionAgent(
             service=OpenAIChatCompletion(
-                api_key=api_key,
                 ai_model_id=model_id,
+                async_client=openai_client,
             ),
             name='TravelManagerAgent',
             instructions=(
@@ -179,17 +221,26 @@ class SemanticKernelTravelAgent:
 
         Returns:
             Task: A Task object that encapsulates the agent's response.
+
+        Raises:
+            DeadlineExceededError: The deadline of the current request passed
+                before the agent finished.
         """
-        user_text = ""
-        for part in message.parts:
-            if part.text:
-                user_text = part.text
-                break
-
-        response = await self.agent.get_response(
-            messages=user_text,
-            thread=self.thread,
-        )
+        user_text = await self._user_input(message)
+
+        # Checked before the SDK is called, which would only wrap the error.
+        timeout = remaining_timeout(None)
+        try:
+            with deadline_errors():
+                response = await asyncio.wait_for(
+                    self.agent.get_response(
+                        messages=user_text,
+                        thread=self.thread,
+                    ),
+                    timeout,
+                )
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceededError('Request deadline exceeded') from e
         
         agent_message = self._get_agent_response(response.content)
         
@@ -199,6 +250,45 @@ class SemanticKernelTravelAgent:
             status=TaskStatus(state="completed", message=agent_message),
         )
 
+    async def _user_input(self, message: Message) -> str:
+        """The first text part of message, followed by attached text files."""
+        text = next((part.text for part in message.parts if part.text), '')
+        files = [
+            part.file
+            for part in message.parts
+            if part.file is not None
+            and part.file.media_type in self.SUPPORTED_CONTENT_TYPES
+        ]
+        contents = [text] if text else []
+        for file in files:
+            content = await asyncio.to_thread(self._read_file, file)
+            if content is not None:
+                contents.append(content)
+        return '\n\n'.join(contents)
+
+    def _read_file(self, file: FilePart) -> str | None:
+        try:
+            if file.file_with_bytes is not None:
+                data = base64.b64decode(file.file_with_bytes)
+            else:
+                path = (
+                    self.blob_store.resolve(file.file_with_uri)
+                    if self.blob_store is not None and file.file_with_uri
+                    else None
+                )
+                if path is None:
+                    logger.warning(
+                        f'Ignoring file {file.name}: {file.file_with_uri} is '
+                        'not in the blob store'
+                    )
+                    return None
+                with open(path, 'rb') as f:
+                    data = f.read()
+            return data.decode()
+        except (binascii.Error, OSError, UnicodeDecodeError) as e:
+            logger.warning(f'Ignoring unreadable file {file.name}: {e}')
+            return None
+
     def _get_agent_response(self, content: 'ChatMessageContent') -> Message:
         """
         Converts the agent's response content into a structured A2A Message format.
@@ -236,61 +326,62 @@ class SemanticKernelTravelAgent:
         """
         chunks: list[StreamingChatMessageContent] = []
 
-        user_input = ""
-        for part in message_obj.parts:
-            if part.text:
-                user_input = part.text
-                break
+        user_input = await self._user_input(message_obj)
 
         tool_call_in_progress = False
         message_in_progress = False
 
-        # Stream incremental response chunks from the agent.
-        async for response_chunk in self.agent.invoke_stream(
-            messages=user_input,
-            thread=self.thread,
-        ):
-            if any(
-                isinstance(item, (FunctionCallContent, FunctionResultContent))
-                for item in response_chunk.items
+        # Checked before the SDK is called, which would only wrap the error.
+        remaining_timeout(None)
+        with deadline_errors():
+            # Stream incremental response chunks from the agent.
+            async for response_chunk in self.agent.invoke_stream(
+                messages=user_input,
+                thread=self.thread,
             ):
-                if not tool_call_in_progress:
-                    status_update = TaskStatusUpdateEvent(
-                        task_id=message_obj.message_id,
-                        context_id=session_id,
-                        status=TaskStatus(
-                            state="working",
-                            message=Message(
-                                role="agent",
-                                parts=[Part(text="Processing the trip plan (with plugins)...")],
-                                message_id=str(uuid.uuid4())
+                # Stop as soon as the caller's deadline has passed.
+                remaining_timeout(None)
+                if any(
+                    isinstance(item, (FunctionCallContent, FunctionResultContent))
+                    for item in response_chunk.items
+                ):
+                    if not tool_call_in_progress:
+                        status_update = TaskStatusUpdateEvent(
+                            task_id=message_obj.message_id,
+                            context_id=session_id,
+                            status=TaskStatus(
+                                state="working",
+                                message=Message(
+                                    role="agent",
+                                    parts=[Part(text="Processing the trip plan (with plugins)...")],
+                                    message_id=str(uuid.uuid4())
+                                )
                             )
                         )
-                    )
-                    yield {"statusUpdate": status_update.model_dump(by_alias=True)}
-                    tool_call_in_progress = True
-
-            elif any(
-                isinstance(item, StreamingTextContent)
-                for item in response_chunk.items
-            ):
-                if not message_in_progress:
-                    status_update = TaskStatusUpdateEvent(
-                        task_id=message_obj.message_id,
-                        context_id=session_id,
-                        status=TaskStatus(
-                            state="working",
-                            message=Message(
-                                role="agent",
-                                parts=[Part(text="Building the trip plan...")],
-                                message_id=str(uuid.uuid4())
+                        yield {"statusUpdate": status_update.model_dump(by_alias=True)}
+                        tool_call_in_progress = True
+
+                elif any(
+                    isinstance(item, StreamingTextContent)
+                    for item in response_chunk.items
+                ):
+                    if not message_in_progress:
+                        status_update = TaskStatusUpdateEvent(
+                            task_id=message_obj.message_id,
+                            context_id=session_id,
+                            status=TaskStatus(
+                                state="working",
+                                message=Message(
+                                    role="agent",
+                                    parts=[Part(text="Building the trip plan...")],
+                                    message_id=str(uuid.uuid4())
+                                )
                             )
                         )
-                    )
-                    yield {"statusUpdate": status_update.model_dump(by_alias=True)}
-                    message_in_progress = True
+                        yield {"statusUpdate": status_update.model_dump(by_alias=True)}
+                        message_in_progress = True
 
-                chunks.append(response_chunk.message)
+                    chunks.append(response_chunk.message)
 
         # Aggregate the chunks to form the complete message.
         if chunks:
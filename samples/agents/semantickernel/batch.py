@@ -0,0 +1,258 @@
+"""Runs a JSONL file of A2A messages through the travel agent offline.
+
+Each input line is a Message. Results are appended to the output file as
+they complete, one JSON object per line with the message id and either the
+task or the error. Lines are read only as workers become free, so memory
+use does not grow with the size of the batch. Run from the repository root:
+
+    python -m samples.agents.semantickernel.batch \\
+        --input queries.jsonl --output results.jsonl
+
+An interrupted run continues where it stopped when started again with the
+same arguments.
+"""
+
+import asyncio
+import json
+import logging
+import os
+
+from collections import OrderedDict
+from typing import Any
+
+import click
+
+from pydantic import ValidationError
+
+from samples.common.types import Message
+
+
+logger = logging.getLogger(__name__)
+
+
+class BatchCheckpoint:
+    """Progress of a batch run, saved after every completed message.
+
+    Messages finish out of order, so the checkpoint keeps the input offset
+    before which every line is done, plus the ids of the messages completed
+    beyond it. Only lines that were in flight lie beyond the offset, so the
+    checkpoint stays small however long the input is.
+    """
+
+    def __init__(self, path: str, input_path: str):
+        self.path = path
+        self.input_path = os.path.abspath(input_path)
+        self.offset = 0
+        self.completed: set[str] = set()
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self):
+        with open(self.path) as f:
+            data = json.load(f)
+        if data['input'] != self.input_path:
+            raise ValueError(
+                f'Checkpoint {self.path} belongs to {data["input"]}, '
+                f'not {self.input_path}'
+            )
+        self.offset = data['offset']
+        self.completed = set(data['completed'])
+
+    def save(self):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(
+                {
+                    'input': self.input_path,
+                    'offset': self.offset,
+                    'completed': sorted(self.completed),
+                },
+                f,
+            )
+        os.replace(temp_path, self.path)
+
+
+class BatchRunner:
+    """Drives agent.send_message over a JSONL file with bounded concurrency.
+
+    Results are written at least once: a crash between writing a result and
+    saving the checkpoint repeats that message on resume, so consumers
+    should deduplicate on message_id.
+    """
+
+    def __init__(
+        self,
+        agent,
+        input_path: str,
+        output_path: str,
+        checkpoint_path: str | None = None,
+        concurrency: int = 8,
+        retries: int = 2,
+    ):
+        """Initialize the runner.
+
+        Args:
+            agent: Has send_message(message, session_id), e.g. a
+                SemanticKernelTravelAgent.
+            input_path: JSONL file with one Message per line.
+            output_path: JSONL file the results are appended to.
+            checkpoint_path: Where progress is saved. Defaults to the output
+                path with a .checkpoint suffix.
+            concurrency: Number of messages processed at the same time.
+            retries: Further attempts for a message whose processing raised.
+        """
+        self.agent = agent
+        self.input_path = input_path
+        self.output_path = output_path
+        self.checkpoint = BatchCheckpoint(
+            checkpoint_path or output_path + '.checkpoint', input_path
+        )
+        self.concurrency = concurrency
+        self.retries = retries
+        # Input lines past checkpoint.offset, by start offset, in input
+        # order: end offset, message id, and whether it is done.
+        self._window: OrderedDict[int, list[Any]] = OrderedDict()
+        self._output = None
+        self.counts = {'completed': 0, 'failed': 0, 'skipped': 0}
+
+    async def run(self) -> dict[str, int]:
+        """Processes every line not done yet; returns counts of this run."""
+        resume = self.checkpoint.exists
+        if resume:
+            self.checkpoint.load()
+            logger.info(
+                f'Resuming {self.input_path} at byte {self.checkpoint.offset} '
+                f'with {len(self.checkpoint.completed)} messages done beyond it'
+            )
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        with open(self.output_path, 'a' if resume else 'w') as self._output:
+            tasks = [asyncio.create_task(self._read(queue))] + [
+                asyncio.create_task(self._worker(queue))
+                for _ in range(self.concurrency)
+            ]
+            try:
+                # Fail fast rather than leave the reader waiting for a
+                # worker that died.
+                done, _ = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_EXCEPTION
+                )
+                for task in done:
+                    task.result()
+            finally:
+                for task in tasks:
+                    task.cancel()
+        return self.counts
+
+    async def _read(self, queue: asyncio.Queue):
+        with open(self.input_path, 'rb') as f:
+            f.seek(self.checkpoint.offset)
+            start = self.checkpoint.offset
+            for line in f:
+                end = start + len(line)
+                self._window[start] = [end, None, False]
+                message, error = self._parse(line)
+                if message is None:
+                    if error is not None:
+                        self._write({'offset': start, 'error': error})
+                        self.counts['failed'] += 1
+                    self._done(start)
+                elif message.message_id in self.checkpoint.completed:
+                    self._window[start][1] = message.message_id
+                    self.counts['skipped'] += 1
+                    self._done(start)
+                else:
+                    self._window[start][1] = message.message_id
+                    # Blocks while all workers are busy, so only a bounded
+                    # number of lines is ever held in memory.
+                    await queue.put((start, message))
+                start = end
+        for _ in range(self.concurrency):
+            await queue.put(None)
+
+    @staticmethod
+    def _parse(line: bytes) -> tuple[Message | None, str | None]:
+        if not line.strip():
+            return None, None
+        try:
+            return Message.model_validate_json(line), None
+        except ValidationError as e:
+            return None, f'Invalid message: {e}'
+
+    async def _worker(self, queue: asyncio.Queue):
+        while (item := await queue.get()) is not None:
+            start, message = item
+            self._write(await self._process(message))
+            self._done(start)
+
+    async def _process(self, message: Message) -> dict[str, Any]:
+        session_id = message.context_id or message.message_id
+        for attempt in range(self.retries + 1):
+            try:
+                task = await self.agent.send_message(message, session_id)
+            except Exception as e:
+                if attempt == self.retries:
+                    logger.warning(f'Message {message.message_id} failed: {e}')
+                    self.counts['failed'] += 1
+                    return {'message_id': message.message_id, 'error': str(e)}
+                await asyncio.sleep(2**attempt)
+            else:
+                self.counts['completed'] += 1
+                return {
+                    'message_id': message.message_id,
+                    'task': task.model_dump(by_alias=True, exclude_none=True),
+                }
+
+    def _write(self, record: dict[str, Any]):
+        self._output.write(json.dumps(record) + '\n')
+        self._output.flush()
+
+    def _done(self, start: int):
+        entry = self._window[start]
+        entry[2] = True
+        if entry[1] is not None:
+            self.checkpoint.completed.add(entry[1])
+        # Move the offset past every leading line that is done; their ids
+        # are no longer needed.
+        while self._window:
+            first, (end, message_id, done) = next(iter(self._window.items()))
+            if not done:
+                break
+            del self._window[first]
+            self.checkpoint.offset = end
+            self.checkpoint.completed.discard(message_id)
+        self.checkpoint.save()
+        processed = self.counts['completed'] + self.counts['failed']
+        if processed and processed % 100 == 0:
+            logger.info(f'{processed} messages processed')
+
+
+@click.command()
+@click.option('--input', 'input_path', required=True)
+@click.option('--output', 'output_path', required=True)
+@click.option('--checkpoint', 'checkpoint_path', default=None)
+@click.option('--concurrency', default=8)
+@click.option('--retries', default=2)
+def main(input_path, output_path, checkpoint_path, concurrency, retries):
+    """Runs every message in a JSONL file through the travel agent."""
+    from samples.agents.semantickernel.agent import SemanticKernelTravelAgent
+
+    logging.basicConfig(level=logging.INFO)
+    runner = BatchRunner(
+        SemanticKernelTravelAgent(),
+        input_path,
+        output_path,
+        checkpoint_path,
+        concurrency,
+        retries,
+    )
+    counts = asyncio.run(runner.run())
+    logger.info(
+        f'Completed {counts["completed"]}, failed {counts["failed"]}, '
+        f'skipped {counts["skipped"]} already done'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,9 @@
-import asyncio
 import logging
 
 from collections.abc import AsyncIterable
 
 from samples.agents.semantickernel.agent import SemanticKernelTravelAgent
+from samples.common.server.scheduler import AgentRunScheduler, RunPriority
 from samples.common.server.task_manager import InMemoryTaskManager
 from samples.common.types import (
     Artifact,
@@ -15,12 +15,18 @@ from samples.common.types import (
     SendTaskResponse,
     SendTaskStreamingRequest,
     SendTaskStreamingResponse,
+    SetTaskPushNotificationRequest,
+    SetTaskPushNotificationResponse,
     TaskArtifactUpdateEvent,
     TaskState,
     TaskStatus,
     TaskStatusUpdateEvent,
 )
+from samples.common.utils.blob_store import BlobStore
 from samples.common.utils.push_notification_auth import PushNotificationSenderAuth
+from samples.common.utils.push_notification_dispatcher import (
+    PushNotificationDispatcher,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -29,11 +35,31 @@ logger = logging.getLogger(__name__)
 class TaskManager(InMemoryTaskManager):
     """A TaskManager used for the Semantic Kernel Agent sample."""
 
-    def __init__(self, notification_sender_auth: PushNotificationSenderAuth):
-        """Initialize the TaskManager with a notification sender."""
+    def __init__(
+        self,
+        notification_sender_auth: PushNotificationSenderAuth,
+        notification_dispatcher: PushNotificationDispatcher | None = None,
+        scheduler: AgentRunScheduler | None = None,
+        blob_store: BlobStore | None = None,
+    ):
+        """Initialize the TaskManager with a notification sender.
+
+        Args:
+            notification_sender_auth: Signs outgoing push notifications.
+            notification_dispatcher: Delivers push notifications in the
+                background. A default dispatcher is created if omitted.
+            scheduler: Limits and orders concurrent agent runs. A default
+                scheduler is created if omitted.
+            blob_store: Store the agent reads file parts sent by URI from.
+        """
         super().__init__()
-        self.agent = SemanticKernelTravelAgent()
+        self.agent = SemanticKernelTravelAgent(blob_store=blob_store)
         self.notification_sender_auth = notification_sender_auth
+        self.notification_dispatcher = (
+            notification_dispatcher
+            or PushNotificationDispatcher(notification_sender_auth)
+        )
+        self.scheduler = scheduler or AgentRunScheduler()
 
     async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
         """A method to handle a task request.
@@ -55,9 +81,20 @@ class TaskManager(InMemoryTaskManager):
         await self.send_task_notification(task)
 
         query = request.params.message.parts[0].text
+        # A client that asked for push notifications does not need the
+        # response to learn the outcome, so the run can wait behind
+        # interactive ones. The request is still open, though; the
+        # scheduler's max_background_wait bounds how long it waits.
+        priority = (
+            RunPriority.BACKGROUND
+            if request.params.pushNotification
+            else RunPriority.INTERACTIVE
+        )
         try:
-            agent_response = await self.agent.invoke(
-                query, request.params.sessionId
+            agent_response = await self.scheduler.submit(
+                self.agent.invoke(query, request.params.sessionId),
+                request.params.sessionId,
+                priority,
             )
         except Exception as e:
             logger.error(f'Semantic Kernel Task Manager error: {e}')
@@ -83,7 +120,11 @@ class TaskManager(InMemoryTaskManager):
 
             await self.upsert_task(request.params)
             sse_queue = await self.setup_sse_consumer(request.params.id, False)
-            asyncio.create_task(self._run_streaming_agent(request))
+            self.scheduler.submit(
+                self._run_streaming_agent(request),
+                request.params.sessionId,
+                RunPriority.INTERACTIVE,
+            )
             return self.dequeue_events_for_sse(
                 request.id, request.params.id, sse_queue
             )
@@ -232,8 +273,34 @@ class TaskManager(InMemoryTaskManager):
             )
         return None
 
+    async def on_set_task_push_notification(
+        self, request: SetTaskPushNotificationRequest
+    ) -> SetTaskPushNotificationResponse:
+        """Register a push notification URL after verifying it.
+
+        Args:
+            request: The request containing the push notification config.
+
+        Returns:
+            SetTaskPushNotificationResponse: The stored config or an error.
+        """
+        url = request.params.pushNotificationConfig.url
+        if not await self.notification_sender_auth.verify_push_notification_url(
+            url
+        ):
+            return SetTaskPushNotificationResponse(
+                id=request.id,
+                error=InvalidParamsError(
+                    message='Push notification URL is invalid'
+                ),
+            )
+        return await super().on_set_task_push_notification(request)
+
     async def send_task_notification(self, task: SendTaskRequest) -> None:
-        """Send a push notification for the task.
+        """Queue a push notification for the task.
+
+        Delivery happens in the background, so webhook latency does not hold
+        up the agent.
 
         Args:
             task: The task object containing the parameters.
@@ -241,6 +308,12 @@ class TaskManager(InMemoryTaskManager):
         if not await self.has_push_notification_info(task.id):
             return
         push_info = await self.get_push_notification_info(task.id)
-        await self.notification_sender_auth.send_push_notification(
-            push_info.url, data=task.model_dump(exclude_none=True)
+        self.notification_dispatcher.enqueue(
+            task.id, push_info.url, data=task.model_dump(exclude_none=True)
         )
+
+    async def shutdown(self) -> None:
+        """Finish agent runs and queued push notifications before stopping."""
+        await self.scheduler.shutdown(drain=True, timeout=30)
+        await self.notification_dispatcher.close()
+        await super().shutdown()
@@ -0,0 +1,83 @@
+"""Measures A2AClient tail latency with one slow replica.
+
+Starts several local stub A2A servers, one of which answers slowly, and
+advertises all of them as JSON-RPC interfaces on one agent card. get_task
+latency is then measured with least-outstanding balancing alone and with
+hedging enabled. Run from the samples directory:
+
+    python -m benchmarks.a2a_client_hedging --calls 1000 --hedge-after 0.02
+"""
+
+import asyncio
+import time
+
+import click
+
+from common.client import A2AClient
+from common.types import AgentCard, AgentInterface
+
+from benchmarks.a2a_client_pooling import start_stub_server
+
+
+def _percentile(ordered: list[float], p: float) -> float:
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+async def _run(
+    card: AgentCard, calls: int, concurrency: int, hedge_after: float | None
+) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with A2AClient(agent_card=card, hedge_after=hedge_after) as client:
+
+        async def call(i: int):
+            async with semaphore:
+                start = time.perf_counter()
+                await client.get_task({'id': f'task-{i}'})
+                latencies.append(time.perf_counter() - start)
+
+        # Warm up the connection pool outside the measurement.
+        await asyncio.gather(*(call(i) for i in range(concurrency)))
+        latencies.clear()
+        await asyncio.gather(*(call(i) for i in range(calls)))
+    return sorted(latencies)
+
+
+@click.command()
+@click.option('--calls', default=1000)
+@click.option('--concurrency', default=4)
+@click.option('--replicas', default=3, help='Number of stub servers.')
+@click.option('--delay', default=0.002, help='Response time of fast replicas.')
+@click.option('--slow-delay', default=0.2, help='Response time of the slow one.')
+@click.option('--hedge-after', default=0.02)
+def main(calls, concurrency, replicas, delay, slow_delay, hedge_after):
+    """Prints get_task latency percentiles with and without hedging."""
+    servers = [start_stub_server(slow_delay)] + [
+        start_stub_server(delay) for _ in range(replicas - 1)
+    ]
+    urls = [url for url, _ in servers]
+    card = AgentCard(
+        name='benchmark',
+        description='Stub replicas',
+        url=urls[0],
+        supported_interfaces=[
+            AgentInterface(protocol_binding='JSONRPC', url=url)
+            for url in urls[1:]
+        ],
+    )
+    try:
+        print(f'{"mode":<12} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}')
+        for label, hedge in (('balanced', None), ('hedged', hedge_after)):
+            latencies = asyncio.run(_run(card, calls, concurrency, hedge))
+            p50, p95, p99 = (
+                _percentile(latencies, p) * 1000 for p in (50, 95, 99)
+            )
+            print(f'{label:<12} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}')
+    finally:
+        for _, server in servers:
+            server.should_exit = True
+
+
+if __name__ == '__main__':
+    main()
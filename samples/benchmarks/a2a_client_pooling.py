@@ -0,0 +1,102 @@
+"""Compares A2AClient throughput with and without connection reuse.
+
+Starts a local stub A2A server and issues get_task calls, once through a
+single long-lived client and once through a fresh client per call (the
+previous behaviour). Run from the samples directory:
+
+    python -m benchmarks.a2a_client_pooling --calls 2000 --concurrency 16
+"""
+
+import asyncio
+import functools
+import socket
+import threading
+import time
+
+import click
+import uvicorn
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from common.client import A2AClient
+
+
+async def _handle_rpc(request: Request, delay: float = 0.0) -> JSONResponse:
+    body = await request.json()
+    if delay:
+        await asyncio.sleep(delay)
+    return JSONResponse(
+        {
+            'jsonrpc': '2.0',
+            'id': body.get('id'),
+            'result': {
+                'id': body['params']['id'],
+                'sessionId': 'benchmark',
+                'status': {'state': 'completed'},
+            },
+        }
+    )
+
+
+def start_stub_server(delay: float = 0.0) -> tuple[str, uvicorn.Server]:
+    """Runs a stub JSON-RPC endpoint on a free local port in a thread.
+
+    Args:
+        delay: Seconds the endpoint waits before answering.
+    """
+    app = Starlette()
+    app.add_route(
+        '/', functools.partial(_handle_rpc, delay=delay), methods=['POST']
+    )
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(app, log_level='warning', timeout_keep_alive=30)
+    )
+    threading.Thread(
+        target=server.run, kwargs={'sockets': [sock]}, daemon=True
+    ).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f'http://127.0.0.1:{port}/', server
+
+
+async def _run(url: str, calls: int, concurrency: int, reuse: bool) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    shared_client = A2AClient(url=url)
+
+    async def call(i: int):
+        async with semaphore:
+            if reuse:
+                await shared_client.get_task({'id': f'task-{i}'})
+            else:
+                async with A2AClient(url=url) as client:
+                    await client.get_task({'id': f'task-{i}'})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(calls)))
+    elapsed = time.perf_counter() - start
+    await shared_client.close()
+    return calls / elapsed
+
+
+@click.command()
+@click.option('--calls', default=1000)
+@click.option('--concurrency', default=8)
+def main(calls, concurrency):
+    """Prints calls/s for a pooled client and for a client per call."""
+    url, server = start_stub_server()
+    try:
+        for reuse in (False, True):
+            rate = asyncio.run(_run(url, calls, concurrency, reuse))
+            label = 'pooled client' if reuse else 'client per call'
+            print(f'{label:<16} {rate:>10.0f} calls/s')
+    finally:
+        server.should_exit = True
+
+
+if __name__ == '__main__':
+    main()
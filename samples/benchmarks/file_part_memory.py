@@ -0,0 +1,101 @@
+"""Measures peak RSS of decoding a large file part.
+
+Each variant runs in its own interpreter. The peak RSS counter is reset
+(Linux /proc/self/clear_refs) once the input is loaded, so the reported
+growth is what the operation itself costs on top of the encoded part that
+is already in memory. Run from the samples directory:
+
+    python -m benchmarks.file_part_memory --size-mb 100
+"""
+
+import base64
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import click
+
+from common.utils.file_parts import decode_file_bytes
+
+
+VARIANTS = {
+    'decode in memory': 'decode-inline',
+    'decode via disk': 'decode-spill',
+}
+
+
+def _status_kib(field: str) -> int:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+def _measure(variant: str, encoded_path: str) -> dict:
+    with open(encoded_path) as f:
+        data = f.read()
+    gc.collect()
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')  # reset VmHWM to the current RSS
+    baseline = _status_kib('VmRSS')
+
+    if variant == 'decode-inline':
+        # What convert_part did before: the whole part as bytes.
+        result = base64.b64decode(data)
+    else:
+        # What convert_part does now, read-back included.
+        result = decode_file_bytes(data)
+
+    return {'baseline_kib': baseline, 'peak_kib': _status_kib('VmHWM')}
+
+
+@click.command()
+@click.option('--size-mb', default=100)
+@click.option('--variant', hidden=True)
+@click.option('--encoded', hidden=True)
+def main(size_mb, variant, encoded):
+    """Prints the RSS growth of each variant for a size_mb attachment."""
+    if variant:
+        print(json.dumps(_measure(variant, encoded)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        encoded = os.path.join(directory, 'attachment.b64')
+        with open(encoded, 'wb') as encoded_file:
+            # Chunks are a multiple of 3 bytes so their encodings concatenate
+            # without padding in between.
+            remaining = size_mb * 1024 * 1024
+            while remaining > 0:
+                chunk = os.urandom(min(remaining, 3 * 256 * 1024))
+                encoded_file.write(base64.b64encode(chunk))
+                remaining -= len(chunk)
+
+        print(f'{"variant":<18} {"RSS growth MiB":>15} {"peak RSS MiB":>13}')
+        for label, name in VARIANTS.items():
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    '-m',
+                    'benchmarks.file_part_memory',
+                    '--variant',
+                    name,
+                    '--encoded',
+                    encoded,
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output)
+            growth = (result['peak_kib'] - result['baseline_kib']) / 1024
+            print(
+                f'{label:<18} {growth:>15.1f} {result["peak_kib"] / 1024:>13.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Measures InMemoryCache throughput under concurrent access.
+
+Run from the repository root:
+
+    python -m samples.benchmarks.in_memory_cache --threads 1,2,4,8
+"""
+
+import random
+import threading
+import time
+
+import click
+
+from samples.common.utils.in_memory_cache import InMemoryCache
+
+
+def _worker(
+    cache: InMemoryCache,
+    operations: int,
+    keys: int,
+    write_ratio: float,
+    ttl: int | None,
+    seed: int,
+):
+    rng = random.Random(seed)
+    for _ in range(operations):
+        key = f'key-{rng.randrange(keys)}'
+        if rng.random() < write_ratio:
+            cache.set(key, key, ttl=ttl)
+        else:
+            cache.get(key)
+
+
+@click.command()
+@click.option('--threads', default='1,2,4,8')
+@click.option('--operations', default=200_000, help='Operations per thread.')
+@click.option('--keys', default=50_000)
+@click.option('--write_ratio', default=0.2)
+@click.option('--max_entries', default=10_000)
+@click.option('--ttl', default=None, type=int)
+def main(threads, operations, keys, write_ratio, max_entries, ttl):
+    """Runs a random get/set mix on 1..N threads and prints ops/s and stats."""
+    cache = InMemoryCache()
+    print(f'{"threads":>7} {"ops/s":>12} {"hit rate":>9} {"evictions":>10}')
+    for thread_count in [int(t) for t in threads.split(',')]:
+        cache.clear()
+        cache.configure(max_entries=max_entries)
+        before = cache.stats()
+        workers = [
+            threading.Thread(
+                target=_worker,
+                args=(cache, operations, keys, write_ratio, ttl, seed),
+            )
+            for seed in range(thread_count)
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        stats = cache.stats()
+        hits = stats['hits'] - before['hits']
+        lookups = hits + stats['misses'] - before['misses']
+        print(
+            f'{thread_count:>7} {thread_count * operations / elapsed:>12.0f}'
+            f' {hits / lookups if lookups else 0:>9.2%}'
+            f' {stats["evictions"] - before["evictions"]:>10}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Compares push-notification signing and verification throughput.
+
+Run from the repository root:
+
+    python -m samples.benchmarks.push_notification_signing --iterations 2000
+"""
+
+import time
+
+import click
+import jwt
+
+from jwt import PyJWK
+
+from samples.common.utils.push_notification_auth import (
+    SUPPORTED_SIGNING_ALGORITHMS,
+    PushNotificationSenderAuth,
+)
+
+
+SAMPLE_PAYLOAD = {
+    'id': 'c2a6a3d3-8e5b-4c48-b0a5-7b7d1f1f5f10',
+    'sessionId': '7f3e4d9c0b8a4c1e9d2f6a5b3c7e8f90',
+    'status': {
+        'state': 'working',
+        'message': {
+            'role': 'agent',
+            'parts': [{'type': 'text', 'text': 'Building the trip plan...'}],
+        },
+    },
+}
+
+
+def _ops_per_second(iterations: int, fn) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - start)
+
+
+@click.command()
+@click.option('--iterations', default=1000)
+def main(iterations):
+    """Measures sign and verify operations per second for each algorithm."""
+    print(f'{"algorithm":<10} {"sign/s":>12} {"verify/s":>12}')
+    for algorithm in SUPPORTED_SIGNING_ALGORITHMS:
+        sender = PushNotificationSenderAuth(algorithm=algorithm)
+        sender.generate_jwk()
+        public_key = PyJWK(sender.public_keys[-1])
+        token = sender._generate_jwt(SAMPLE_PAYLOAD)
+
+        sign_rate = _ops_per_second(
+            iterations, lambda: sender._generate_jwt(SAMPLE_PAYLOAD)
+        )
+        verify_rate = _ops_per_second(
+            iterations,
+            lambda: jwt.decode(
+                token,
+                public_key,
+                options={'require': ['iat', 'request_body_sha256']},
+                algorithms=SUPPORTED_SIGNING_ALGORITHMS,
+            ),
+        )
+        print(f'{algorithm:<10} {sign_rate:>12.0f} {verify_rate:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,10 @@
+import asyncio
 import json
+import logging
+import time
+import weakref
+
+from dataclasses import dataclass
 
 import httpx
 
@@ -6,18 +12,173 @@ from common.types import (
     A2AClientJSONError,
     AgentCard,
 )
+from common.utils.in_memory_cache import InMemoryCache
+
+
+logger = logging.getLogger(__name__)
+
+CARD_CACHE_PREFIX = 'agent_card:'
+
+
+@dataclass
+class _CachedCard:
+    card: AgentCard
+    etag: str | None
+    fresh_until: float
+    stale_until: float
+
+
+def _parse_cache_control(header: str | None) -> dict[str, str | None]:
+    directives = {}
+    for directive in (header or '').split(','):
+        name, _, value = directive.strip().partition('=')
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
 
 
 class A2ACardResolver:
-    def __init__(self, base_url, agent_card_path='/.well-known/agent.json'):
+    """Fetches agent cards through a process-wide cache.
+
+    Cards are kept for the Cache-Control max-age of the response (or
+    default_max_age without one) and revalidated with If-None-Match when
+    the server sent an ETag. If the response allows it with
+    stale-while-revalidate, an expired card is returned at once within that
+    window while a background request refreshes it.
+    """
+
+    # One background refresh per card URL across all resolvers on a loop.
+    # Tasks cannot be shared between loops, so they are kept per loop.
+    _refreshes: weakref.WeakKeyDictionary[
+        asyncio.AbstractEventLoop, dict[str, asyncio.Task]
+    ] = weakref.WeakKeyDictionary()
+
+    def __init__(
+        self,
+        base_url,
+        agent_card_path='/.well-known/agent.json',
+        httpx_client: httpx.AsyncClient | None = None,
+        default_max_age: int = 300,
+    ):
         self.base_url = base_url.rstrip('/')
         self.agent_card_path = agent_card_path.lstrip('/')
+        self.httpx_client = httpx_client
+        self.default_max_age = default_max_age
+        self.cache = InMemoryCache()
+
+    @property
+    def card_url(self) -> str:
+        return self.base_url + '/' + self.agent_card_path
 
     def get_agent_card(self) -> AgentCard:
+        """Blocking variant of get_agent_card_async without background refresh."""
+        cached = self.cache.get(CARD_CACHE_PREFIX + self.card_url)
+        if cached is not None and time.time() < cached.fresh_until:
+            return cached.card
         with httpx.Client() as client:
-            response = client.get(self.base_url + '/' + self.agent_card_path)
+            response = client.get(
+                self.card_url, headers=self._conditional_headers(cached)
+            )
+        return self._store_response(response, cached)
+
+    async def get_agent_card_async(self) -> AgentCard:
+        """Returns the agent card, from the cache when possible."""
+        cached = self.cache.get(CARD_CACHE_PREFIX + self.card_url)
+        now = time.time()
+        if cached is not None and now < cached.fresh_until:
+            return cached.card
+        if cached is not None and now < cached.stale_until:
+            self._schedule_refresh(cached)
+            return cached.card
+        return await self._revalidate(cached)
+
+    def _schedule_refresh(self, cached: _CachedCard):
+        url = self.card_url
+        refreshes = self._refreshes.setdefault(asyncio.get_running_loop(), {})
+        refresh = refreshes.get(url)
+        if refresh is not None and not refresh.done():
+            return
+
+        async def _refresh():
+            try:
+                await self._revalidate(cached)
+            except Exception as e:
+                logger.warning(f'Refreshing agent card {url} failed: {e}')
+            finally:
+                refreshes.pop(url, None)
+
+        refreshes[url] = asyncio.create_task(_refresh())
+
+    async def _revalidate(self, cached: _CachedCard | None) -> AgentCard:
+        headers = self._conditional_headers(cached)
+        if self.httpx_client is not None:
+            response = await self.httpx_client.get(
+                self.card_url, headers=headers
+            )
+        else:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(self.card_url, headers=headers)
+        return self._store_response(response, cached)
+
+    @staticmethod
+    def _conditional_headers(cached: _CachedCard | None) -> dict[str, str]:
+        if cached is not None and cached.etag:
+            return {'If-None-Match': cached.etag}
+        return {}
+
+    def _store_response(
+        self, response: httpx.Response, cached: _CachedCard | None
+    ) -> AgentCard:
+        if response.status_code == 304 and cached is not None:
+            card = cached.card
+            etag = response.headers.get('ETag', cached.etag)
+        else:
             response.raise_for_status()
             try:
-                return AgentCard(**response.json())
+                card = AgentCard(**response.json())
             except json.JSONDecodeError as e:
                 raise A2AClientJSONError(str(e)) from e
+            etag = response.headers.get('ETag')
+
+        cache_control = _parse_cache_control(
+            response.headers.get('Cache-Control')
+        )
+        key = CARD_CACHE_PREFIX + self.card_url
+        if 'no-store' in cache_control:
+            self.cache.delete(key)
+            return card
+
+        max_age = self.default_max_age
+        if 'no-cache' in cache_control:
+            max_age = 0
+        elif 'max-age' in cache_control:
+            try:
+                max_age = int(cache_control['max-age'])
+            except (TypeError, ValueError):
+                pass
+        # Only serve a stale card if the server explicitly allows it.
+        stale_ttl = 0
+        if (
+            'stale-while-revalidate' in cache_control
+            and 'no-cache' not in cache_control
+        ):
+            try:
+                stale_ttl = int(cache_control['stale-while-revalidate'])
+            except (TypeError, ValueError):
+                pass
+
+        now = time.time()
+        # Without a validator there is nothing cheap to revalidate with, but
+        # the card is still worth keeping for its max-age.
+        if max_age > 0 or etag:
+            self.cache.set(
+                key,
+                _CachedCard(
+                    card=card,
+                    etag=etag,
+                    fresh_until=now + max_age,
+                    stale_until=now + max_age + stale_ttl,
+                ),
+                ttl=max_age + stale_ttl if not etag else None,
+            )
+        return card
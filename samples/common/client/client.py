@@ -1,12 +1,14 @@
+import asyncio
+import itertools
 import json
 
-from collections.abc import AsyncIterable
-from typing import Any
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Any, Literal
 
 import httpx
 
 from httpx._types import TimeoutTypes
-from httpx_sse import connect_sse
+from pydantic import ValidationError
 
 from common.types import (
     A2AClientHTTPError,
@@ -26,60 +28,264 @@ from common.types import (
     SetTaskPushNotificationRequest,
     SetTaskPushNotificationResponse,
 )
+from common.utils.blob_store import BLOB_PATH, CHUNK_BYTES, file_digest
+from common.utils.deadline import (
+    DEADLINE_HEADER,
+    DEADLINE_METADATA_KEY,
+    current_deadline,
+    remaining_timeout,
+)
+
+
+JSONRPC_BINDINGS = {'JSONRPC', 'JSON-RPC'}
+
+
+def _jsonrpc_urls(agent_card: AgentCard) -> list[str]:
+    urls = [agent_card.url] if agent_card.url else []
+    for interface in agent_card.supported_interfaces or []:
+        if (
+            interface.protocol_binding.upper() in JSONRPC_BINDINGS
+            and interface.url
+            and interface.url not in urls
+        ):
+            urls.append(interface.url)
+    return urls
 
 
 class A2AClient:
+    """JSON-RPC client for a remote A2A agent.
+
+    Requests share one pooled httpx.AsyncClient, so connections (and TLS
+    sessions) are reused across calls. Use the client as an async context
+    manager, or call close(), to release the pool.
+
+    When the agent card lists several JSON-RPC interfaces, every request goes
+    to the one with the fewest requests in flight. Idempotent reads can also
+    be hedged: if the first replica has not answered after hedge_after
+    seconds, the request is repeated on another one and the first response
+    wins.
+
+    Inside a deadline_scope, requests carry the deadline to the agent and
+    their timeouts are cut to the time left; once it has passed, requests
+    fail with DeadlineExceededError without being sent.
+    """
+
     def __init__(
         self,
         agent_card: AgentCard = None,
         url: str = None,
         timeout: TimeoutTypes = 60.0,
+        limits: httpx.Limits | None = None,
+        http2: bool = False,
+        httpx_client: httpx.AsyncClient | None = None,
+        hedge_after: float | None = None,
     ):
+        """Initialize the client.
+
+        Args:
+            agent_card: Card of the remote agent; its url and JSON-RPC
+                supported_interfaces are used.
+            url: Endpoint of the remote agent, if no card is given.
+            timeout: Timeout for non-streaming requests.
+            limits: Connection pool size and keep-alive settings.
+            http2: Negotiate HTTP/2. Requires the httpx[http2] extra.
+            httpx_client: Use this client instead of creating one. It is not
+                closed by close().
+            hedge_after: Seconds after which an idempotent request is sent
+                to a second interface as well. None disables hedging.
+        """
         if agent_card:
-            self.url = agent_card.url
+            self.urls = _jsonrpc_urls(agent_card)
         elif url:
-            self.url = url
+            self.urls = [url]
         else:
             raise ValueError('Must provide either agent_card or url')
+        if not self.urls:
+            raise ValueError('Agent card has no JSON-RPC endpoint')
+        self.url = self.urls[0]
+        self.hedge_after = hedge_after
+        self._outstanding = dict.fromkeys(self.urls, 0)
+        self._rotation = itertools.count()
         self.timeout = timeout
+        self.limits = limits or httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=20,
+            keepalive_expiry=30.0,
+        )
+        self.http2 = http2
+        self._httpx_client = httpx_client
+        self._owns_httpx_client = httpx_client is None
+
+    async def __aenter__(self) -> 'A2AClient':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        if self._owns_httpx_client and self._httpx_client is not None:
+            await self._httpx_client.aclose()
+            self._httpx_client = None
+
+    def _get_httpx_client(self) -> httpx.AsyncClient:
+        # Created lazily so the client can be constructed outside an event
+        # loop, e.g. by HostAgent.__init__.
+        if self._httpx_client is None or self._httpx_client.is_closed:
+            self._httpx_client = httpx.AsyncClient(
+                limits=self.limits, http2=self.http2, timeout=self.timeout
+            )
+            self._owns_httpx_client = True
+        return self._httpx_client
 
     async def send_task(self, payload: dict[str, Any]) -> SendTaskResponse:
         request = SendTaskRequest(params=payload)
         return SendTaskResponse(**await self._send_request(request))
 
     async def send_task_streaming(
-        self, payload: dict[str, Any]
-    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        self,
+        payload: dict[str, Any],
+        output: Literal['model', 'dict', 'bytes'] = 'model',
+    ) -> AsyncIterable[SendTaskStreamingResponse | dict[str, Any] | bytes]:
+        """Sends a task and yields its events as they arrive.
+
+        Args:
+            payload: The task send parameters.
+            output: How each event is yielded: a validated
+                SendTaskStreamingResponse ('model'), the parsed JSON
+                ('dict') or the raw event data ('bytes'). The cheaper forms
+                suit consumers that only forward or filter events.
+        """
         request = SendTaskStreamingRequest(params=payload)
-        with httpx.Client(timeout=None) as client:
-            with connect_sse(
-                client, 'POST', self.url, json=request.model_dump()
-            ) as event_source:
-                try:
-                    for sse in event_source.iter_sse():
-                        yield SendTaskStreamingResponse(**json.loads(sse.data))
-                except json.JSONDecodeError as e:
-                    raise A2AClientJSONError(str(e)) from e
-                except httpx.RequestError as e:
-                    raise A2AClientHTTPError(400, str(e)) from e
-
-    async def _send_request(self, request: JSONRPCRequest) -> dict[str, Any]:
-        async with httpx.AsyncClient() as client:
-            try:
-                # Image generation could take time, adding timeout
-                response = await client.post(
-                    self.url, json=request.model_dump(), timeout=self.timeout
-                )
+        body, headers, timeout = _with_deadline(request, None)
+        client = self._get_httpx_client()
+        url = self._acquire_url()
+        try:
+            async with client.stream(
+                'POST',
+                url,
+                json=body,
+                headers={**headers, 'Accept': 'text/event-stream'},
+                timeout=timeout,
+            ) as response:
                 response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                raise A2AClientHTTPError(e.response.status_code, str(e)) from e
-            except json.JSONDecodeError as e:
-                raise A2AClientJSONError(str(e)) from e
+                async for data in _aiter_sse_data(response):
+                    if output == 'bytes':
+                        yield data
+                    elif output == 'dict':
+                        yield json.loads(data)
+                    else:
+                        yield SendTaskStreamingResponse.model_validate_json(
+                            data
+                        )
+        except (json.JSONDecodeError, ValidationError) as e:
+            raise A2AClientJSONError(str(e)) from e
+        except httpx.HTTPStatusError as e:
+            raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+        except httpx.RequestError as e:
+            raise A2AClientHTTPError(400, str(e)) from e
+        finally:
+            self._release_url(url)
+
+    def _acquire_url(self, exclude: str | None = None) -> str:
+        """Picks the interface with the fewest requests in flight."""
+        start = next(self._rotation)
+        # Rotating the starting point spreads ties evenly.
+        candidates = [
+            self.urls[(start + i) % len(self.urls)]
+            for i in range(len(self.urls))
+        ]
+        url = min(
+            (u for u in candidates if u != exclude),
+            key=self._outstanding.__getitem__,
+        )
+        self._outstanding[url] += 1
+        return url
+
+    def _release_url(self, url: str):
+        self._outstanding[url] -= 1
+
+    async def _send_request(
+        self, request: JSONRPCRequest, idempotent: bool = False
+    ) -> dict[str, Any]:
+        if idempotent and self.hedge_after is not None and len(self.urls) > 1:
+            return await self._send_hedged(request)
+        return await self._post(request, self._acquire_url())
+
+    async def _post(self, request: JSONRPCRequest, url: str) -> dict[str, Any]:
+        client = self._get_httpx_client()
+        try:
+            # Image generation could take time, adding timeout
+            body, headers, timeout = _with_deadline(request, self.timeout)
+            response = await client.post(
+                url, json=body, headers=headers, timeout=timeout
+            )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+        except json.JSONDecodeError as e:
+            raise A2AClientJSONError(str(e)) from e
+        finally:
+            self._release_url(url)
+
+    async def _send_hedged(self, request: JSONRPCRequest) -> dict[str, Any]:
+        first_url = self._acquire_url()
+        attempts = {asyncio.create_task(self._post(request, first_url))}
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=self.hedge_after)
+            if not done:
+                attempts.add(
+                    asyncio.create_task(
+                        self._post(request, self._acquire_url(first_url))
+                    )
+                )
+            error = None
+            while attempts:
+                done, attempts = await asyncio.wait(
+                    attempts, return_when=asyncio.FIRST_COMPLETED
+                )
+                for attempt in done:
+                    if attempt.exception() is None:
+                        return attempt.result()
+                    error = attempt.exception()
+            raise error
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+    async def upload_blob(self, path: str) -> str:
+        """Makes a file available to the agent and returns its blob URI.
+
+        The URI can be sent in a file part instead of the file's content.
+        Files the agent already holds, e.g. attachments of earlier turns, are
+        recognised by their SHA-256 digest and not uploaded again.
+
+        Raises:
+            A2AClientHTTPError: The agent does not offer a blob store (404 or
+                405) or rejected the upload, e.g. with 413 if it is too large.
+            ValueError: The file changed while it was being uploaded.
+        """
+        client = self._get_httpx_client()
+        blobs_url = self.url.rstrip('/') + BLOB_PATH
+        digest = await asyncio.to_thread(file_digest, path)
+        try:
+            response = await client.head(f'{blobs_url}/{digest}')
+            if response.status_code == 200:
+                return str(response.url)
+            response = await client.post(blobs_url, content=_aiter_file(path))
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+        blob = response.json()
+        if blob['digest'] != digest:
+            raise ValueError(f'{path} changed during the upload')
+        return blob['uri']
 
     async def get_task(self, payload: dict[str, Any]) -> GetTaskResponse:
         request = GetTaskRequest(params=payload)
-        return GetTaskResponse(**await self._send_request(request))
+        return GetTaskResponse(
+            **await self._send_request(request, idempotent=True)
+        )
 
     async def cancel_task(self, payload: dict[str, Any]) -> CancelTaskResponse:
         request = CancelTaskRequest(params=payload)
@@ -98,5 +304,62 @@ class A2AClient:
     ) -> GetTaskPushNotificationResponse:
         request = GetTaskPushNotificationRequest(params=payload)
         return GetTaskPushNotificationResponse(
-            **await self._send_request(request)
+            **await self._send_request(request, idempotent=True)
         )
+
+
+def _with_deadline(
+    request: JSONRPCRequest, timeout: TimeoutTypes
+) -> tuple[dict[str, Any], dict[str, str], TimeoutTypes]:
+    """Returns the request body, headers and timeout for the current deadline."""
+    body = request.model_dump()
+    deadline = current_deadline()
+    if deadline is None:
+        return body, {}, timeout
+    params = body.get('params')
+    if isinstance(params, dict):
+        params['metadata'] = {
+            **(params.get('metadata') or {}),
+            DEADLINE_METADATA_KEY: deadline,
+        }
+    if not isinstance(timeout, int | float):
+        timeout = None
+    return body, {DEADLINE_HEADER: f'{deadline:.3f}'}, remaining_timeout(timeout)
+
+
+async def _aiter_file(path: str) -> AsyncIterator[bytes]:
+    with open(path, 'rb') as f:
+        while chunk := await asyncio.to_thread(f.read, CHUNK_BYTES):
+            yield chunk
+
+
+async def _aiter_sse_data(response: httpx.Response) -> AsyncIterator[bytes]:
+    """Incrementally parses a text/event-stream body.
+
+    Yields the data of each event as bytes as soon as its terminating blank
+    line arrives, without decoding the body to text first. Only the data
+    field is used by A2A; other fields and comments are skipped.
+    """
+    buffer = b''
+    data_lines: list[bytes] = []
+    skip_lf = False
+    async for chunk in response.aiter_bytes():
+        if skip_lf and chunk.startswith(b'\n'):
+            # The previous chunk ended in the middle of a CRLF.
+            chunk = chunk[1:]
+        skip_lf = chunk.endswith(b'\r')
+        buffer += chunk
+        lines = buffer.splitlines(keepends=True)
+        buffer = b''
+        if lines and not lines[-1].endswith((b'\n', b'\r')):
+            buffer = lines.pop()
+        for line in lines:
+            line = line.rstrip(b'\r\n')
+            if not line:
+                if data_lines:
+                    yield b'\n'.join(data_lines)
+                    data_lines = []
+            elif line.startswith(b'data:'):
+                value = line[5:]
+                data_lines.append(value[1:] if value.startswith(b' ') else value)
+    # Per the SSE spec an event without its terminating blank line is dropped.
@@ -1,5 +1,12 @@
+from .scheduler import AgentRunScheduler, RunPriority
 from .server import A2AServer
 from .task_manager import InMemoryTaskManager, TaskManager
 
 
-__all__ = ['A2AServer', 'InMemoryTaskManager', 'TaskManager']
+__all__ = [
+    'A2AServer',
+    'AgentRunScheduler',
+    'InMemoryTaskManager',
+    'RunPriority',
+    'TaskManager',
+]
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import time
+
+from collections import deque
+from collections.abc import Coroutine
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+
+logger = logging.getLogger(__name__)
+
+
+class RunPriority(IntEnum):
+    """Scheduling lanes. Lower values are dispatched first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+@dataclass
+class _ScheduledRun:
+    coro: Coroutine[Any, Any, Any]
+    session_id: str
+    priority: RunPriority
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class _Lane:
+    """Per-session FIFO queues served round robin."""
+
+    def __init__(self):
+        self.sessions: dict[str, deque[_ScheduledRun]] = {}
+        self.rotation: deque[str] = deque()
+        self.size = 0
+
+    def push(self, run: _ScheduledRun):
+        queue = self.sessions.get(run.session_id)
+        if queue is None:
+            queue = self.sessions[run.session_id] = deque()
+            self.rotation.append(run.session_id)
+        queue.append(run)
+        self.size += 1
+
+    def pop(self) -> _ScheduledRun:
+        session_id = self.rotation.popleft()
+        queue = self.sessions[session_id]
+        run = queue.popleft()
+        if queue:
+            self.rotation.append(session_id)
+        else:
+            del self.sessions[session_id]
+        self.size -= 1
+        return run
+
+    def oldest_enqueued_at(self) -> float:
+        return min(queue[0].enqueued_at for queue in self.sessions.values())
+
+    def drain(self) -> list[_ScheduledRun]:
+        runs = [run for queue in self.sessions.values() for run in queue]
+        self.sessions.clear()
+        self.rotation.clear()
+        self.size = 0
+        return runs
+
+
+class AgentRunScheduler:
+    """Runs agent coroutines with a global concurrency cap.
+
+    Runs wait in priority lanes; interactive runs are dispatched before
+    background runs. A background run that has waited max_background_wait
+    seconds goes ahead anyway, so a steady interactive load cannot starve it
+    (None disables this). Within a lane every session gets one run
+    dispatched in turn, so a burst from one session cannot starve the others.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_background_wait: float | None = 30.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_background_wait = max_background_wait
+        self._lanes = {priority: _Lane() for priority in RunPriority}
+        self._running: set[asyncio.Task] = set()
+        self._closed = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._counters = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0,
+        }
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._dispatched = 0
+
+    def submit(
+        self,
+        coro: Coroutine[Any, Any, Any],
+        session_id: str | None,
+        priority: RunPriority = RunPriority.INTERACTIVE,
+    ) -> asyncio.Future:
+        """Queue a coroutine for execution.
+
+        Args:
+            coro: The agent run to execute.
+            session_id: Session (context) the run belongs to, used for fair
+                queuing.
+            priority: Lane to queue the run in.
+
+        Returns:
+            A future with the result of the coroutine.
+        """
+        if self._closed:
+            coro.close()
+            raise RuntimeError('Scheduler is shut down')
+
+        future = asyncio.get_running_loop().create_future()
+        # Failures are logged in _on_run_done; mark them as retrieved so
+        # fire-and-forget callers do not trigger asyncio's unretrieved
+        # exception warning.
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._lanes[priority].push(
+            _ScheduledRun(
+                coro=coro,
+                session_id=session_id or '',
+                priority=priority,
+                future=future,
+            )
+        )
+        self._counters['submitted'] += 1
+        self._idle.clear()
+        self._dispatch()
+        return future
+
+    def _dispatch(self):
+        while len(self._running) < self.max_concurrency:
+            lane = self._next_lane()
+            if lane is None:
+                break
+            run = lane.pop()
+            if run.future.cancelled():
+                # The caller gave up while the run was still queued.
+                run.coro.close()
+                self._counters['cancelled'] += 1
+                continue
+
+            wait = time.monotonic() - run.enqueued_at
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            self._dispatched += 1
+
+            task = asyncio.create_task(run.coro)
+            self._running.add(task)
+            task.add_done_callback(
+                lambda t, run=run: self._on_run_done(t, run)
+            )
+            run.future.add_done_callback(
+                lambda f, task=task: task.cancel() if f.cancelled() else None
+            )
+
+        if not self._running and not any(
+            lane.size for lane in self._lanes.values()
+        ):
+            self._idle.set()
+
+    def _next_lane(self) -> _Lane | None:
+        lanes = [lane for lane in self._lanes.values() if lane.size]
+        if not lanes:
+            return None
+        if self.max_background_wait is not None:
+            now = time.monotonic()
+            for lane in lanes[1:]:
+                if now - lane.oldest_enqueued_at() >= self.max_background_wait:
+                    return lane
+        return lanes[0]
+
+    def _on_run_done(self, task: asyncio.Task, run: _ScheduledRun):
+        self._running.discard(task)
+        if task.cancelled():
+            self._counters['cancelled'] += 1
+            run.future.cancel()
+        elif task.exception() is not None:
+            self._counters['failed'] += 1
+            logger.error(
+                f'Agent run for session {run.session_id} failed: {task.exception()}'
+            )
+            if not run.future.done():
+                run.future.set_exception(task.exception())
+        else:
+            self._counters['completed'] += 1
+            if not run.future.done():
+                run.future.set_result(task.result())
+        self._dispatch()
+
+    def metrics(self) -> dict[str, Any]:
+        """Returns a snapshot of the queue and run counters."""
+        return {
+            'max_concurrency': self.max_concurrency,
+            'running': len(self._running),
+            'queued': {
+                priority.name.lower(): lane.size
+                for priority, lane in self._lanes.items()
+            },
+            'queued_sessions': {
+                priority.name.lower(): len(lane.sessions)
+                for priority, lane in self._lanes.items()
+            },
+            **self._counters,
+            'avg_queue_wait_seconds': (
+                self._total_wait / self._dispatched if self._dispatched else 0.0
+            ),
+            'max_queue_wait_seconds': self._max_wait,
+        }
+
+    def handle_metrics_endpoint(self, _request: Request):
+        """Expose the scheduler metrics over HTTP."""
+        return JSONResponse(self.metrics())
+
+    async def shutdown(self, drain: bool = True, timeout: float | None = None):
+        """Stop accepting runs and wait for or cancel the tracked ones.
+
+        Args:
+            drain: Let queued and running work finish first.
+            timeout: Seconds to wait for draining before cancelling whatever
+                is left. None waits indefinitely.
+        """
+        self._closed = True
+        if drain:
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning('Timed out draining agent runs, cancelling')
+
+        for lane in self._lanes.values():
+            for run in lane.drain():
+                run.coro.close()
+                run.future.cancel()
+                self._counters['cancelled'] += 1
+        running = list(self._running)
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        self._idle.set()
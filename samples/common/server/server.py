@@ -1,16 +1,24 @@
+import asyncio
+import hashlib
 import json
 import logging
+import os
+import shutil
+import socket
+import tempfile
 
 from collections.abc import AsyncIterable
+from contextlib import asynccontextmanager
 from typing import Any
 
 from pydantic import ValidationError
 from sse_starlette.sse import EventSourceResponse
 from starlette.applications import Starlette
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response, StreamingResponse
 
-from samples.common.server.task_manager import TaskManager
+from samples.common.server.shared_state import SharedStateBroker
+from samples.common.server.task_manager import InMemoryTaskManager, TaskManager
 from samples.common.types import (
     A2ARequest,
     AgentCard,
@@ -26,10 +34,26 @@ from samples.common.types import (
     SetTaskPushNotificationRequest,
     TaskResubscriptionRequest,
 )
+from samples.common.utils.blob_store import (
+    BLOB_PATH,
+    BlobNotFoundError,
+    BlobStore,
+    BlobTooLargeError,
+)
+from samples.common.utils.in_memory_cache import InMemoryCache
 
 
 logger = logging.getLogger(__name__)
 
+# Clients may reuse the agent card this long before revalidating it.
+AGENT_CARD_MAX_AGE = 300
+# After that, they may keep using it this long while they refresh it in the
+# background.
+AGENT_CARD_STALE_WHILE_REVALIDATE = 3600
+
+# Blobs never change under their digest.
+BLOB_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
 
 class A2AServer:
     def __init__(
@@ -39,21 +63,54 @@ class A2AServer:
         endpoint='/',
         agent_card: AgentCard = None,
         task_manager: TaskManager = None,
+        blob_store: BlobStore | None = None,
     ):
+        """Initialize the server.
+
+        Args:
+            host: Interface to listen on.
+            port: Port to listen on.
+            endpoint: Path of the JSON-RPC endpoint.
+            agent_card: Card served at /.well-known/agent.json.
+            task_manager: Handles the JSON-RPC requests.
+            blob_store: If given, clients can upload file content once with
+                POST <endpoint>/blobs and refer to it in file parts by the
+                returned URI. GET and HEAD on that URI serve the content,
+                with support for Range requests.
+        """
         self.host = host
         self.port = port
         self.endpoint = endpoint
         self.task_manager = task_manager
         self.agent_card = agent_card
-        self.app = Starlette()
+        self.blob_store = blob_store
+        self.shared_state_path: str | None = None
+        self.app = Starlette(lifespan=self._lifespan)
         self.app.add_route(
             self.endpoint, self._process_request, methods=['POST']
         )
         self.app.add_route(
             '/.well-known/agent.json', self._get_agent_card, methods=['GET']
         )
+        if self.blob_store is not None:
+            self.blob_path = self.endpoint.rstrip('/') + BLOB_PATH
+            self.app.add_route(
+                self.blob_path, self._upload_blob, methods=['POST']
+            )
+            self.app.add_route(
+                self.blob_path + '/{digest}',
+                self._get_blob,
+                methods=['GET', 'HEAD'],
+            )
 
-    def start(self):
+    def start(self, workers: int = 1):
+        """Serves the app until interrupted.
+
+        Args:
+            workers: Number of worker processes sharing the port. With more
+                than one, tasks and SSE events are shared between the workers
+                through a broker process over a Unix domain socket.
+        """
         if self.agent_card is None:
             raise ValueError('agent_card is not defined')
 
@@ -62,10 +119,163 @@ class A2AServer:
 
         import uvicorn
 
-        uvicorn.run(self.app, host=self.host, port=self.port)
+        if workers <= 1:
+            uvicorn.run(self.app, host=self.host, port=self.port)
+            return
+
+        self._start_workers(workers)
+
+    def _start_workers(self, workers: int):
+        if not isinstance(self.task_manager, InMemoryTaskManager):
+            raise ValueError('Multiple workers require an InMemoryTaskManager')
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError('Multiple workers require Unix domain sockets')
+
+        import multiprocessing
+
+        # Workers are forked so they inherit the app, the task manager and the
+        # listening socket; the kernel spreads connections between them.
+        context = multiprocessing.get_context('fork')
+        # A fork while the snapshot thread holds a cache lock would leave
+        # that lock held forever in the child. Each worker snapshots its
+        # own cache instead.
+        InMemoryCache().stop_snapshots()
+        run_dir = tempfile.mkdtemp(prefix='a2a-server-')
+        self.shared_state_path = os.path.join(run_dir, 'shared_state.sock')
+        broker = context.Process(
+            target=SharedStateBroker(self.shared_state_path).serve_forever,
+            daemon=True,
+        )
+        broker.start()
+
+        sock = socket.create_server((self.host, self.port), backlog=2048)
+        sock.set_inheritable(True)
+        processes = [
+            context.Process(target=self._run_worker, args=(sock,))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        logger.info(
+            f'Started {workers} workers on {self.host}:{self.port}'
+        )
+
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            # The workers got the same SIGINT and shut down gracefully.
+            for process in processes:
+                process.join(timeout=30)
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+            broker.terminate()
+            broker.join()
+            sock.close()
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+    def _run_worker(self, sock: socket.socket):
+        import uvicorn
+
+        InMemoryCache().start_snapshots()
+        config = uvicorn.Config(self.app, host=self.host, port=self.port)
+        uvicorn.Server(config).run(sockets=[sock])
+
+    @asynccontextmanager
+    async def _lifespan(self, app: Starlette):
+        if self.shared_state_path is not None:
+            await self.task_manager.attach_shared_state(self.shared_state_path)
+        yield
+        if self.task_manager is not None:
+            await self.task_manager.shutdown()
+
+    def _get_agent_card(self, request: Request) -> Response:
+        card = self.agent_card.model_dump(exclude_none=True)
+        etag = '"' + hashlib.sha256(
+            json.dumps(card, sort_keys=True).encode()
+        ).hexdigest()[:32] + '"'
+        headers = {
+            'ETag': etag,
+            'Cache-Control': (
+                f'public, max-age={AGENT_CARD_MAX_AGE}, '
+                f'stale-while-revalidate={AGENT_CARD_STALE_WHILE_REVALIDATE}'
+            ),
+        }
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status_code=304, headers=headers)
+        return JSONResponse(card, headers=headers)
+
+    async def _upload_blob(self, request: Request) -> Response:
+        length = request.headers.get('Content-Length')
+        if length:
+            try:
+                length = int(length)
+            except ValueError:
+                return Response(status_code=400)
+            if length > self.blob_store.max_bytes:
+                return Response(status_code=413)
+        try:
+            # Hashing and disk writes run off the event loop.
+            with await asyncio.to_thread(self.blob_store.writer) as writer:
+                async for chunk in request.stream():
+                    await asyncio.to_thread(writer.write, chunk)
+                digest = await asyncio.to_thread(writer.commit)
+        except BlobTooLargeError:
+            return Response(status_code=413)
+        uri = f'{str(request.base_url).rstrip("/")}{self.blob_path}/{digest}'
+        return JSONResponse(
+            {'digest': digest, 'size': writer.size, 'uri': uri},
+            status_code=201,
+            headers={'Location': uri},
+        )
+
+    def _get_blob(self, request: Request) -> Response:
+        digest = request.path_params['digest']
+        try:
+            size = self.blob_store.size(digest)
+        except BlobNotFoundError:
+            return Response(status_code=404)
+        headers = {
+            'ETag': f'"{digest}"',
+            'Cache-Control': BLOB_CACHE_CONTROL,
+            'Accept-Ranges': 'bytes',
+        }
+        if f'"{digest}"' in request.headers.get('If-None-Match', ''):
+            return Response(status_code=304, headers=headers)
+
+        start, end, status_code = 0, size, 200
+        if 'Range' in request.headers and (
+            request.headers.get('If-Range', f'"{digest}"') == f'"{digest}"'
+        ):
+            byte_range = parse_byte_range(request.headers['Range'], size)
+            if byte_range is None:
+                headers['Content-Range'] = f'bytes */{size}'
+                return Response(status_code=416, headers=headers)
+            start, end = byte_range
+            status_code = 206
+            headers['Content-Range'] = f'bytes {start}-{end - 1}/{size}'
+        headers['Content-Length'] = str(end - start)
 
-    def _get_agent_card(self, request: Request) -> JSONResponse:
-        return JSONResponse(self.agent_card.model_dump(exclude_none=True))
+        if request.method == 'HEAD':
+            return Response(
+                status_code=status_code,
+                headers=headers,
+                media_type='application/octet-stream',
+            )
+        try:
+            chunks = self.blob_store.read_range(digest, start, end)
+        except BlobNotFoundError:
+            # Evicted since the size lookup.
+            return Response(status_code=404)
+        return StreamingResponse(
+            chunks,
+            status_code=status_code,
+            headers=headers,
+            media_type='application/octet-stream',
+        )
 
     async def _process_request(self, request: Request):
         try:
@@ -135,3 +345,27 @@ class A2AServer:
             return JSONResponse(result.model_dump(exclude_none=True))
         logger.error(f'Unexpected result type: {type(result)}')
         raise ValueError(f'Unexpected result type: {type(result)}')
+
+
+def parse_byte_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parses a single-range Range header into [start, end).
+
+    Returns None if the range cannot be satisfied. Multiple ranges are not
+    supported and are answered like an unsatisfiable one.
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, _, last = spec.strip().partition('-')
+    try:
+        if not first:
+            # Suffix range: the last n bytes.
+            start, end = max(0, size - int(last)), size
+        else:
+            start = int(first)
+            end = min(size, int(last) + 1) if last else size
+    except ValueError:
+        return None
+    if start < 0 or start >= end:
+        return None
+    return start, end
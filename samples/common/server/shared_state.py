@@ -0,0 +1,299 @@
+"""Shared task state and event fan-out for multi-process servers.
+
+A single broker process owns a key/value store and a publish/subscribe bus.
+Workers talk to it over a Unix domain socket using newline-delimited JSON
+frames, so a task stored or an event published by one worker is visible to
+every other worker.
+"""
+
+import asyncio
+import contextlib
+import itertools
+import json
+import logging
+import os
+import signal
+
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+EventCallback = Callable[[str, Any], Awaitable[None]]
+
+# Large task payloads (artifacts, history) must fit in one frame.
+FRAME_LIMIT = 64 * 1024 * 1024
+
+
+def _encode(message: dict[str, Any]) -> bytes:
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+
+class SharedStateBroker:
+    """Serves the shared store and event bus on a Unix domain socket."""
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.store: dict[str, dict[str, Any]] = {}
+        self.subscriptions: dict[str, set[asyncio.StreamWriter]] = {}
+
+    def serve_forever(self):
+        """Runs the broker until the process is terminated."""
+        # Ctrl+C reaches the whole process group. The broker has to outlive
+        # the workers while they shut down, so it leaves termination to the
+        # supervising process.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        asyncio.run(self._serve())
+
+    async def _serve(self):
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(
+            self._handle_connection, path=self.socket_path, limit=FRAME_LIMIT
+        )
+        logger.info(f'Shared state broker listening on {self.socket_path}')
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        topics: set[str] = set()
+        try:
+            while line := await reader.readline():
+                message = json.loads(line)
+                reply = self._handle_message(message, writer, topics)
+                if reply is not None:
+                    writer.write(_encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for topic in topics:
+                subscribers = self.subscriptions.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(writer)
+                    if not subscribers:
+                        del self.subscriptions[topic]
+            writer.close()
+
+    def _handle_message(
+        self,
+        message: dict[str, Any],
+        writer: asyncio.StreamWriter,
+        topics: set[str],
+    ) -> dict[str, Any] | None:
+        op = message['op']
+        if op == 'get':
+            value = self.store.get(message['ns'], {}).get(message['key'])
+            return {'id': message['id'], 'value': value}
+        if op == 'set':
+            self.store.setdefault(message['ns'], {})[message['key']] = message[
+                'value'
+            ]
+            return {'id': message['id']}
+        if op == 'update':
+            return {'id': message['id'], 'value': self._update(message)}
+        if op == 'delete':
+            self.store.get(message['ns'], {}).pop(message['key'], None)
+            return {'id': message['id']}
+        if op == 'subscribe':
+            self.subscriptions.setdefault(message['topic'], set()).add(writer)
+            topics.add(message['topic'])
+            return {'id': message['id']}
+        if op == 'unsubscribe':
+            subscribers = self.subscriptions.get(message['topic'])
+            if subscribers is not None:
+                subscribers.discard(writer)
+                if not subscribers:
+                    del self.subscriptions[message['topic']]
+            topics.discard(message['topic'])
+            return {'id': message['id']}
+        if op == 'publish':
+            frame = _encode(
+                {
+                    'op': 'event',
+                    'topic': message['topic'],
+                    'data': message['data'],
+                }
+            )
+            for subscriber in self.subscriptions.get(message['topic'], ()):
+                subscriber.write(frame)
+            return {'id': message['id']}
+        logger.warning(f'Unknown shared state operation: {op}')
+        return {'id': message.get('id'), 'error': f'Unknown operation {op}'}
+
+    def _update(self, message: dict[str, Any]) -> Any:
+        # Runs without awaiting, so concurrent updates from different
+        # workers cannot interleave and lose each other's changes.
+        values = self.store.setdefault(message['ns'], {})
+        value = values.get(message['key'])
+        if value is None:
+            if message.get('insert') is not None:
+                values[message['key']] = message['insert']
+            return message.get('insert')
+        value.update(message.get('fields') or {})
+        for field, items in (message.get('append') or {}).items():
+            value[field] = (value.get(field) or []) + items
+        return value
+
+
+class SharedStateClient:
+    """A worker's connection to the SharedStateBroker."""
+
+    def __init__(self, socket_path: str, on_event: EventCallback):
+        """Initialize the client.
+
+        Args:
+            socket_path: Path of the broker's Unix domain socket.
+            on_event: Called with (topic, data) for every event published on
+                a subscribed topic, including events this worker published.
+        """
+        self.socket_path = socket_path
+        self.on_event = on_event
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._pending: dict[int, asyncio.Future] = {}
+        self._ids = itertools.count()
+        self._read_task: asyncio.Task | None = None
+        self._events: asyncio.Queue = asyncio.Queue()
+        self._dispatch_task: asyncio.Task | None = None
+        self._connected = False
+
+    async def connect(self, retries: int = 50, delay: float = 0.1):
+        for attempt in range(retries):
+            try:
+                self._reader, self._writer = await asyncio.open_unix_connection(
+                    self.socket_path, limit=FRAME_LIMIT
+                )
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if attempt == retries - 1:
+                    raise
+                await asyncio.sleep(delay)
+        self._connected = True
+        self._read_task = asyncio.create_task(self._read_loop())
+        self._dispatch_task = asyncio.create_task(self._dispatch_loop())
+
+    async def close(self):
+        self._connected = False
+        for task in (self._read_task, self._dispatch_task):
+            if task is not None:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        if self._writer is not None:
+            self._writer.close()
+
+    async def get(self, ns: str, key: str) -> Any:
+        reply = await self._request({'op': 'get', 'ns': ns, 'key': key})
+        return reply['value']
+
+    async def set(self, ns: str, key: str, value: Any):
+        await self._request({'op': 'set', 'ns': ns, 'key': key, 'value': value})
+
+    async def update(
+        self,
+        ns: str,
+        key: str,
+        fields: dict[str, Any] | None = None,
+        append: dict[str, list] | None = None,
+        insert: Any = None,
+    ) -> Any:
+        """Atomically changes a stored dict on the broker.
+
+        Args:
+            ns: Namespace of the value.
+            key: Key of the value.
+            fields: Fields to overwrite.
+            append: Items to append to list fields.
+            insert: Stored as is if there is no value yet, instead of
+                applying fields and append.
+
+        Returns:
+            The value after the update, or None if there was no value and
+            nothing to insert.
+        """
+        reply = await self._request(
+            {
+                'op': 'update',
+                'ns': ns,
+                'key': key,
+                'fields': fields,
+                'append': append,
+                'insert': insert,
+            }
+        )
+        return reply['value']
+
+    async def delete(self, ns: str, key: str):
+        await self._request({'op': 'delete', 'ns': ns, 'key': key})
+
+    def subscribe(self, topic: str) -> Awaitable[dict[str, Any]]:
+        """Sends a subscribe request; await the result for the reply.
+
+        The request is written before this returns, so subscribe and
+        unsubscribe requests reach the broker in the order they were made.
+        """
+        return self._reply(self._send({'op': 'subscribe', 'topic': topic}))
+
+    def unsubscribe(self, topic: str) -> Awaitable[dict[str, Any]]:
+        """Sends an unsubscribe request; await the result for the reply."""
+        return self._reply(self._send({'op': 'unsubscribe', 'topic': topic}))
+
+    async def publish(self, topic: str, data: Any):
+        await self._request({'op': 'publish', 'topic': topic, 'data': data})
+
+    async def _request(self, message: dict[str, Any]) -> dict[str, Any]:
+        return await self._reply(self._send(message))
+
+    def _send(self, message: dict[str, Any]) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        if not self._connected:
+            # No reply would ever arrive.
+            future.set_exception(
+                ConnectionError('Not connected to the shared state broker')
+            )
+            return future
+        request_id = next(self._ids)
+        self._pending[request_id] = future
+        self._writer.write(_encode({**message, 'id': request_id}))
+        return future
+
+    async def _reply(self, future: asyncio.Future) -> dict[str, Any]:
+        if not future.done():
+            await self._writer.drain()
+        reply = await future
+        if 'error' in reply:
+            raise ValueError(reply['error'])
+        return reply
+
+    async def _read_loop(self):
+        try:
+            while line := await self._reader.readline():
+                message = json.loads(line)
+                if message.get('op') == 'event':
+                    # Handled by _dispatch_loop, so a slow or blocked
+                    # handler cannot hold up the replies behind the event.
+                    self._events.put_nowait(message)
+                    continue
+                future = self._pending.pop(message['id'], None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        finally:
+            self._connected = False
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(
+                        ConnectionError('Shared state broker disconnected')
+                    )
+            self._pending.clear()
+
+    async def _dispatch_loop(self):
+        while True:
+            message = await self._events.get()
+            try:
+                await self.on_event(message['topic'], message['data'])
+            except Exception as e:
+                logger.error(f'Error handling shared event: {e}')
@@ -4,6 +4,7 @@ import logging
 from abc import ABC, abstractmethod
 from collections.abc import AsyncIterable
 
+from samples.common.server.shared_state import SharedStateClient
 from samples.common.server.utils import new_not_implemented_error
 from samples.common.types import (
     Artifact,
@@ -24,6 +25,7 @@ from samples.common.types import (
     SetTaskPushNotificationRequest,
     SetTaskPushNotificationResponse,
     Task,
+    TaskArtifactUpdateEvent,
     TaskIdParams,
     TaskNotCancelableError,
     TaskNotFoundError,
@@ -39,6 +41,15 @@ from samples.common.types import (
 
 logger = logging.getLogger(__name__)
 
+TASKS_NAMESPACE = 'tasks'
+PUSH_NOTIFICATIONS_NAMESPACE = 'push_notifications'
+SSE_TOPIC_PREFIX = 'sse:'
+# Event types that can cross process boundaries. Anything else is an error
+# event and decoded as JSONRPCError.
+SSE_EVENT_TYPES = {
+    cls.__name__: cls for cls in (TaskStatusUpdateEvent, TaskArtifactUpdateEvent)
+}
+
 
 class TaskManager(ABC):
     @abstractmethod
@@ -79,6 +90,10 @@ class TaskManager(ABC):
     ) -> AsyncIterable[SendTaskResponse] | JSONRPCResponse:
         pass
 
+    async def shutdown(self) -> None:
+        """Release background resources when the server stops."""
+        return None
+
 
 class InMemoryTaskManager(TaskManager):
     def __init__(self):
@@ -87,13 +102,56 @@ class InMemoryTaskManager(TaskManager):
         self.lock = asyncio.Lock()
         self.task_sse_subscribers: dict[str, list[asyncio.Queue]] = {}
         self.subscriber_lock = asyncio.Lock()
+        self.shared_state: SharedStateClient | None = None
+
+    async def attach_shared_state(self, socket_path: str):
+        """Keep tasks and SSE events in a SharedStateBroker.
+
+        Used when the server runs several worker processes: tasks written by
+        one worker can be read by the others, and SSE events produced on one
+        worker reach subscribers connected to any worker.
+        """
+        self.shared_state = SharedStateClient(
+            socket_path, on_event=self._on_shared_event
+        )
+        await self.shared_state.connect()
+
+    async def shutdown(self) -> None:
+        if self.shared_state is not None:
+            await self.shared_state.close()
+
+    async def _get_task(self, task_id: str) -> Task | None:
+        if self.shared_state is None:
+            return self.tasks.get(task_id)
+        data = await self.shared_state.get(TASKS_NAMESPACE, task_id)
+        return Task.model_validate(data) if data is not None else None
+
+    async def _save_task(self, task: Task):
+        if self.shared_state is None:
+            self.tasks[task.id] = task
+            return
+        await self.shared_state.set(
+            TASKS_NAMESPACE, task.id, task.model_dump(mode='json')
+        )
+
+    async def _get_push_notification_config(
+        self, task_id: str
+    ) -> PushNotificationConfig | None:
+        if self.shared_state is None:
+            return self.push_notification_infos.get(task_id)
+        data = await self.shared_state.get(PUSH_NOTIFICATIONS_NAMESPACE, task_id)
+        return (
+            PushNotificationConfig.model_validate(data)
+            if data is not None
+            else None
+        )
 
     async def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
         logger.info(f'Getting task {request.params.id}')
         task_query_params: TaskQueryParams = request.params
 
         async with self.lock:
-            task = self.tasks.get(task_query_params.id)
+            task = await self._get_task(task_query_params.id)
             if task is None:
                 return GetTaskResponse(id=request.id, error=TaskNotFoundError())
 
@@ -110,7 +168,7 @@ class InMemoryTaskManager(TaskManager):
         task_id_params: TaskIdParams = request.params
 
         async with self.lock:
-            task = self.tasks.get(task_id_params.id)
+            task = await self._get_task(task_id_params.id)
             if task is None:
                 return CancelTaskResponse(
                     id=request.id, error=TaskNotFoundError()
@@ -132,27 +190,39 @@ class InMemoryTaskManager(TaskManager):
         self, task_id: str, notification_config: PushNotificationConfig
     ):
         async with self.lock:
-            task = self.tasks.get(task_id)
+            task = await self._get_task(task_id)
             if task is None:
                 raise ValueError(f'Task not found for {task_id}')
 
-            self.push_notification_infos[task_id] = notification_config
+            if self.shared_state is None:
+                self.push_notification_infos[task_id] = notification_config
+            else:
+                await self.shared_state.set(
+                    PUSH_NOTIFICATIONS_NAMESPACE,
+                    task_id,
+                    notification_config.model_dump(mode='json'),
+                )
 
     async def get_push_notification_info(
         self, task_id: str
     ) -> PushNotificationConfig:
         async with self.lock:
-            task = self.tasks.get(task_id)
+            task = await self._get_task(task_id)
             if task is None:
                 raise ValueError(f'Task not found for {task_id}')
 
-            return self.push_notification_infos[task_id]
-
-    
+            notification_config = await self._get_push_notification_config(
+                task_id
+            )
+            if notification_config is None:
+                raise KeyError(task_id)
+            return notification_config
 
     async def has_push_notification_info(self, task_id: str) -> bool:
         async with self.lock:
-            return task_id in self.push_notification_infos
+            return (
+                await self._get_push_notification_config(task_id) is not None
+            )
 
     async def on_set_task_push_notification(
         self, request: SetTaskPushNotificationRequest
@@ -206,19 +276,32 @@ class InMemoryTaskManager(TaskManager):
 
     async def upsert_task(self, task_send_params: TaskSendParams) -> Task:
         logger.info(f'Upserting task {task_send_params.id}')
+        new_task = Task(
+            id=task_send_params.id,
+            sessionId=task_send_params.sessionId,
+            messages=[task_send_params.message],
+            status=TaskStatus(state=TaskState.SUBMITTED),
+            history=[task_send_params.message],
+        )
+        if self.shared_state is not None:
+            # The lock only covers this worker, so the read-modify-write has
+            # to happen on the broker.
+            message = task_send_params.message.model_dump(mode='json')
+            data = await self.shared_state.update(
+                TASKS_NAMESPACE,
+                task_send_params.id,
+                append={'history': [message]},
+                insert=new_task.model_dump(mode='json'),
+            )
+            return Task.model_validate(data)
+
         async with self.lock:
-            task = self.tasks.get(task_send_params.id)
+            task = await self._get_task(task_send_params.id)
             if task is None:
-                task = Task(
-                    id=task_send_params.id,
-                    sessionId=task_send_params.sessionId,
-                    messages=[task_send_params.message],
-                    status=TaskStatus(state=TaskState.SUBMITTED),
-                    history=[task_send_params.message],
-                )
-                self.tasks[task_send_params.id] = task
+                task = new_task
             else:
                 task.history.append(task_send_params.message)
+            await self._save_task(task)
 
             return task
 
@@ -230,10 +313,28 @@ class InMemoryTaskManager(TaskManager):
     async def update_store(
         self, task_id: str, status: TaskStatus, artifacts: list[Artifact]
     ) -> Task:
+        if self.shared_state is not None:
+            append = {}
+            if status.message is not None:
+                append['history'] = [status.message.model_dump(mode='json')]
+            if artifacts is not None:
+                append['artifacts'] = [
+                    artifact.model_dump(mode='json') for artifact in artifacts
+                ]
+            data = await self.shared_state.update(
+                TASKS_NAMESPACE,
+                task_id,
+                fields={'status': status.model_dump(mode='json')},
+                append=append,
+            )
+            if data is None:
+                logger.error(f'Task {task_id} not found for updating the task')
+                raise ValueError(f'Task {task_id} not found')
+            return Task.model_validate(data)
+
         async with self.lock:
-            try:
-                task = self.tasks[task_id]
-            except KeyError:
+            task = await self._get_task(task_id)
+            if task is None:
                 logger.error(f'Task {task_id} not found for updating the task')
                 raise ValueError(f'Task {task_id} not found')
 
@@ -247,6 +348,7 @@ class InMemoryTaskManager(TaskManager):
                     task.artifacts = []
                 task.artifacts.extend(artifacts)
 
+            await self._save_task(task)
             return task
 
     def append_task_history(self, task: Task, historyLength: int | None):
@@ -261,24 +363,64 @@ class InMemoryTaskManager(TaskManager):
     async def setup_sse_consumer(
         self, task_id: str, is_resubscribe: bool = False
     ):
+        # Broker requests are never awaited while holding subscriber_lock:
+        # the events they wait behind are delivered under that lock.
+        if (
+            is_resubscribe
+            and self.shared_state is not None
+            and task_id not in self.task_sse_subscribers
+            # With shared state the task may be streaming on another
+            # worker, so only the shared task store can tell.
+            and await self._get_task(task_id) is None
+        ):
+            raise ValueError('Task not found for resubscription')
+
+        subscribed = None
+        sse_event_queue = asyncio.Queue(maxsize=0)  # <=0 is unlimited
         async with self.subscriber_lock:
             if task_id not in self.task_sse_subscribers:
-                if is_resubscribe:
+                if is_resubscribe and self.shared_state is None:
                     raise ValueError('Task not found for resubscription')
                 self.task_sse_subscribers[task_id] = []
-
-            sse_event_queue = asyncio.Queue(maxsize=0)  # <=0 is unlimited
+                if self.shared_state is not None:
+                    # Sent under the lock so it cannot overtake the
+                    # unsubscribe of a consumer that just finished.
+                    subscribed = self.shared_state.subscribe(
+                        SSE_TOPIC_PREFIX + task_id
+                    )
             self.task_sse_subscribers[task_id].append(sse_event_queue)
-            return sse_event_queue
+
+        if subscribed is not None:
+            try:
+                await subscribed
+            except Exception:
+                await self._remove_sse_consumer(task_id, sse_event_queue)
+                raise
+        return sse_event_queue
 
     async def enqueue_events_for_sse(self, task_id, task_update_event):
+        if self.shared_state is not None:
+            # Delivered to local queues by _on_shared_event, on this worker
+            # and on every other worker with subscribers for the task.
+            await self.shared_state.publish(
+                SSE_TOPIC_PREFIX + task_id, _encode_sse_event(task_update_event)
+            )
+            return
+        await self._enqueue_local_events_for_sse(task_id, task_update_event)
+
+    async def _on_shared_event(self, topic: str, data: dict):
+        await self._enqueue_local_events_for_sse(
+            topic[len(SSE_TOPIC_PREFIX) :], _decode_sse_event(data)
+        )
+
+    async def _enqueue_local_events_for_sse(self, task_id, task_update_event):
         async with self.subscriber_lock:
             if task_id not in self.task_sse_subscribers:
                 return
 
             current_subscribers = self.task_sse_subscribers[task_id]
             for subscriber in current_subscribers:
-                await subscriber.put(task_update_event)
+                subscriber.put_nowait(task_update_event)
 
     async def dequeue_events_for_sse(
         self, request_id, task_id, sse_event_queue: asyncio.Queue
@@ -294,6 +436,34 @@ class InMemoryTaskManager(TaskManager):
                 if isinstance(event, TaskStatusUpdateEvent) and event.final:
                     break
         finally:
-            async with self.subscriber_lock:
-                if task_id in self.task_sse_subscribers:
-                    self.task_sse_subscribers[task_id].remove(sse_event_queue)
+            await self._remove_sse_consumer(task_id, sse_event_queue)
+
+    async def _remove_sse_consumer(self, task_id, sse_event_queue):
+        unsubscribed = None
+        async with self.subscriber_lock:
+            if task_id in self.task_sse_subscribers:
+                self.task_sse_subscribers[task_id].remove(sse_event_queue)
+                if (
+                    self.shared_state is not None
+                    and not self.task_sse_subscribers[task_id]
+                ):
+                    del self.task_sse_subscribers[task_id]
+                    unsubscribed = self.shared_state.unsubscribe(
+                        SSE_TOPIC_PREFIX + task_id
+                    )
+        if unsubscribed is not None:
+            try:
+                await unsubscribed
+            except ConnectionError as e:
+                logger.warning(
+                    f'Could not unsubscribe from task {task_id}: {e}'
+                )
+
+
+def _encode_sse_event(event) -> dict:
+    return {'type': type(event).__name__, 'data': event.model_dump(mode='json')}
+
+
+def _decode_sse_event(data: dict):
+    event_type = SSE_EVENT_TYPES.get(data['type'], JSONRPCError)
+    return event_type.model_validate(data['data'])
@@ -0,0 +1,201 @@
+"""Runs agent turns in the background for non-blocking SendMessage.
+
+The request that starts a turn only waits for the task to be stored in the
+submitted state. The agent then runs on the event loop, and its progress can
+be followed with GetTask, by resubscribing to the task's events, or through
+a push notification to the URL given in the request.
+
+Tasks and the turns producing them live in the process that accepted the
+request. This only works where every request reaches that process, e.g. a
+single instance, and where the process keeps running after the response has
+been sent.
+"""
+
+import asyncio
+import logging
+import uuid
+
+from collections.abc import AsyncIterator
+from typing import Any
+
+from samples.common.types import Message, Part, Task, TaskStatus
+from samples.common.utils.deadline import DeadlineExceededError, deadline_scope
+from samples.common.utils.in_memory_cache import InMemoryCache
+from samples.common.utils.push_notification_dispatcher import (
+    PushNotificationDispatcher,
+)
+
+
+logger = logging.getLogger(__name__)
+
+FINAL_TASK_STATES = {'completed', 'failed', 'cancelled', 'rejected'}
+
+
+class TaskStore:
+    """Latest state of each task, and live event feeds for subscribers.
+
+    Tasks are kept in the InMemoryCache singleton for ttl seconds, so they
+    are persisted with its snapshots when those are enabled. Like the cache,
+    the store is local to the process: GetTask has to reach the instance
+    that ran the task.
+    """
+
+    KEY_PREFIX = 'a2a-task:'
+
+    def __init__(self, ttl: int = 3600):
+        self.ttl = ttl
+        self.cache = InMemoryCache()
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+
+    def get(self, task_id: str) -> Task | None:
+        return self.cache.get(self.KEY_PREFIX + task_id)
+
+    def save(self, task: Task):
+        self.cache.set(self.KEY_PREFIX + task.id, task, self.ttl)
+
+    def publish(self, task_id: str, event: dict[str, Any]):
+        for queue in self._subscribers.get(task_id, ()):
+            queue.put_nowait(event)
+
+    async def subscribe(self, task_id: str) -> AsyncIterator[dict[str, Any]]:
+        """Yields the current task, then its events until it is final.
+
+        Raises:
+            KeyError: No such task.
+        """
+        task = self.get(task_id)
+        if task is None:
+            raise KeyError(task_id)
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(task_id, set()).add(queue)
+        try:
+            yield {'task': task.model_dump(by_alias=True)}
+            if task.status.state in FINAL_TASK_STATES:
+                return
+            while True:
+                event = await queue.get()
+                yield event
+                if 'task' in event:
+                    return
+        finally:
+            subscribers = self._subscribers[task_id]
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[task_id]
+
+
+class BackgroundTaskRunner:
+    """Starts agent turns that outlive the request submitting them."""
+
+    def __init__(
+        self,
+        agent,
+        store: TaskStore | None = None,
+        notification_dispatcher: PushNotificationDispatcher | None = None,
+    ):
+        """Initialize the runner.
+
+        Args:
+            agent: Has stream(message, session_id), yielding statusUpdate
+                events and finally the task, e.g. a SemanticKernelTravelAgent.
+            store: Where the tasks are kept.
+            notification_dispatcher: Signs and delivers push notifications.
+                Without one, requests for push notifications are rejected.
+        """
+        self.agent = agent
+        self.store = store or TaskStore()
+        self.notification_dispatcher = notification_dispatcher
+        self._running: set[asyncio.Task] = set()
+
+    async def submit(
+        self,
+        message: Message,
+        session_id: str,
+        deadline: float | None = None,
+        push_notification_config: dict[str, Any] | None = None,
+    ) -> Task:
+        """Stores a submitted task for message and starts the turn.
+
+        Args:
+            message: The user message; its id becomes the task id.
+            session_id: Context the turn belongs to.
+            deadline: Stops the turn once it has passed.
+            push_notification_config: A2A PushNotificationConfig with the
+                url to post task updates to.
+
+        Raises:
+            ValueError: Push notifications were requested but cannot be sent,
+                or the URL failed verification.
+        """
+        push_url = (push_notification_config or {}).get('url')
+        if push_url:
+            if self.notification_dispatcher is None:
+                raise ValueError('Push notifications are not supported')
+            sender_auth = self.notification_dispatcher.sender_auth
+            if not await sender_auth.verify_push_notification_url(push_url):
+                raise ValueError('Push notification URL is invalid')
+
+        task = Task(
+            id=message.message_id,
+            context_id=session_id,
+            status=TaskStatus(state='submitted'),
+            history=[message],
+        )
+        self.store.save(task)
+        with deadline_scope(deadline):
+            # The task copies the context, and with it the deadline.
+            run = asyncio.create_task(self._run(task, message, push_url))
+        # Keep a reference so the turn is not garbage collected.
+        self._running.add(run)
+        run.add_done_callback(self._running.discard)
+        return task
+
+    async def _run(self, task: Task, message: Message, push_url: str | None):
+        try:
+            async for event in self.agent.stream(message, task.context_id):
+                if 'statusUpdate' in event:
+                    task = task.model_copy(
+                        update={
+                            'status': TaskStatus.model_validate(
+                                event['statusUpdate']['status']
+                            )
+                        }
+                    )
+                elif 'task' in event:
+                    task = Task.model_validate(event['task'])
+                    task.history = [message]
+                    break
+                self.store.save(task)
+                self.store.publish(task.id, event)
+                self._notify(task, push_url)
+        except DeadlineExceededError:
+            task = self._failed(task, 'Deadline exceeded')
+        except Exception as e:
+            logger.error(f'Background task {task.id} failed: {e}')
+            task = self._failed(task, str(e))
+        self.store.save(task)
+        self.store.publish(task.id, {'task': task.model_dump(by_alias=True)})
+        self._notify(task, push_url)
+
+    @staticmethod
+    def _failed(task: Task, reason: str) -> Task:
+        return task.model_copy(
+            update={
+                'status': TaskStatus(
+                    state='failed',
+                    message=Message(
+                        role='agent',
+                        parts=[Part(text=reason)],
+                        message_id=str(uuid.uuid4()),
+                    ),
+                )
+            }
+        )
+
+    def _notify(self, task: Task, push_url: str | None):
+        if push_url:
+            self.notification_dispatcher.enqueue(
+                task.id,
+                push_url,
+                task.model_dump(by_alias=True, exclude_none=True),
+            )
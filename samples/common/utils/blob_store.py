@@ -0,0 +1,318 @@
+"""Content-addressed store for file part content.
+
+Blobs are kept as files named by the SHA-256 digest of their content, so
+the same attachment is stored once no matter how often it is sent, and a
+file part can refer to it by URI instead of carrying it base64 encoded.
+A2AServer exposes a store over HTTP (see BLOB_PATH) and A2AClient.upload_blob
+puts files into it.
+"""
+
+import contextlib
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+
+from collections import OrderedDict
+from collections.abc import Iterator
+from urllib.parse import urlparse
+
+
+logger = logging.getLogger(__name__)
+
+# Blobs are served below the A2A endpoint, at <endpoint>/blobs/<digest>.
+BLOB_PATH = '/blobs'
+
+CHUNK_BYTES = 64 * 1024
+
+_DIGEST = re.compile(r'[0-9a-f]{64}')
+
+
+class BlobNotFoundError(LookupError):
+    """The store holds no blob with the requested digest."""
+
+
+class BlobTooLargeError(ValueError):
+    """The blob would not fit into the store at all."""
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 hex digest of a file, read in chunks."""
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+def blob_digest(uri: str) -> str | None:
+    """Digest a blob URI refers to, or None if uri is not a blob URI."""
+    head, _, digest = urlparse(uri).path.rpartition('/')
+    if head.endswith(BLOB_PATH) and _DIGEST.fullmatch(digest):
+        return digest
+    return None
+
+
+class BlobWriter:
+    """Streams content into the store, hashing it on the way.
+
+    Obtained from BlobStore.writer(). The blob becomes visible on commit();
+    leaving the with block without committing discards it.
+    """
+
+    def __init__(self, store: 'BlobStore'):
+        self._store = store
+        self._hash = hashlib.sha256()
+        self.size = 0
+        fd, self._path = tempfile.mkstemp(
+            prefix='.upload-', dir=store.directory
+        )
+        self._file = os.fdopen(fd, 'wb')
+
+    def __enter__(self) -> 'BlobWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.abort()
+
+    def write(self, data: bytes):
+        if self.size + len(data) > self._store.max_bytes:
+            raise BlobTooLargeError(
+                f'Blob exceeds the store size of {self._store.max_bytes} bytes'
+            )
+        self._hash.update(data)
+        self._file.write(data)
+        self.size += len(data)
+
+    def commit(self) -> str:
+        """Adds the content written so far to the store; returns its digest."""
+        self._file.close()
+        digest = self._hash.hexdigest()
+        self._store._add(self._path, digest, self.size)
+        self._path = None
+        return digest
+
+    def abort(self):
+        self._file.close()
+        if self._path is not None:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self._path)
+            self._path = None
+
+
+class BlobStore:
+    """SHA-256 keyed blobs on disk, bounded in size.
+
+    Adding content that is already stored only marks it as recently used.
+    Once the total size exceeds max_bytes, the least recently used blobs are
+    deleted. Recency survives restarts through the files' modification
+    times. The index is per process; processes sharing a directory only
+    ever see complete blobs, but each enforces the bound on its own view.
+    A blob another process added is picked up from disk when it is first
+    asked for, and one it deleted is dropped from the index once missed.
+    """
+
+    def __init__(
+        self, directory: str | None = None, max_bytes: int = 1024**3
+    ):
+        """Initialize the store.
+
+        Args:
+            directory: Where blobs are kept; a new temporary directory if
+                not given. Existing blobs in it are picked up.
+            max_bytes: Upper bound for the total size of all blobs.
+        """
+        self.directory = directory or tempfile.mkdtemp(prefix='a2a-blobs-')
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        blobs = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if _DIGEST.fullmatch(entry.name) and entry.is_file():
+                    stat = entry.stat()
+                    blobs.append((stat.st_mtime, entry.name, stat.st_size))
+                elif entry.name.startswith('.upload-'):
+                    # Left behind by an interrupted upload.
+                    with contextlib.suppress(FileNotFoundError):
+                        os.unlink(entry.path)
+        for _, digest, size in sorted(blobs):
+            self._index[digest] = size
+            self.total_bytes += size
+        with self._lock:
+            self._collect()
+
+    def __contains__(self, digest: str) -> bool:
+        return self._lookup(digest) is not None
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest)
+
+    def writer(self) -> BlobWriter:
+        return BlobWriter(self)
+
+    def put(self, data: bytes) -> str:
+        """Stores data; returns its digest."""
+        with self.writer() as writer:
+            writer.write(data)
+            return writer.commit()
+
+    def put_file(self, path: str, move: bool = False) -> str:
+        """Stores the content of a file; returns its digest.
+
+        Args:
+            path: The file to store.
+            move: Take over the file instead of copying it. It has to be on
+                the same file system as the store.
+        """
+        if not move:
+            with open(path, 'rb') as f, self.writer() as writer:
+                while chunk := f.read(CHUNK_BYTES):
+                    writer.write(chunk)
+                return writer.commit()
+        size = os.path.getsize(path)
+        if size > self.max_bytes:
+            raise BlobTooLargeError(
+                f'Blob exceeds the store size of {self.max_bytes} bytes'
+            )
+        try:
+            digest = file_digest(path)
+            self._add(path, digest, size)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+            raise
+        return digest
+
+    def _add(self, temp_path: str, digest: str, size: int):
+        with self._lock:
+            if digest in self._index:
+                # Deduplicated: keep the stored copy, refresh its recency.
+                os.unlink(temp_path)
+                self._touch(digest)
+                return
+            os.replace(temp_path, self._blob_path(digest))
+            self._index[digest] = size
+            self.total_bytes += size
+            self._collect(keep=digest)
+
+    def _lookup(self, digest: str) -> int | None:
+        """Size of a blob, adding it to the index if it is only on disk."""
+        with self._lock:
+            size = self._index.get(digest)
+            if size is not None:
+                return size
+            if not _DIGEST.fullmatch(digest):
+                return None
+            try:
+                size = os.stat(self._blob_path(digest)).st_size
+            except FileNotFoundError:
+                return None
+            self._index[digest] = size
+            self.total_bytes += size
+            self._collect(keep=digest)
+            return size
+
+    def _forget(self, digest: str):
+        """Drops a blob that was deleted by another process."""
+        with self._lock:
+            size = self._index.pop(digest, None)
+            if size is not None:
+                self.total_bytes -= size
+
+    def _touch(self, digest: str):
+        self._index.move_to_end(digest)
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(self._blob_path(digest))
+
+    def _collect(self, keep: str | None = None):
+        while self.total_bytes > self.max_bytes and self._index:
+            digest, size = next(iter(self._index.items()))
+            if digest == keep:
+                break
+            self._remove(digest)
+            logger.info(f'Evicted blob {digest} ({size} bytes)')
+
+    def _remove(self, digest: str):
+        self.total_bytes -= self._index.pop(digest)
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self._blob_path(digest))
+
+    def delete(self, digest: str):
+        with self._lock:
+            if digest in self._index:
+                self._remove(digest)
+
+    def size(self, digest: str) -> int:
+        """Size of a blob in bytes.
+
+        Raises:
+            BlobNotFoundError: No such blob.
+        """
+        size = self._lookup(digest)
+        if size is None:
+            raise BlobNotFoundError(digest)
+        return size
+
+    def path(self, digest: str) -> str:
+        """Local path of a blob, marking it as recently used.
+
+        Raises:
+            BlobNotFoundError: No such blob.
+        """
+        if self._lookup(digest) is None:
+            raise BlobNotFoundError(digest)
+        with self._lock:
+            if digest in self._index:
+                self._touch(digest)
+        return self._blob_path(digest)
+
+    def resolve(self, uri: str) -> str | None:
+        """Local path of the blob uri refers to, if this store holds it."""
+        digest = blob_digest(uri)
+        if digest is None:
+            return None
+        try:
+            return self.path(digest)
+        except BlobNotFoundError:
+            return None
+
+    def read_range(
+        self, digest: str, start: int = 0, end: int | None = None
+    ) -> Iterator[bytes]:
+        """Reads bytes start to end (exclusive) of a blob in chunks.
+
+        The blob is opened right away, so it stays readable even if it is
+        evicted while the chunks are consumed.
+
+        Raises:
+            BlobNotFoundError: No such blob.
+        """
+        path = self.path(digest)
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            self._forget(digest)
+            raise BlobNotFoundError(digest) from None
+        if end is None:
+            end = os.fstat(f.fileno()).st_size
+        return _read_chunks(f, start, end)
+
+
+def _read_chunks(f, start: int, end: int) -> Iterator[bytes]:
+    with f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
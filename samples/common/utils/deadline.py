@@ -0,0 +1,142 @@
+"""Request deadlines shared across hops.
+
+A deadline is an absolute point in time (seconds since the epoch) after
+which the caller no longer needs the result. It travels between agents in
+the X-A2A-Deadline header and in the JSON-RPC params metadata, and within a
+process in a context variable, so every hop can bound its own timeouts by
+the time that is left and stop working once it has run out.
+"""
+
+import contextlib
+import contextvars
+import time
+
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+import httpx
+
+
+DEADLINE_HEADER = 'X-A2A-Deadline'
+DEADLINE_METADATA_KEY = 'deadline'
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    'a2a_deadline', default=None
+)
+
+
+class DeadlineExceededError(TimeoutError):
+    """The deadline of the current request has passed."""
+
+
+def current_deadline() -> float | None:
+    return _deadline.get()
+
+
+@contextlib.contextmanager
+def deadline_scope(deadline: float | None) -> Iterator[float | None]:
+    """Applies deadline to the enclosed code.
+
+    A scope can only make the effective deadline earlier; None keeps the
+    enclosing one.
+    """
+    enclosing = _deadline.get()
+    if deadline is None or (enclosing is not None and enclosing < deadline):
+        deadline = enclosing
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_timeout(default: float | None) -> float | None:
+    """Returns default, shortened to the time left before the deadline.
+
+    Raises:
+        DeadlineExceededError: The deadline has already passed.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return default
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise DeadlineExceededError('Request deadline exceeded')
+    return remaining if default is None else min(default, remaining)
+
+
+def caused_by_deadline(error: BaseException) -> bool:
+    """Whether error is a DeadlineExceededError or was raised because of one.
+
+    SDKs wrap whatever their HTTP client raises, e.g. the OpenAI SDK turns
+    the error from shorten_request_timeout into an APIConnectionError, so
+    the whole chain of causes is searched.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, DeadlineExceededError):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+@contextlib.contextmanager
+def deadline_errors() -> Iterator[None]:
+    """Re-raises errors caused by a passed deadline as DeadlineExceededError.
+
+    Wrap calls into SDKs that use shorten_request_timeout with this, so
+    callers can map an exceeded deadline without knowing the SDK.
+    """
+    try:
+        yield
+    except DeadlineExceededError:
+        raise
+    except Exception as e:
+        if not caused_by_deadline(e):
+            raise
+        raise DeadlineExceededError('Request deadline exceeded') from e
+
+
+def parse_deadline(
+    headers: Mapping[str, str] | None = None,
+    metadata: Mapping[str, Any] | None = None,
+) -> float | None:
+    """Reads a deadline from request headers or JSON-RPC metadata.
+
+    If both carry one, the earlier wins. Malformed values are ignored.
+    """
+    values = []
+    if headers is not None:
+        values.append(headers.get(DEADLINE_HEADER))
+    if metadata:
+        values.append(metadata.get(DEADLINE_METADATA_KEY))
+    deadlines = []
+    for value in values:
+        try:
+            deadlines.append(float(value))
+        except (TypeError, ValueError):
+            continue
+    return min(deadlines, default=None)
+
+
+async def shorten_request_timeout(request: httpx.Request):
+    """httpx request event hook bounding every timeout by the deadline.
+
+    Install it on clients whose callers do not pass timeouts themselves,
+    e.g. the HTTP client of an SDK:
+    ``httpx.AsyncClient(event_hooks={'request': [shorten_request_timeout]})``.
+    """
+    if _deadline.get() is None:
+        return
+    timeouts = request.extensions.get('timeout', {})
+    request.extensions['timeout'] = {
+        name: remaining_timeout(value)
+        for name, value in {
+            'connect': None,
+            'read': None,
+            'write': None,
+            'pool': None,
+            **timeouts,
+        }.items()
+    }
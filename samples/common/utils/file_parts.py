@@ -0,0 +1,97 @@
+"""Memory-friendly handling of large file parts.
+
+File parts carry their content base64 encoded. Decoding a large part in one
+go keeps the encoded text, an ASCII copy of it and the decoded bytes in
+memory at the same time. The helpers here decode in bounded chunks straight
+into a temporary file instead, so the ASCII copy is never made.
+"""
+
+import base64
+import binascii
+import contextlib
+import os
+import tempfile
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+
+# Encoded parts at least this long are spilled to disk.
+SPILL_THRESHOLD = 1024 * 1024
+
+# A multiple of the base64 quantum (4 characters).
+DECODE_CHUNK_CHARS = 256 * 1024
+
+_WHITESPACE = str.maketrans('', '', ' \t\r\n')
+
+
+@dataclass
+class FileHandle:
+    """Decoded content of a file part, kept in a file on disk."""
+
+    path: str
+    size: int
+    mime_type: str | None = None
+    name: str | None = None
+
+    def open(self) -> BinaryIO:
+        return open(self.path, 'rb')
+
+    def delete(self):
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+
+
+def decode_base64_to_file(
+    data: str,
+    mime_type: str | None = None,
+    name: str | None = None,
+    directory: str | None = None,
+) -> FileHandle:
+    """Decodes base64 text into a new temporary file, chunk by chunk.
+
+    The caller owns the file and should delete() it once it is no longer
+    needed.
+
+    Raises:
+        binascii.Error: data is not valid base64.
+    """
+    suffix = Path(name).suffix if name else ''
+    fd, path = tempfile.mkstemp(prefix='a2a-file-', suffix=suffix, dir=directory)
+    size = 0
+    carry = ''
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for start in range(0, len(data), DECODE_CHUNK_CHARS):
+                chunk = carry + data[start : start + DECODE_CHUNK_CHARS]
+                # Line breaks would shift the 4-character quanta.
+                chunk = chunk.translate(_WHITESPACE)
+                usable = len(chunk) - len(chunk) % 4
+                carry = chunk[usable:]
+                if usable:
+                    size += f.write(binascii.a2b_base64(chunk[:usable]))
+            if carry:
+                raise binascii.Error('Incomplete base64 data')
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+        raise
+    return FileHandle(path=path, size=size, mime_type=mime_type, name=name)
+
+
+
+def decode_file_bytes(data: str) -> bytes:
+    """Decodes the base64 content of a file part into bytes.
+
+    Large parts are decoded chunk by chunk through a temporary file and read
+    back in one piece, which avoids the ASCII copy a one-shot decode makes.
+    """
+    if len(data) < SPILL_THRESHOLD:
+        return base64.b64decode(data)
+    handle = decode_base64_to_file(data)
+    try:
+        with handle.open() as f:
+            return f.read()
+    finally:
+        handle.delete()
@@ -1,17 +1,103 @@
 """In Memory Cache utility."""
 
+import asyncio
+import heapq
+import inspect
+import logging
+import math
+import mmap
+import os
+import pickle
+import struct
+import sys
 import threading
 import time
 
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
 from typing import Any, Optional
 
 
+logger = logging.getLogger(__name__)
+
+# Setting this environment variable makes the cache warm-start from, and
+# periodically snapshot to, the given file.
+SNAPSHOT_PATH_ENV = 'A2A_CACHE_SNAPSHOT_PATH'
+SNAPSHOT_INTERVAL_ENV = 'A2A_CACHE_SNAPSHOT_INTERVAL'
+
+# Snapshot file layout: a header, then per entry a fixed-size record (key
+# length, expiry, fresh-until, value length) followed by the UTF-8 key and
+# the pickled value. Times are epoch seconds, NO_EXPIRY when unset.
+_SNAPSHOT_MAGIC = b'A2ACACHE'
+_SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct('<8sHI')
+_SNAPSHOT_ENTRY = struct.Struct('<IddI')
+NO_EXPIRY = -1.0
+
+
+class _CacheShard:
+    """One lock-protected slice of the cache, kept in LRU order."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data: OrderedDict[str, Any] = OrderedDict()
+        self.ttl: dict[str, float] = {}
+        # Entries written by get_or_compute with a stale_ttl: the time until
+        # which they are fresh. After that they are served stale until ttl.
+        self.fresh_until: dict[str, float] = {}
+        self.sizes: dict[str, int] = {}
+        self.total_size = 0
+        # (expiry, key) pairs; entries whose expiry no longer matches ttl are
+        # stale and skipped when popped.
+        self.expiry_heap: list[tuple[float, str]] = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def remove(self, key: str) -> None:
+        del self.data[key]
+        self.ttl.pop(key, None)
+        self.fresh_until.pop(key, None)
+        self.total_size -= self.sizes.pop(key, 0)
+
+    def push_expiry(self, key: str, expiry: float) -> None:
+        heapq.heappush(self.expiry_heap, (expiry, key))
+        # Keys that are re-set before they expire leave stale heap entries
+        # behind; rebuild once they dominate the heap.
+        if len(self.expiry_heap) > 2 * len(self.ttl) + 64:
+            self.expiry_heap = [(t, k) for k, t in self.ttl.items()]
+            heapq.heapify(self.expiry_heap)
+
+    def purge_expired(self, now: float, limit: int | None = None) -> int:
+        purged = 0
+        heap = self.expiry_heap
+        while heap and heap[0][0] <= now and (limit is None or purged < limit):
+            expiry, key = heapq.heappop(heap)
+            if self.ttl.get(key) == expiry:
+                self.remove(key)
+                self.expirations += 1
+                purged += 1
+        return purged
+
+
 class InMemoryCache:
     """A thread-safe Singleton class to manage cache data.
 
     Ensures only one instance of the cache exists across the application.
+
+    Keys are spread over NUM_SHARDS shards, each with its own lock, so
+    concurrent callers rarely contend. Each shard keeps its entries in LRU
+    order; when max_entries or max_bytes is configured the least recently
+    used entries are evicted to stay within the limit. Expired entries are
+    removed lazily on access and in small batches on every write, so TTL'd
+    keys that are never read again do not accumulate.
     """
 
+    NUM_SHARDS = 16
+    # Expired entries removed per write; keeps the cost of a set() bounded.
+    SWEEP_BATCH = 8
+
     _instance: Optional['InMemoryCache'] = None
     _lock: threading.Lock = threading.Lock()
     _initialized: bool = False
@@ -39,11 +125,69 @@ class InMemoryCache:
         if not self._initialized:
             with self._lock:
                 if not self._initialized:
-                    # print("Initializing SessionCache storage")
-                    self._cache_data: dict[str, dict[str, Any]] = {}
-                    self._ttl: dict[str, float] = {}
-                    self._data_lock: threading.Lock = threading.Lock()
+                    self._shards = [
+                        _CacheShard() for _ in range(self.NUM_SHARDS)
+                    ]
+                    self._max_entries_per_shard: int | None = None
+                    self._max_bytes_per_shard: int | None = None
+                    self._inflight: dict[str, asyncio.Task] = {}
+                    self._inflight_lock = threading.Lock()
+                    # key -> (expiry, fresh until, value start, value end) of
+                    # snapshot entries that have not been restored yet.
+                    self._snapshot_index: dict[
+                        str, tuple[float, float, int, int]
+                    ] = {}
+                    self._snapshot_buffer: mmap.mmap | None = None
+                    self._snapshot_lock = threading.Lock()
+                    # (path, interval) once enable_snapshots was called.
+                    self._snapshot_config: tuple[str, float] | None = None
+                    self._snapshot_thread: threading.Thread | None = None
+                    self._snapshot_stop = threading.Event()
                     self._initialized = True
+                    snapshot_path = os.getenv(SNAPSHOT_PATH_ENV)
+                    if snapshot_path:
+                        self.enable_snapshots(
+                            snapshot_path,
+                            float(os.getenv(SNAPSHOT_INTERVAL_ENV, '60')),
+                        )
+
+    def configure(
+        self, max_entries: int | None = None, max_bytes: int | None = None
+    ) -> None:
+        """Set the size bounds of the cache.
+
+        The limits are split evenly over the shards, so eviction starts when a
+        shard reaches its share. Sizes are estimated with sys.getsizeof and do
+        not include objects referenced by the cached values.
+
+        Args:
+            max_entries: Maximum number of entries. None means unbounded.
+            max_bytes: Maximum estimated size of the values in bytes. None
+                means unbounded.
+        """
+        self._max_entries_per_shard = (
+            math.ceil(max_entries / self.NUM_SHARDS) if max_entries else None
+        )
+        self._max_bytes_per_shard = (
+            math.ceil(max_bytes / self.NUM_SHARDS) if max_bytes else None
+        )
+        for shard in self._shards:
+            with shard.lock:
+                self._evict(shard)
+
+    def _shard(self, key: str) -> _CacheShard:
+        return self._shards[hash(key) % self.NUM_SHARDS]
+
+    def _evict(self, shard: _CacheShard) -> None:
+        max_entries = self._max_entries_per_shard
+        max_bytes = self._max_bytes_per_shard
+        while shard.data and (
+            (max_entries is not None and len(shard.data) > max_entries)
+            or (max_bytes is not None and shard.total_size > max_bytes)
+        ):
+            oldest_key = next(iter(shard.data))
+            shard.remove(oldest_key)
+            shard.evictions += 1
 
     def set(self, key: str, value: Any, ttl: int | None = None) -> None:
         """Set a key-value pair.
@@ -53,13 +197,71 @@ class InMemoryCache:
             value: The data to store.
             ttl: Time to live in seconds. If None, data will not expire.
         """
-        with self._data_lock:
-            self._cache_data[key] = value
+        self._set(key, value, ttl)
+
+    def _set(
+        self,
+        key: str,
+        value: Any,
+        ttl: float | None,
+        fresh_until: float | None = None,
+    ) -> None:
+        shard = self._shard(key)
+        with shard.lock:
+            now = time.time()
+            shard.purge_expired(now, self.SWEEP_BATCH)
+            # A newer value supersedes whatever the snapshot holds.
+            self._discard_snapshot_entry(key)
+            self._store_locked(
+                shard,
+                key,
+                value,
+                now + ttl if ttl is not None else None,
+                fresh_until,
+            )
+
+    def _store_locked(
+        self,
+        shard: _CacheShard,
+        key: str,
+        value: Any,
+        expiry: float | None,
+        fresh_until: float | None,
+    ) -> None:
+        if key in shard.data:
+            shard.total_size -= shard.sizes[key]
+        shard.data[key] = value
+        shard.data.move_to_end(key)
+        size = sys.getsizeof(value)
+        shard.sizes[key] = size
+        shard.total_size += size
+
+        if expiry is not None:
+            shard.ttl[key] = expiry
+            shard.push_expiry(key, expiry)
+        elif key in shard.ttl:
+            del shard.ttl[key]
 
-            if ttl is not None:
-                self._ttl[key] = time.time() + ttl
-            elif key in self._ttl:
-                del self._ttl[key]
+        if fresh_until is not None:
+            shard.fresh_until[key] = fresh_until
+        else:
+            shard.fresh_until.pop(key, None)
+
+        self._evict(shard)
+
+    def _find_locked(self, shard: _CacheShard, key: str, now: float) -> bool:
+        """Looks a key up with the shard lock held, updating LRU and stats."""
+        if key not in shard.data and not self._restore_locked(shard, key, now):
+            shard.misses += 1
+            return False
+        if key in shard.ttl and now > shard.ttl[key]:
+            shard.remove(key)
+            shard.expirations += 1
+            shard.misses += 1
+            return False
+        shard.data.move_to_end(key)
+        shard.hits += 1
+        return True
 
     def get(self, key: str, default: Any = None) -> Any:
         """Get the value associated with a key.
@@ -71,12 +273,111 @@ class InMemoryCache:
         Returns:
             The cached value, or the default value if not found.
         """
-        with self._data_lock:
-            if key in self._ttl and time.time() > self._ttl[key]:
-                del self._cache_data[key]
-                del self._ttl[key]
+        shard = self._shard(key)
+        with shard.lock:
+            if not self._find_locked(shard, key, time.time()):
                 return default
-            return self._cache_data.get(key, default)
+            return shard.data[key]
+
+    def _lookup(self, key: str) -> tuple[bool, bool, Any]:
+        """Returns (found, fresh, value) for get_or_compute."""
+        shard = self._shard(key)
+        with shard.lock:
+            now = time.time()
+            if not self._find_locked(shard, key, now):
+                return False, False, None
+            fresh = now <= shard.fresh_until.get(key, now)
+            return True, fresh, shard.data[key]
+
+    async def get_or_compute(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any] | Any],
+        ttl: int | None = None,
+        stale_ttl: int | None = None,
+    ) -> Any:
+        """Get a value, computing it once if it is missing.
+
+        Concurrent callers that miss the same key share a single call to
+        factory and all receive its result (or its exception). Failed
+        computations are not cached.
+
+        With stale_ttl, an entry older than ttl but younger than
+        ttl + stale_ttl is returned immediately while a single background call
+        to factory refreshes it, so hot keys never wait for a refresh.
+
+        Args:
+            key: The key for the data.
+            factory: Produces the value. May be a coroutine function or a
+                plain callable.
+            ttl: Seconds the computed value is fresh. If None, it never
+                expires.
+            stale_ttl: Additional seconds a value may be served stale while it
+                is refreshed in the background.
+
+        Returns:
+            The cached or newly computed value.
+        """
+        found, fresh, value = self._lookup(key)
+        if found and fresh:
+            return value
+
+        computation = self._start_computation(key, factory, ttl, stale_ttl)
+        if found:
+            # Stale: the refresh continues in the background.
+            return value
+        # Shielded so a cancelled caller does not abort the computation the
+        # other callers are waiting on.
+        return await asyncio.shield(computation)
+
+    def _start_computation(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any] | Any],
+        ttl: int | None,
+        stale_ttl: int | None,
+    ) -> asyncio.Task:
+        loop = asyncio.get_running_loop()
+        with self._inflight_lock:
+            computation = self._inflight.get(key)
+            # Tasks cannot be awaited from another event loop; callers on a
+            # different loop compute on their own.
+            if computation is not None and computation.get_loop() is loop:
+                return computation
+            computation = loop.create_task(
+                self._compute(key, factory, ttl, stale_ttl)
+            )
+            self._inflight[key] = computation
+
+        def _done(task: asyncio.Task):
+            with self._inflight_lock:
+                if self._inflight.get(key) is task:
+                    del self._inflight[key]
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning(
+                    f'Computing cache entry {key} failed: {task.exception()}'
+                )
+
+        computation.add_done_callback(_done)
+        return computation
+
+    async def _compute(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any] | Any],
+        ttl: int | None,
+        stale_ttl: int | None,
+    ) -> Any:
+        value = factory()
+        if inspect.isawaitable(value):
+            value = await value
+        if ttl is not None and stale_ttl:
+            self._set(
+                key, value, ttl + stale_ttl, fresh_until=time.time() + ttl
+            )
+        else:
+            self._set(key, value, ttl)
+        return value
 
     def delete(self, key: str) -> None:
         """Delete a specific key-value pair from a cache.
@@ -87,13 +388,46 @@ class InMemoryCache:
         Returns:
             True if the key was found and deleted, False otherwise.
         """
-        with self._data_lock:
-            if key in self._cache_data:
-                del self._cache_data[key]
-                if key in self._ttl:
-                    del self._ttl[key]
+        shard = self._shard(key)
+        with shard.lock:
+            in_snapshot = self._discard_snapshot_entry(key)
+            if key in shard.data:
+                shard.remove(key)
                 return True
-            return False
+            return in_snapshot
+
+    def purge_expired(self) -> int:
+        """Remove every expired entry.
+
+        Returns:
+            The number of entries removed.
+        """
+        now = time.time()
+        purged = 0
+        for shard in self._shards:
+            with shard.lock:
+                purged += shard.purge_expired(now)
+        return purged
+
+    def stats(self) -> dict[str, int]:
+        """Return hit, miss, eviction and expiration counters and sizes."""
+        totals = {
+            'entries': 0,
+            'bytes': 0,
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+        }
+        for shard in self._shards:
+            with shard.lock:
+                totals['entries'] += len(shard.data)
+                totals['bytes'] += shard.total_size
+                totals['hits'] += shard.hits
+                totals['misses'] += shard.misses
+                totals['evictions'] += shard.evictions
+                totals['expirations'] += shard.expirations
+        return totals
 
     def clear(self) -> bool:
         """Remove all data.
@@ -101,8 +435,239 @@ class InMemoryCache:
         Returns:
             True if the data was cleared, False otherwise.
         """
-        with self._data_lock:
-            self._cache_data.clear()
-            self._ttl.clear()
-            return True
-        return False
+        for shard in self._shards:
+            with shard.lock:
+                shard.data.clear()
+                shard.ttl.clear()
+                shard.fresh_until.clear()
+                shard.sizes.clear()
+                shard.total_size = 0
+                shard.expiry_heap.clear()
+        with self._snapshot_lock:
+            self._snapshot_index = {}
+            self._snapshot_buffer = None
+        return True
+
+    def save_snapshot(self, path: str) -> int:
+        """Write the live entries, with their expiry times, to a file.
+
+        Values are pickled, so only load snapshots this application wrote
+        itself. Values that cannot be pickled are skipped. Entries from a
+        loaded snapshot that have not been restored yet are carried over. The
+        file is replaced atomically.
+
+        Args:
+            path: Destination file.
+
+        Returns:
+            The number of entries written.
+        """
+        now = time.time()
+        records: list[tuple[str, float, float, bytes]] = []
+        for shard in self._shards:
+            with shard.lock:
+                items = [
+                    (
+                        key,
+                        value,
+                        shard.ttl.get(key, NO_EXPIRY),
+                        shard.fresh_until.get(key, NO_EXPIRY),
+                    )
+                    for key, value in shard.data.items()
+                    if shard.ttl.get(key, now) >= now
+                ]
+            for key, value, expiry, fresh_until in items:
+                try:
+                    payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+                except Exception as e:
+                    logger.debug(f'Not snapshotting cache entry {key}: {e}')
+                    continue
+                records.append((key, expiry, fresh_until, payload))
+
+        with self._snapshot_lock:
+            buffer = self._snapshot_buffer
+            for key, (expiry, fresh_until, start, end) in list(
+                self._snapshot_index.items()
+            ):
+                if expiry == NO_EXPIRY or expiry >= now:
+                    records.append((key, expiry, fresh_until, buffer[start:end]))
+
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(
+                _SNAPSHOT_HEADER.pack(
+                    _SNAPSHOT_MAGIC, _SNAPSHOT_VERSION, len(records)
+                )
+            )
+            for key, expiry, fresh_until, payload in records:
+                encoded_key = key.encode()
+                f.write(
+                    _SNAPSHOT_ENTRY.pack(
+                        len(encoded_key), expiry, fresh_until, len(payload)
+                    )
+                )
+                f.write(encoded_key)
+                f.write(payload)
+        os.replace(tmp_path, path)
+        return len(records)
+
+    def load_snapshot(self, path: str) -> int:
+        """Make the entries of a snapshot file available lazily.
+
+        The file is memory-mapped and only its entry headers are read; a value
+        is unpickled the first time its key is looked up. Expired entries and
+        keys already present in the cache are skipped.
+
+        Args:
+            path: Snapshot file written by save_snapshot.
+
+        Returns:
+            The number of entries that can be restored.
+        """
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < _SNAPSHOT_HEADER.size:
+                return 0
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count = _SNAPSHOT_HEADER.unpack_from(buffer, 0)
+        if magic != _SNAPSHOT_MAGIC or version != _SNAPSHOT_VERSION:
+            logger.warning(f'Ignoring cache snapshot with unknown format: {path}')
+            return 0
+
+        now = time.time()
+        index: dict[str, tuple[float, float, int, int]] = {}
+        offset = _SNAPSHOT_HEADER.size
+        for _ in range(count):
+            key_length, expiry, fresh_until, value_length = (
+                _SNAPSHOT_ENTRY.unpack_from(buffer, offset)
+            )
+            offset += _SNAPSHOT_ENTRY.size
+            key = buffer[offset : offset + key_length].decode()
+            offset += key_length
+            if (expiry == NO_EXPIRY or expiry >= now) and not self._contains(
+                key
+            ):
+                index[key] = (expiry, fresh_until, offset, offset + value_length)
+            offset += value_length
+
+        with self._snapshot_lock:
+            self._snapshot_index = index
+            self._snapshot_buffer = buffer
+        return len(index)
+
+    def enable_snapshots(self, path: str, interval: float = 60.0) -> None:
+        """Warm-start from path and keep saving snapshots to it.
+
+        Args:
+            path: Snapshot file. Loaded lazily if it exists.
+            interval: Seconds between snapshots, taken on a daemon thread.
+        """
+        self._snapshot_config = (path, interval)
+        if os.path.exists(path):
+            try:
+                restorable = self.load_snapshot(path)
+                logger.info(
+                    f'Loaded cache snapshot {path} with {restorable} entries'
+                )
+            except Exception as e:
+                logger.warning(f'Could not load cache snapshot {path}: {e}')
+        self.start_snapshots()
+
+    def start_snapshots(self) -> None:
+        """Start the snapshot thread of this process, if not running.
+
+        Threads do not survive a fork, so a forked worker that should keep
+        saving its cache has to call this. Does nothing unless
+        enable_snapshots was called.
+        """
+        if self._snapshot_config is None or (
+            self._snapshot_thread is not None
+            and self._snapshot_thread.is_alive()
+        ):
+            return
+        path, interval = self._snapshot_config
+        stop = self._snapshot_stop = threading.Event()
+
+        def _snapshot_periodically():
+            while not stop.wait(interval):
+                try:
+                    self.save_snapshot(path)
+                except Exception as e:
+                    logger.warning(f'Could not save cache snapshot {path}: {e}')
+
+        self._snapshot_thread = threading.Thread(
+            target=_snapshot_periodically,
+            name='in-memory-cache-snapshot',
+            daemon=True,
+        )
+        self._snapshot_thread.start()
+
+    def stop_snapshots(self) -> None:
+        """Stop the snapshot thread and wait until it has exited.
+
+        Call this before forking workers, so that none of them inherits a
+        lock the thread held at that moment. start_snapshots resumes.
+        """
+        self._snapshot_stop.set()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+            self._snapshot_thread = None
+
+    def _after_fork_in_child(self) -> None:
+        # Locks held by other threads of the parent would never be released
+        # in the child; only the forking thread carries over.
+        for shard in self._shards:
+            shard.lock = threading.Lock()
+        self._inflight_lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        # Computations belong to the parent's event loop.
+        self._inflight = {}
+        self._snapshot_thread = None
+
+    def _restore_locked(self, shard: _CacheShard, key: str, now: float) -> bool:
+        """Moves a key from the loaded snapshot into the shard."""
+        if not self._snapshot_index:
+            return False
+        with self._snapshot_lock:
+            entry = self._snapshot_index.pop(key, None)
+            if entry is None:
+                return False
+            expiry, fresh_until, start, end = entry
+            payload = self._snapshot_buffer[start:end]
+        if expiry != NO_EXPIRY and expiry < now:
+            return False
+        try:
+            value = pickle.loads(payload)
+        except Exception as e:
+            logger.warning(f'Could not restore cache entry {key}: {e}')
+            return False
+        self._store_locked(
+            shard,
+            key,
+            value,
+            None if expiry == NO_EXPIRY else expiry,
+            None if fresh_until == NO_EXPIRY else fresh_until,
+        )
+        return True
+
+    def _contains(self, key: str) -> bool:
+        shard = self._shard(key)
+        with shard.lock:
+            return key in shard.data
+
+    def _discard_snapshot_entry(self, key: str) -> bool:
+        if not self._snapshot_index:
+            return False
+        with self._snapshot_lock:
+            return self._snapshot_index.pop(key, None) is not None
+
+
+def _reinit_after_fork() -> None:
+    InMemoryCache._lock = threading.Lock()
+    instance = InMemoryCache._instance
+    if instance is not None and instance._initialized:
+        instance._after_fork_in_child()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
@@ -1,3 +1,4 @@
+import asyncio
 import hashlib
 import json
 import logging
@@ -10,38 +11,127 @@ import httpx
 import jwt
 
 from jwcrypto import jwk
-from jwt import PyJWK, PyJWKClient
+from jwt import PyJWK
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
+from .in_memory_cache import InMemoryCache
+
 
 logger = logging.getLogger(__name__)
 AUTH_HEADER_PREFIX = 'Bearer '
+# Push notifications older than this are rejected to prevent replay attacks.
+REPLAY_WINDOW_SECONDS = 60 * 5
+VERIFIED_URL_CACHE_PREFIX = 'push_notification_url:'
+
+# JWK generation parameters per supported JWS algorithm. EdDSA and ES256 sign
+# considerably faster than RS256 with equivalent or better security.
+SIGNING_KEY_PARAMS: dict[str, dict[str, Any]] = {
+    'RS256': {'kty': 'RSA', 'size': 2048},
+    'ES256': {'kty': 'EC', 'crv': 'P-256'},
+    'EdDSA': {'kty': 'OKP', 'crv': 'Ed25519'},
+}
+SUPPORTED_SIGNING_ALGORITHMS = list(SIGNING_KEY_PARAMS)
 
 
 class PushNotificationAuth:
-    def _calculate_request_body_sha256(self, data: dict[str, Any]):
-        """Calculates the SHA256 hash of a request body.
+    @staticmethod
+    def _serialize_request_body(data: dict[str, Any]) -> bytes:
+        """Serializes a request body into its canonical JSON bytes.
 
-        This logic needs to be same for both the agent who signs the payload and the client verifier.
+        The sender posts exactly these bytes, so the receiver can hash the raw
+        body without parsing and re-serializing it.
         """
-        body_str = json.dumps(
+        return json.dumps(
             data,
             ensure_ascii=False,
             allow_nan=False,
             indent=None,
             separators=(',', ':'),
+        ).encode()
+
+    def _calculate_request_body_sha256(self, data: dict[str, Any]):
+        """Calculates the SHA256 hash of a request body.
+
+        This logic needs to be same for both the agent who signs the payload and the client verifier.
+        """
+        return self._calculate_raw_body_sha256(
+            self._serialize_request_body(data)
         )
-        return hashlib.sha256(body_str.encode()).hexdigest()
+
+    @staticmethod
+    def _calculate_raw_body_sha256(body: bytes):
+        return hashlib.sha256(body).hexdigest()
 
 
 class PushNotificationSenderAuth(PushNotificationAuth):
-    def __init__(self):
+    def __init__(
+        self,
+        algorithm: str = 'RS256',
+        max_public_keys: int = 3,
+        verified_url_ttl: int = 60 * 60,
+        failed_url_ttl: int = 30,
+    ):
+        """Initialize the sender.
+
+        Args:
+            algorithm: JWS algorithm used for new keys. One of
+                SUPPORTED_SIGNING_ALGORITHMS.
+            max_public_keys: Number of public keys kept in the JWKS. Older keys
+                stay published after a rotation so notifications signed just
+                before it can still be verified.
+            verified_url_ttl: Seconds a successfully verified push URL is
+                trusted without another validation request.
+            failed_url_ttl: Seconds a failed verification is remembered before
+                the URL is tried again.
+        """
+        if algorithm not in SIGNING_KEY_PARAMS:
+            raise ValueError(f'Unsupported signing algorithm: {algorithm}')
+        self.algorithm = algorithm
+        self.max_public_keys = max_public_keys
         self.public_keys = []
         self.private_key_jwk: PyJWK = None
+        self.verified_url_ttl = verified_url_ttl
+        self.failed_url_ttl = failed_url_ttl
+        self.url_cache = InMemoryCache()
+        self._url_verifications: dict[str, asyncio.Future] = {}
+
+    async def verify_push_notification_url(self, url: str) -> bool:
+        """Checks that the URL echoes a validation token.
+
+        Results are cached: successful verifications for
+        verified_url_ttl seconds and failures for failed_url_ttl seconds.
+        Concurrent verifications of the same URL share one request.
+        """
+        cache_key = VERIFIED_URL_CACHE_PREFIX + url
+        is_verified = self.url_cache.get(cache_key)
+        if is_verified is not None:
+            return is_verified
+
+        verification = self._url_verifications.get(url)
+        if verification is None:
+            verification = asyncio.ensure_future(
+                self._verify_and_cache_url(url)
+            )
+            self._url_verifications[url] = verification
+            verification.add_done_callback(
+                lambda _: self._url_verifications.pop(url, None)
+            )
+        # Shielded so one cancelled caller does not abort the request the
+        # other callers are waiting on.
+        return await asyncio.shield(verification)
+
+    async def _verify_and_cache_url(self, url: str) -> bool:
+        is_verified = await self._request_url_verification(url)
+        self.url_cache.set(
+            VERIFIED_URL_CACHE_PREFIX + url,
+            is_verified,
+            ttl=self.verified_url_ttl if is_verified else self.failed_url_ttl,
+        )
+        return is_verified
 
     @staticmethod
-    async def verify_push_notification_url(url: str) -> bool:
+    async def _request_url_verification(url: str) -> bool:
         async with httpx.AsyncClient(timeout=10) as client:
             try:
                 validation_token = str(uuid.uuid4())
@@ -62,11 +152,24 @@ class PushNotificationSenderAuth(PushNotificationAuth):
 
         return False
 
-    def generate_jwk(self):
+    def generate_jwk(self, algorithm: str | None = None):
+        """Generates a new signing key and publishes its public part.
+
+        Calling this again rotates the signing key. The previous public keys
+        remain in the JWKS, up to max_public_keys.
+        """
+        algorithm = algorithm or self.algorithm
+        if algorithm not in SIGNING_KEY_PARAMS:
+            raise ValueError(f'Unsupported signing algorithm: {algorithm}')
         key = jwk.JWK.generate(
-            kty='RSA', size=2048, kid=str(uuid.uuid4()), use='sig'
+            kid=str(uuid.uuid4()),
+            use='sig',
+            alg=algorithm,
+            **SIGNING_KEY_PARAMS[algorithm],
         )
         self.public_keys.append(key.export_public(as_dict=True))
+        if len(self.public_keys) > self.max_public_keys:
+            self.public_keys = self.public_keys[-self.max_public_keys :]
         self.private_key_jwk = PyJWK.from_json(key.export_private())
 
     def handle_jwks_endpoint(self, _request: Request):
@@ -79,27 +182,41 @@ class PushNotificationSenderAuth(PushNotificationAuth):
         Payload is signed with private key and it ensures the integrity of payload for client.
         Including iat prevents from replay attack.
         """
+        return self._generate_jwt_for_body(self._serialize_request_body(data))
+
+    def _generate_jwt_for_body(self, body: bytes):
         iat = int(time.time())
 
         return jwt.encode(
             {
                 'iat': iat,
-                'request_body_sha256': self._calculate_request_body_sha256(
-                    data
-                ),
+                'request_body_sha256': self._calculate_raw_body_sha256(body),
             },
             key=self.private_key_jwk,
             headers={'kid': self.private_key_jwk.key_id},
-            algorithm='RS256',
+            algorithm=self.private_key_jwk.algorithm_name,
         )
 
+    async def post_push_notification(
+        self, client: httpx.AsyncClient, url: str, data: dict[str, Any]
+    ):
+        """Signs and posts a single notification using the given client.
+
+        Errors are raised to the caller so it can decide whether to retry.
+        """
+        body = self._serialize_request_body(data)
+        jwt_token = self._generate_jwt_for_body(body)
+        headers = {
+            'Authorization': f'Bearer {jwt_token}',
+            'Content-Type': 'application/json',
+        }
+        response = await client.post(url, content=body, headers=headers)
+        response.raise_for_status()
+
     async def send_push_notification(self, url: str, data: dict[str, Any]):
-        jwt_token = self._generate_jwt(data)
-        headers = {'Authorization': f'Bearer {jwt_token}'}
         async with httpx.AsyncClient(timeout=10) as client:
             try:
-                response = await client.post(url, json=data, headers=headers)
-                response.raise_for_status()
+                await self.post_push_notification(client, url, data)
                 logger.info(f'Push-notification sent for URL: {url}')
             except Exception as e:
                 logger.warning(
@@ -108,37 +225,155 @@ class PushNotificationSenderAuth(PushNotificationAuth):
 
 
 class PushNotificationReceiverAuth(PushNotificationAuth):
-    def __init__(self):
+    def __init__(
+        self,
+        jwks_refresh_interval: float = 10.0,
+        max_cached_tokens: int = 10000,
+        verify_in_thread: bool = True,
+    ):
+        """Initialize the receiver.
+
+        Args:
+            jwks_refresh_interval: Seconds to wait after a JWKS refresh that
+                did not contain a requested kid before refreshing again.
+            max_cached_tokens: Upper bound for the verified-token cache.
+            verify_in_thread: Check token signatures in a worker thread so the
+                event loop keeps serving other requests.
+        """
         self.public_keys_jwks = []
-        self.jwks_client = None
+        self.jwks_url: str | None = None
+        self.jwks_refresh_interval = jwks_refresh_interval
+        self.max_cached_tokens = max_cached_tokens
+        self.verify_in_thread = verify_in_thread
+        self._signing_keys: dict[str, PyJWK] = {}
+        self._jwks_missed_at = float('-inf')
+        self._jwks_lock = asyncio.Lock()
+        # token -> (decoded claims, time after which the token is expired)
+        self._verified_tokens: dict[str, tuple[dict[str, Any], float]] = {}
 
     async def load_jwks(self, jwks_url: str):
-        self.jwks_client = PyJWKClient(jwks_url)
+        """Sets the JWKS URL and tries to prefetch its keys.
+
+        An unreachable sender does not keep the receiver from starting: the
+        keys are then fetched when the first notification arrives.
+        """
+        self.jwks_url = jwks_url
+        try:
+            await self._refresh_jwks()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(
+                f'Could not load JWKS from {jwks_url}, will retry on first '
+                f'use: {e}'
+            )
+
+    async def _refresh_jwks(self):
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.get(self.jwks_url)
+            response.raise_for_status()
+            self.public_keys_jwks = response.json().get('keys', [])
+
+        signing_keys = {}
+        for key in self.public_keys_jwks:
+            if key.get('use', 'sig') != 'sig' or 'kid' not in key:
+                continue
+            try:
+                signing_keys[key['kid']] = PyJWK(key)
+            except jwt.PyJWKError as e:
+                logger.warning(f'Skipping unusable JWK {key["kid"]}: {e}')
+        self._signing_keys = signing_keys
+
+    async def _get_signing_key(self, kid: str) -> PyJWK:
+        signing_key = self._signing_keys.get(kid)
+        if signing_key is not None:
+            return signing_key
 
-    async def verify_push_notification(self, request: Request) -> bool:
+        # Unknown kid, most likely the sender rotated its key. Refresh, but
+        # after a refresh that did not turn up the kid wait for
+        # jwks_refresh_interval so tokens with random kids cannot make us
+        # hammer the JWKS endpoint.
+        async with self._jwks_lock:
+            signing_key = self._signing_keys.get(kid)
+            if (
+                signing_key is None
+                and time.monotonic() - self._jwks_missed_at
+                >= self.jwks_refresh_interval
+            ):
+                try:
+                    await self._refresh_jwks()
+                except httpx.HTTPError as e:
+                    self._jwks_missed_at = time.monotonic()
+                    raise ValueError(f'Could not load JWKS: {e}') from e
+                signing_key = self._signing_keys.get(kid)
+                if signing_key is None:
+                    self._jwks_missed_at = time.monotonic()
+
+        if signing_key is None:
+            raise ValueError(f'Unknown signing key: {kid}')
+        return signing_key
+
+    async def _decode_token(self, token: str) -> dict[str, Any]:
+        now = time.time()
+        cached = self._verified_tokens.get(token)
+        if cached is not None and now <= cached[1]:
+            return cached[0]
+
+        kid = jwt.get_unverified_header(token).get('kid')
+        signing_key = await self._get_signing_key(kid)
+        decode_kwargs = {
+            'options': {'require': ['iat', 'request_body_sha256']},
+            'algorithms': SUPPORTED_SIGNING_ALGORITHMS,
+        }
+        if self.verify_in_thread:
+            decode_token = await asyncio.to_thread(
+                jwt.decode, token, signing_key, **decode_kwargs
+            )
+        else:
+            decode_token = jwt.decode(token, signing_key, **decode_kwargs)
+
+        if len(self._verified_tokens) >= self.max_cached_tokens:
+            self._verified_tokens = {
+                t: v for t, v in self._verified_tokens.items() if now <= v[1]
+            }
+            if len(self._verified_tokens) >= self.max_cached_tokens:
+                self._verified_tokens.pop(next(iter(self._verified_tokens)))
+        self._verified_tokens[token] = (
+            decode_token,
+            decode_token['iat'] + REPLAY_WINDOW_SECONDS,
+        )
+        return decode_token
+
+    async def verify_push_notification(
+        self, request: Request, body: bytes | None = None
+    ) -> bool:
+        """Verifies the signature and freshness of a push notification.
+
+        Args:
+            request: The incoming notification request.
+            body: The raw request body, if the caller has already read it.
+        """
         auth_header = request.headers.get('Authorization')
         if not auth_header or not auth_header.startswith(AUTH_HEADER_PREFIX):
             print('Invalid authorization header')
             return False
 
         token = auth_header[len(AUTH_HEADER_PREFIX) :]
-        signing_key = self.jwks_client.get_signing_key_from_jwt(token)
-
-        decode_token = jwt.decode(
-            token,
-            signing_key,
-            options={'require': ['iat', 'request_body_sha256']},
-            algorithms=['RS256'],
-        )
+        decode_token = await self._decode_token(token)
 
-        actual_body_sha256 = self._calculate_request_body_sha256(
-            await request.json()
-        )
+        if body is None:
+            body = await request.body()
+        actual_body_sha256 = self._calculate_raw_body_sha256(body)
+        if actual_body_sha256 != decode_token['request_body_sha256']:
+            # Senders that do not post the canonical serialization (older
+            # versions of this module) are still accepted, at the cost of a
+            # parse and re-serialization.
+            actual_body_sha256 = self._calculate_request_body_sha256(
+                json.loads(body)
+            )
         if actual_body_sha256 != decode_token['request_body_sha256']:
             # Payload signature does not match the digest in signed token.
             raise ValueError('Invalid request body')
 
-        if time.time() - decode_token['iat'] > 60 * 5:
+        if time.time() - decode_token['iat'] > REPLAY_WINDOW_SECONDS:
             # Do not allow push-notifications older than 5 minutes.
             # This is to prevent replay attack.
             raise ValueError('Token is expired')
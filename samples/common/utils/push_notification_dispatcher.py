@@ -0,0 +1,293 @@
+"""Background delivery of push notifications."""
+
+import asyncio
+import itertools
+import logging
+import random
+
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+
+from samples.common.utils.push_notification_auth import (
+    PushNotificationSenderAuth,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses that are worth retrying; everything else in 4xx is treated as
+# a permanent rejection by the receiver.
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+@dataclass
+class _PendingNotification:
+    task_id: str
+    url: str
+    data: dict[str, Any]
+    state: str | None = None
+    attempts: int = field(default=0)
+    # Order of the content within its task; see _latest_seq.
+    seq: int = 0
+    retry_handle: asyncio.TimerHandle | None = None
+
+
+class PushNotificationDispatcher:
+    """Delivers push notifications from a background queue.
+
+    Status changes are enqueued without waiting on the webhook. A small pool of
+    workers drains the queue using one pooled ``httpx.AsyncClient``, limits the
+    number of concurrent requests per endpoint and retries transient failures
+    with exponential backoff. A notification waiting for its retry is kept out
+    of the queue until it is due, so a failing endpoint never ties up a
+    worker; newer updates for its task are folded into it meanwhile, so
+    receivers still see the states of a task in order.
+
+    While a ``working`` update for a task is still waiting in the queue, newer
+    updates for the same task replace it in place, so receivers only get the
+    latest state instead of every superseded intermediate one.
+    """
+
+    def __init__(
+        self,
+        sender_auth: PushNotificationSenderAuth,
+        workers: int = 4,
+        max_concurrency_per_endpoint: int = 4,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0,
+        timeout: float = 10.0,
+        limits: httpx.Limits | None = None,
+    ):
+        """Initialize the dispatcher.
+
+        Args:
+            sender_auth: Signs the notification payloads.
+            workers: Number of background delivery workers.
+            max_concurrency_per_endpoint: Maximum number of in-flight requests
+                per scheme/host/port.
+            max_retries: Retries after the first failed attempt.
+            backoff_base: Delay in seconds before the first retry. Doubles on
+                every further retry.
+            backoff_max: Upper bound for the retry delay in seconds.
+            timeout: Timeout in seconds for a single delivery attempt.
+            limits: Connection pool limits for the shared HTTP client.
+        """
+        self.sender_auth = sender_auth
+        self.workers = workers
+        self.max_concurrency_per_endpoint = max_concurrency_per_endpoint
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.limits = limits or httpx.Limits(
+            max_connections=100, max_keepalive_connections=20
+        )
+
+        self._queue: asyncio.Queue[_PendingNotification] | None = None
+        self._client: httpx.AsyncClient | None = None
+        self._worker_tasks: list[asyncio.Task] = []
+        self._queued_working: dict[str, _PendingNotification] = {}
+        self._endpoint_semaphores: dict[str, asyncio.Semaphore] = {}
+        self._task_locks: dict[str, asyncio.Lock] = {}
+        self._task_lock_users: dict[str, int] = {}
+        self._seq = itertools.count(1)
+        # Per task, the seq of the newest content enqueued and not yet done.
+        self._latest_seq: dict[str, int] = {}
+        # Per task, the notification waiting for its retry to be due.
+        self._retrying: dict[str, _PendingNotification] = {}
+        self._retries_idle = asyncio.Event()
+        self._retries_idle.set()
+        self._closed = False
+
+    def _ensure_started(self) -> None:
+        if self._worker_tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout, limits=self.limits
+        )
+        self._worker_tasks = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.workers)
+        ]
+
+    def enqueue(self, task_id: str, url: str, data: dict[str, Any]) -> None:
+        """Schedule a notification for delivery without waiting for it.
+
+        Must be called from within the running event loop.
+
+        Args:
+            task_id: The task the notification belongs to.
+            url: The push-notification URL registered for the task.
+            data: The JSON payload, typically the dumped task.
+        """
+        if self._closed:
+            logger.warning(
+                f'Dropping push-notification for task {task_id}: dispatcher closed'
+            )
+            return
+        self._ensure_started()
+
+        state = (data.get('status') or {}).get('state')
+        seq = self._latest_seq[task_id] = next(self._seq)
+        queued = self._queued_working.get(task_id)
+        if queued is not None:
+            # Not picked up by a worker yet: supersede it in place so the
+            # queue position (and thus the ordering) is kept.
+            queued.url = url
+            queued.data = data
+            queued.state = state
+            queued.seq = seq
+            if state != 'working':
+                del self._queued_working[task_id]
+            return
+
+        notification = _PendingNotification(
+            task_id=task_id, url=url, data=data, state=state, seq=seq
+        )
+        if state == 'working':
+            self._queued_working[task_id] = notification
+        self._queue.put_nowait(notification)
+
+    async def close(self, drain: bool = True) -> None:
+        """Stop the workers and release the HTTP client.
+
+        Args:
+            drain: Deliver everything that is already queued, retries
+                included, before stopping. Otherwise queued notifications
+                are dropped.
+        """
+        self._closed = True
+        if not self._worker_tasks:
+            return
+        if drain:
+            # Retries that are not due yet are outside the queue.
+            await self._queue.join()
+            while self._retrying:
+                await self._retries_idle.wait()
+                await self._queue.join()
+        else:
+            for notification in self._retrying.values():
+                notification.retry_handle.cancel()
+            self._retrying.clear()
+            self._retries_idle.set()
+        for worker in self._worker_tasks:
+            worker.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        await self._client.aclose()
+        self._client = None
+
+    @property
+    def queue_size(self) -> int:
+        """Number of notifications waiting for a worker."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _worker(self) -> None:
+        while True:
+            notification = await self._queue.get()
+            if self._queued_working.get(notification.task_id) is notification:
+                del self._queued_working[notification.task_id]
+            try:
+                await self._deliver(notification)
+            except Exception as e:
+                logger.error(
+                    f'Unexpected error delivering push-notification for task {notification.task_id}: {e}'
+                )
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, notification: _PendingNotification) -> None:
+        # Deliveries for the same task are serialized so a receiver never sees
+        # an older state after a newer one.
+        task_id = notification.task_id
+        lock = self._task_locks.setdefault(task_id, asyncio.Lock())
+        self._task_lock_users[task_id] = self._task_lock_users.get(task_id, 0) + 1
+        try:
+            async with lock:
+                retry = self._retrying.get(task_id)
+                if retry is not None:
+                    # An older update of the task waits for its retry. Send
+                    # this one in its place, or it would arrive first.
+                    retry.url = notification.url
+                    retry.data = notification.data
+                    retry.state = notification.state
+                    retry.seq = notification.seq
+                    retry.attempts = 0
+                    return
+                await self._attempt(notification)
+        finally:
+            self._task_lock_users[task_id] -= 1
+            if not self._task_lock_users[task_id]:
+                del self._task_lock_users[task_id]
+                del self._task_locks[task_id]
+            if (
+                task_id not in self._retrying
+                and self._latest_seq.get(task_id) == notification.seq
+            ):
+                del self._latest_seq[task_id]
+
+    async def _attempt(self, notification: _PendingNotification) -> None:
+        semaphore = self._endpoint_semaphore(notification.url)
+        notification.attempts += 1
+        try:
+            async with semaphore:
+                await self.sender_auth.post_push_notification(
+                    self._client, notification.url, notification.data
+                )
+            logger.info(f'Push-notification sent for URL: {notification.url}')
+        except Exception as e:
+            if (
+                not self._is_retryable(e)
+                or notification.attempts > self.max_retries
+            ):
+                logger.warning(
+                    f'Giving up on push-notification for URL {notification.url} '
+                    f'after {notification.attempts} attempt(s): {e}'
+                )
+                return
+            delay = self._backoff_delay(notification.attempts)
+            logger.info(
+                f'Retrying push-notification for URL {notification.url} in {delay:.2f}s: {e}'
+            )
+            self._retrying[notification.task_id] = notification
+            self._retries_idle.clear()
+            notification.retry_handle = asyncio.get_running_loop().call_later(
+                delay, self._requeue, notification
+            )
+
+    def _requeue(self, notification: _PendingNotification) -> None:
+        task_id = notification.task_id
+        notification.retry_handle = None
+        del self._retrying[task_id]
+        if not self._retrying:
+            self._retries_idle.set()
+        if self._latest_seq.get(task_id, notification.seq) > notification.seq:
+            # A newer update of the task was queued meanwhile and has not
+            # been picked up yet; it supersedes this one.
+            return
+        self._queue.put_nowait(notification)
+
+    def _endpoint_semaphore(self, url: str) -> asyncio.Semaphore:
+        parts = urlsplit(url)
+        endpoint = f'{parts.scheme}://{parts.netloc}'
+        semaphore = self._endpoint_semaphores.get(endpoint)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency_per_endpoint)
+            self._endpoint_semaphores[endpoint] = semaphore
+        return semaphore
+
+    def _backoff_delay(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        # Full jitter keeps retries from many tasks from arriving in lockstep.
+        return random.uniform(0, delay)
+
+    @staticmethod
+    def _is_retryable(e: Exception) -> bool:
+        if isinstance(e, httpx.HTTPStatusError):
+            return e.response.status_code in RETRYABLE_STATUS_CODES
+        return isinstance(e, httpx.TransportError)
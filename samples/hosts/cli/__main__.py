@@ -6,9 +6,10 @@ import urllib
 from uuid import uuid4
 
 import asyncclick as click
+import httpx
 
 from common.client import A2ACardResolver, A2AClient
-from common.types import TaskState
+from common.types import A2AClientHTTPError, TaskState
 from common.utils.push_notification_auth import PushNotificationReceiverAuth
 
 
@@ -18,15 +19,65 @@ from common.utils.push_notification_auth import PushNotificationReceiverAuth
 @click.option('--history', default=False)
 @click.option('--use_push_notifications', default=False)
 @click.option('--push_notification_receiver', default='http://localhost:5000')
+@click.option(
+    '--load',
+    'load_prompts',
+    default=None,
+    help='Run non-interactively, sending the prompts in this file (one per '
+    'line) and reporting latencies.',
+)
+@click.option(
+    '--load_mode',
+    type=click.Choice(['send', 'stream', 'both']),
+    default=None,
+    help='Defaults to both if the agent streams, send otherwise.',
+)
+@click.option('--sessions', default=10, help='Concurrent sessions under load.')
+@click.option(
+    '--concurrency',
+    default=None,
+    type=int,
+    help='Tasks in flight; defaults to --sessions unless --rate is given.',
+)
+@click.option('--rate', default=None, type=float, help='Tasks per second.')
+@click.option('--requests', default=None, type=int, help='Tasks per mode.')
+@click.option('--duration', default=None, type=float, help='Seconds per mode.')
+@click.option(
+    '--report_json',
+    default=None,
+    help='Write the load report as JSON to this path (- for stdout).',
+)
 async def cli(
     agent,
     session,
     history,
     use_push_notifications: bool,
     push_notification_receiver: str,
+    load_prompts: str | None,
+    load_mode: str | None,
+    sessions: int,
+    concurrency: int | None,
+    rate: float | None,
+    requests: int | None,
+    duration: float | None,
+    report_json: str | None,
 ):
     card_resolver = A2ACardResolver(agent)
-    card = card_resolver.get_agent_card()
+    card = await card_resolver.get_agent_card_async()
+
+    if load_prompts:
+        await run_load_mode(
+            card,
+            load_prompts,
+            load_mode,
+            sessions,
+            concurrency,
+            rate,
+            requests,
+            duration,
+            report_json,
+        )
+        return
 
     print('======= Agent Card ========')
     print(card.model_dump_json(exclude_none=True))
@@ -85,6 +136,59 @@ async def cli(
                 )
             )
 
+    await client.close()
+
+
+async def run_load_mode(
+    card,
+    load_prompts: str,
+    load_mode: str | None,
+    sessions: int,
+    concurrency: int | None,
+    rate: float | None,
+    requests: int | None,
+    duration: float | None,
+    report_json: str | None,
+):
+    from hosts.cli.load import (
+        format_table,
+        read_prompts,
+        run_load,
+        write_report,
+    )
+
+    prompts = read_prompts(load_prompts)
+    if load_mode is None:
+        load_mode = 'both' if card.capabilities.streaming else 'send'
+    modes = ['send', 'stream'] if load_mode == 'both' else [load_mode]
+    if requests is None and duration is None:
+        requests = 100
+    connections = max(100, concurrency or sessions)
+    client = A2AClient(
+        agent_card=card,
+        limits=httpx.Limits(
+            max_connections=connections, max_keepalive_connections=connections
+        ),
+    )
+    summaries = []
+    async with client:
+        for mode in modes:
+            print(f'========= {mode} load ========')
+            stats = await run_load(
+                client,
+                prompts,
+                mode=mode,
+                sessions=sessions,
+                concurrency=concurrency,
+                rate=rate,
+                requests=requests,
+                duration=duration,
+            )
+            summaries.append(stats.summary())
+    print(format_table(summaries))
+    if report_json:
+        write_report(summaries, report_json)
+
 
 async def completeTask(
     client: A2AClient,
@@ -117,19 +221,19 @@ async def completeTask(
         show_default=False,
     )
     if file_path and file_path.strip() != '':
-        with open(file_path, 'rb') as f:
-            file_content = base64.b64encode(f.read()).decode('utf-8')
-            file_name = os.path.basename(file_path)
+        file_name = os.path.basename(file_path)
+        file = {'name': file_name}
+        try:
+            # Uploaded once; later turns only send the reference.
+            file['uri'] = await client.upload_blob(file_path)
+        except A2AClientHTTPError as e:
+            if e.status_code not in (404, 405):
+                raise
+            # The agent has no blob store, send the content inline.
+            with open(file_path, 'rb') as f:
+                file['bytes'] = base64.b64encode(f.read()).decode('utf-8')
 
-        message['parts'].append(
-            {
-                'type': 'file',
-                'file': {
-                    'name': file_name,
-                    'bytes': file_content,
-                },
-            }
-        )
+        message['parts'].append({'type': 'file', 'file': file})
 
     payload = {
         'id': taskId,
@@ -0,0 +1,255 @@
+"""Non-interactive load generation against an A2A agent.
+
+Prompts are read from a file, one per line, and sent round-robin from a
+number of sessions, either keeping a fixed number of tasks in flight
+(closed loop) or starting tasks at a fixed rate (open loop). With a rate,
+latency is measured from the time a task was scheduled to start, so time
+spent waiting for a free slot counts against the agent rather than being
+hidden.
+"""
+
+import asyncio
+import itertools
+import json
+import math
+import time
+
+from collections import Counter
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import Any
+from uuid import uuid4
+
+from common.client import A2AClient
+from common.types import TaskState
+
+
+LOAD_MODES = ('send', 'stream')
+
+_FAILED_STATES = {TaskState.FAILED, TaskState.CANCELED}
+
+
+def read_prompts(path: str) -> list[str]:
+    with open(path) as f:
+        prompts = [line.strip() for line in f if line.strip()]
+    if not prompts:
+        raise ValueError(f'No prompts in {path}')
+    return prompts
+
+
+def percentile(ordered: list[float], p: float) -> float | None:
+    """Nearest-rank percentile (0-100) of sorted values, None without data."""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+@dataclass
+class LoadStats:
+    """Outcome of all tasks sent in one mode."""
+
+    mode: str
+    latencies: list[float] = field(default_factory=list)
+    first_events: list[float] = field(default_factory=list)
+    errors: Counter = field(default_factory=Counter)
+    started: float = field(default_factory=time.perf_counter)
+    finished: float | None = None
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies) + sum(self.errors.values())
+
+    def record(
+        self,
+        latency: float,
+        first_event: float | None,
+        error: str | None,
+    ):
+        if first_event is not None:
+            self.first_events.append(first_event)
+        if error is None:
+            self.latencies.append(latency)
+        else:
+            self.errors[error] += 1
+
+    def summary(self) -> dict[str, Any]:
+        duration = (self.finished or time.perf_counter()) - self.started
+        latencies = sorted(self.latencies)
+        first_events = sorted(self.first_events)
+        requests = self.requests
+        errors = sum(self.errors.values())
+
+        def ms(value: float | None) -> float | None:
+            return None if value is None else round(value * 1000, 1)
+
+        return {
+            'mode': self.mode,
+            'requests': requests,
+            'errors': errors,
+            'error_rate': errors / requests if requests else 0.0,
+            'duration_seconds': round(duration, 3),
+            'throughput_rps': len(latencies) / duration if duration else 0.0,
+            'latency_ms': {
+                f'p{p}': ms(percentile(latencies, p)) for p in (50, 95, 99)
+            },
+            'first_event_ms': {
+                f'p{p}': ms(percentile(first_events, p)) for p in (50, 95, 99)
+            },
+            'error_kinds': dict(self.errors),
+        }
+
+
+async def _send(
+    client: A2AClient, payload: dict[str, Any], stats: LoadStats, start: float
+):
+    error = None
+    try:
+        response = await client.send_task(payload)
+        if response.error is not None:
+            error = f'jsonrpc {response.error.code}'
+        elif response.result.status.state in _FAILED_STATES:
+            error = f'task {response.result.status.state.value}'
+    except Exception as e:
+        error = type(e).__name__
+    latency = time.perf_counter() - start
+    # The response is the first and only event.
+    stats.record(latency, latency if error is None else None, error)
+
+
+async def _stream(
+    client: A2AClient, payload: dict[str, Any], stats: LoadStats, start: float
+):
+    error = None
+    first_event = None
+    try:
+        async for event in client.send_task_streaming(payload):
+            if first_event is None:
+                first_event = time.perf_counter() - start
+            if event.error is not None:
+                error = f'jsonrpc {event.error.code}'
+                break
+            status = getattr(event.result, 'status', None)
+            if status is not None and status.state in _FAILED_STATES:
+                error = f'task {status.state.value}'
+        if first_event is None and error is None:
+            error = 'empty stream'
+    except Exception as e:
+        error = type(e).__name__
+    stats.record(time.perf_counter() - start, first_event, error)
+
+
+def _payloads(prompts: list[str], sessions: int) -> Iterator[dict[str, Any]]:
+    session_ids = [uuid4().hex for _ in range(sessions)]
+    for i, prompt in enumerate(itertools.cycle(prompts)):
+        yield {
+            'id': uuid4().hex,
+            'sessionId': session_ids[i % sessions],
+            'acceptedOutputModes': ['text'],
+            'message': {
+                'role': 'user',
+                'parts': [{'type': 'text', 'text': prompt}],
+            },
+        }
+
+
+async def run_load(
+    client: A2AClient,
+    prompts: list[str],
+    mode: str = 'send',
+    sessions: int = 10,
+    concurrency: int | None = None,
+    rate: float | None = None,
+    requests: int | None = None,
+    duration: float | None = None,
+) -> LoadStats:
+    """Sends prompts to the agent until requests or duration is reached.
+
+    Args:
+        client: Client for the agent under test.
+        prompts: Prompts to send, cycled through.
+        mode: 'send' for tasks/send, 'stream' for tasks/sendSubscribe.
+        sessions: Number of sessions the tasks are spread over.
+        concurrency: Maximum number of tasks in flight. Defaults to
+            sessions without a rate, and to no limit with one.
+        rate: Tasks started per second. None keeps concurrency tasks in
+            flight at all times instead.
+        requests: Number of tasks to send.
+        duration: Seconds after which no more tasks are started.
+    """
+    if mode not in LOAD_MODES:
+        raise ValueError(f'Unknown load mode {mode}')
+    if requests is None and duration is None:
+        raise ValueError('Either requests or duration must be given')
+    if rate is None and concurrency is None:
+        concurrency = sessions
+    call = _send if mode == 'send' else _stream
+    payloads = _payloads(prompts, sessions)
+    if requests is not None:
+        payloads = itertools.islice(payloads, requests)
+    stats = LoadStats(mode)
+    deadline = None if duration is None else stats.started + duration
+    slots = asyncio.Semaphore(concurrency) if concurrency else None
+
+    async def run_one(payload: dict[str, Any], scheduled: float):
+        if slots is None:
+            await call(client, payload, stats, scheduled)
+            return
+        async with slots:
+            await call(client, payload, stats, scheduled)
+
+    if rate is None:
+
+        async def worker():
+            for payload in payloads:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                await call(client, payload, stats, time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    else:
+        running = set()
+        for i, payload in enumerate(payloads):
+            scheduled = stats.started + i / rate
+            if deadline is not None and scheduled >= deadline:
+                break
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            task = asyncio.create_task(run_one(payload, scheduled))
+            running.add(task)
+            task.add_done_callback(running.discard)
+        if running:
+            await asyncio.wait(running)
+    stats.finished = time.perf_counter()
+    return stats
+
+
+def format_table(summaries: list[dict[str, Any]]) -> str:
+    def cell(value: float | None) -> str:
+        return '-' if value is None else f'{value:.1f}'
+
+    lines = [
+        f'{"mode":<7} {"requests":>8} {"errors":>7} {"error %":>7} '
+        f'{"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+        f'{"ttfe p50":>9} {"ttfe p99":>9}'
+    ]
+    for s in summaries:
+        latency, first_event = s['latency_ms'], s['first_event_ms']
+        lines.append(
+            f'{s["mode"]:<7} {s["requests"]:>8} {s["errors"]:>7} '
+            f'{s["error_rate"] * 100:>7.1f} {s["throughput_rps"]:>8.1f} '
+            f'{cell(latency["p50"]):>8} {cell(latency["p95"]):>8} '
+            f'{cell(latency["p99"]):>8} {cell(first_event["p50"]):>9} '
+            f'{cell(first_event["p99"]):>9}'
+        )
+    for s in summaries:
+        for kind, count in sorted(s['error_kinds'].items()):
+            lines.append(f'{s["mode"]} error {kind}: {count}')
+    return '\n'.join(lines)
+
+
+def write_report(summaries: list[dict[str, Any]], path: str):
+    report = json.dumps({'results': summaries}, indent=2)
+    if path == '-':
+        print(report)
+        return
+    with open(path, 'w') as f:
+        f.write(report + '\n')
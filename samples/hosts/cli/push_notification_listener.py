@@ -1,4 +1,5 @@
 import asyncio
+import json
 import threading
 import traceback
 
@@ -66,10 +67,11 @@ class PushNotificationListener:
         return Response(content=validation_token, status_code=200)
 
     async def handle_notification(self, request: Request):
-        data = await request.json()
+        body = await request.body()
+        data = json.loads(body)
         try:
             if not await self.notification_receiver_auth.verify_push_notification(
-                request
+                request, body
             ):
                 print('push notification verification failed')
                 return None
@@ -0,0 +1,63 @@
+"""Serves the host agent in the ADK web UI together with its push
+notification endpoint.
+
+`adk web` only serves the agents themselves, so remote agents would have
+nowhere to report task updates. Run from samples/hosts instead:
+
+    python -m multiagent --port 8000
+
+Remote agents that support push notifications then post their task updates
+to http://localhost:8000/notify.
+"""
+
+import os
+
+import click
+import uvicorn
+
+from google.adk.cli.fast_api import get_fast_api_app
+from starlette.routing import Route
+
+from .agent import host_agent
+
+
+PUSH_NOTIFICATION_PATH = '/notify'
+
+
+@click.command()
+@click.option('--host', default='localhost')
+@click.option('--port', default=8000)
+@click.option(
+    '--push_notification_url',
+    default=None,
+    help='URL remote agents reach the push notification endpoint at, if '
+    'not http://<host>:<port>/notify, e.g. behind a proxy.',
+)
+def main(host, port, push_notification_url):
+    # The agents directory is the one this package lives in, so the web UI
+    # imports the agent module under the same name as this script and both
+    # share one HostAgent.
+    agents_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    app = get_fast_api_app(agents_dir=agents_dir, web=True)
+    # Ahead of the web UI's catch-all static files mount.
+    app.router.routes[0:0] = [
+        Route(
+            PUSH_NOTIFICATION_PATH,
+            host_agent.handle_push_notification,
+            methods=['POST'],
+        ),
+        Route(
+            PUSH_NOTIFICATION_PATH,
+            host_agent.handle_push_notification_validation,
+            methods=['GET'],
+        ),
+    ]
+    host_agent.push_notification_url = (
+        push_notification_url
+        or f'http://{host}:{port}{PUSH_NOTIFICATION_PATH}'
+    )
+    uvicorn.run(app, host=host, port=port)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,6 @@
 from .host_agent import HostAgent
 
 
-root_agent = HostAgent(['http://localhost:10000']).create_agent()
+# Kept at module level so __main__ can mount its push notification handlers.
+host_agent = HostAgent(['http://localhost:10000'])
+root_agent = host_agent.create_agent()
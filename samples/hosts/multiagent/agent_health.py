@@ -0,0 +1,178 @@
+import enum
+import math
+import time
+
+from collections import deque
+from typing import Any
+
+
+class CircuitState(enum.Enum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+
+class AgentUnavailableError(Exception):
+    """Raised instead of calling a remote agent whose circuit is open."""
+
+
+class AgentHealth:
+    """Rolling latency and error statistics with a circuit breaker.
+
+    The circuit opens after failure_threshold consecutive failures, or when
+    the error rate over the window exceeds max_error_rate. While open, calls
+    fail fast; after reset_timeout a single probe is let through, which
+    closes the circuit again on success.
+    """
+
+    def __init__(
+        self,
+        window: int = 100,
+        min_samples: int = 10,
+        failure_threshold: int = 5,
+        max_error_rate: float = 0.5,
+        reset_timeout: float = 30.0,
+        timeout_multiplier: float = 2.0,
+        min_timeout: float = 1.0,
+        error_penalty: float = 10.0,
+    ):
+        """Initialize the tracker.
+
+        Args:
+            window: Number of most recent calls the statistics cover.
+            min_samples: Calls needed before the error rate can open the
+                circuit and before timeouts are derived from latencies.
+            failure_threshold: Consecutive failures that open the circuit.
+            max_error_rate: Error rate over the window that opens the
+                circuit.
+            reset_timeout: Seconds the circuit stays open before a probe.
+            timeout_multiplier: Factor applied to the observed p99 latency
+                to get the adaptive timeout.
+            min_timeout: Lower bound for the adaptive timeout in seconds.
+            error_penalty: Seconds of latency a failure is worth when
+                comparing agents.
+        """
+        self.min_samples = min_samples
+        self.failure_threshold = failure_threshold
+        self.max_error_rate = max_error_rate
+        self.reset_timeout = reset_timeout
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        self.error_penalty = error_penalty
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._consecutive_failures = 0
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> CircuitState:
+        if (
+            self._state == CircuitState.OPEN
+            and time.monotonic() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = CircuitState.HALF_OPEN
+            self._probing = False
+        return self._state
+
+    @property
+    def available(self) -> bool:
+        """Whether a call would currently be let through."""
+        state = self.state
+        return state == CircuitState.CLOSED or (
+            state == CircuitState.HALF_OPEN and not self._probing
+        )
+
+    @property
+    def calls(self) -> int:
+        """Number of calls the statistics cover."""
+        return len(self._outcomes)
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def acquire(self):
+        """Claims permission for one call.
+
+        Raises:
+            AgentUnavailableError: The circuit is open, or half-open with
+                the probe already in flight.
+        """
+        if not self.available:
+            raise AgentUnavailableError(f'Circuit is {self.state.value}')
+        if self._state == CircuitState.HALF_OPEN:
+            self._probing = True
+
+    def record_success(self, latency: float):
+        self._latencies.append(latency)
+        self._outcomes.append(True)
+        self._consecutive_failures = 0
+        if self._state == CircuitState.HALF_OPEN:
+            self._state = CircuitState.CLOSED
+            self._probing = False
+
+    def record_failure(self, latency: float | None = None):
+        if latency is not None:
+            self._latencies.append(latency)
+        self._outcomes.append(False)
+        self._consecutive_failures += 1
+        if self._state == CircuitState.HALF_OPEN or (
+            self._consecutive_failures >= self.failure_threshold
+            or (
+                len(self._outcomes) >= self.min_samples
+                and self.error_rate > self.max_error_rate
+            )
+        ):
+            self._state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+    def record_cancelled(self):
+        """Forgets a call abandoned by the caller; it says nothing about health."""
+        self._probing = False
+
+    def percentile(self, p: float) -> float | None:
+        """Latency percentile (0-100) over the window, None without data."""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        rank = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+        return ordered[rank]
+
+    def timeout(self, default: float) -> float:
+        """Timeout for the next call, derived from the observed p99.
+
+        Never longer than default, which also applies until min_samples
+        latencies have been recorded.
+        """
+        if len(self._latencies) < self.min_samples:
+            return default
+        p99 = self.percentile(99)
+        return min(default, max(self.min_timeout, p99 * self.timeout_multiplier))
+
+    def score(self, prior: float = 0.0) -> float:
+        """Routing cost; lower is healthier.
+
+        Args:
+            prior: Cost assumed while no calls have been recorded, so that
+                an untried agent is neither preferred nor avoided.
+        """
+        if not self.available:
+            return math.inf
+        if not self._outcomes:
+            return prior
+        return (self.percentile(50) or 0.0) + self.error_rate * self.error_penalty
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            'circuit': self.state.value,
+            'calls': self.calls,
+            'error_rate': self.error_rate,
+            'p50_seconds': self.percentile(50),
+            'p95_seconds': self.percentile(95),
+            'p99_seconds': self.percentile(99),
+        }
@@ -1,25 +1,63 @@
-import base64
+import asyncio
 import json
+import logging
+import math
+import threading
+import time
 import uuid
 
+from collections import OrderedDict
+
 from common.client import A2ACardResolver
 from common.types import (
     AgentCard,
+    AuthenticationInfo,
     DataPart,
     Message,
     Part,
+    PushNotificationConfig,
     Task,
     TaskSendParams,
     TaskState,
+    TaskStatus,
     TextPart,
 )
+from common.utils.deadline import deadline_scope, parse_deadline
+from common.utils.file_parts import decode_file_bytes
+from common.utils.push_notification_auth import PushNotificationReceiverAuth
 from google.adk import Agent
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.tools.tool_context import ToolContext
 from google.genai import types
+from pydantic import ValidationError
+from starlette.requests import Request
+from starlette.responses import Response
+
+from .remote_agent_connection import (
+    RemoteAgentConnections,
+    TaskCallbackArg,
+    TaskUpdateCallback,
+)
+from .skill_index import SkillIndex, tokenize
+from .task_registry import (
+    TERMINAL_TASK_STATES,
+    PendingTaskRegistry,
+    merge_task_update,
+)
+
 
-from .remote_agent_connection import RemoteAgentConnections, TaskUpdateCallback
+logger = logging.getLogger(__name__)
+
+PROMPT_CACHE_SIZE = 256
+
+# A peer must score this much better before a task is routed away from the
+# agent the model picked, so routing does not flap between similar agents.
+REROUTE_MARGIN = 1.5
+
+# Rough size of a token, for budgeting remote results without the model's
+# tokenizer.
+CHARS_PER_TOKEN = 4
 
 
 class HostAgent:
@@ -33,29 +71,190 @@ class HostAgent:
         self,
         remote_agent_addresses: list[str],
         task_callback: TaskUpdateCallback | None = None,
+        discovery_timeout: float = 5.0,
+        refresh_interval: float = 300.0,
+        retry_interval: float = 5.0,
+        max_retry_interval: float = 120.0,
+        prompt_top_k: int = 8,
+        task_timeout: float = 60.0,
+        push_notification_url: str | None = None,
+        task_registry: PendingTaskRegistry | None = None,
+        result_token_budget: int | None = 2000,
+        turn_token_budget: int | None = 8000,
+        agent_token_budgets: dict[str, int] | None = None,
     ):
+        """Initialize the host agent.
+
+        Remote agents are discovered in the background so that a slow or
+        unreachable peer does not hold up startup. Addresses that cannot be
+        resolved stay pending and are retried with exponential backoff; cards
+        of registered agents are refreshed every refresh_interval seconds.
+
+        Args:
+            remote_agent_addresses: Base URLs of the remote agents.
+            task_callback: Called with every task update from remote agents.
+            discovery_timeout: Seconds to wait for a single agent card.
+            refresh_interval: Seconds between refreshes of known cards.
+            retry_interval: Initial delay before retrying a pending address.
+            max_retry_interval: Upper bound for the retry delay.
+            prompt_top_k: Maximum number of agents described in the system
+                prompt. The most relevant ones for the current turn are
+                picked from the skill index; list_remote_agents still
+                returns all of them.
+            task_timeout: Deadline in seconds for each agent's task in
+                send_tasks.
+            push_notification_url: Where remote agents that support push
+                notifications should report task updates. The application
+                has to route it to handle_push_notification (POST) and
+                handle_push_notification_validation (GET), as __main__
+                does.
+            task_registry: Registry of delegated tasks, e.g. to share one
+                between several host agents.
+            result_token_budget: Tokens a single remote agent's result may
+                take up in the model context. Longer results are truncated;
+                the full text is saved as an artifact the model can page
+                through with read_full_result. None for no limit.
+            turn_token_budget: Tokens all remote results of one turn may
+                take up together. None for no limit.
+            agent_token_budgets: result_token_budget overrides by agent
+                name.
+        """
         self.task_callback = task_callback
+        self.discovery_timeout = discovery_timeout
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.prompt_top_k = prompt_top_k
+        self.task_timeout = task_timeout
+        self.push_notification_url = push_notification_url
+        self.task_registry = task_registry or PendingTaskRegistry()
+        self.result_token_budget = result_token_budget
+        self.turn_token_budget = turn_token_budget
+        self.agent_token_budgets = agent_token_budgets or {}
+        self._receiver_auths: dict[str, PushNotificationReceiverAuth] = {}
         self.remote_agent_connections: dict[str, RemoteAgentConnections] = {}
         self.cards: dict[str, AgentCard] = {}
-        for address in remote_agent_addresses:
-            card_resolver = A2ACardResolver(address)
-            card = card_resolver.get_agent_card()
-            remote_connection = RemoteAgentConnections(card)
-            self.remote_agent_connections[card.name] = remote_connection
-            self.cards[card.name] = card
-        agent_info = []
-        for ra in self.list_remote_agents():
-            agent_info.append(json.dumps(ra))
-        self.agents = '\n'.join(agent_info)
+        self.skill_index = SkillIndex()
+        # Rendered agent lists keyed by (skill index version, query, active
+        # agent); entries of older versions simply age out.
+        self._prompt_cache: OrderedDict[tuple[int, str, str], str] = (
+            OrderedDict()
+        )
+        self.pending_addresses: set[str] = set(remote_agent_addresses)
+        self._resolvers = {
+            address: A2ACardResolver(address)
+            for address in remote_agent_addresses
+        }
+        # Name each resolved address registered under, to spot renames.
+        self._address_names: dict[str, str] = {}
+        self._retry_at: dict[str, float] = {}
+        self._retry_delay: dict[str, float] = {}
+        self._registry_lock = threading.Lock()
+        self._discovery_task: asyncio.Task | None = None
+        if remote_agent_addresses:
+            self._start_discovery()
+
+    def _start_discovery(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Typically constructed at import time (see agent.py), before
+            # the ADK runner's loop exists. Discovery then gets a loop of its
+            # own; the registry is only ever swapped wholesale, so readers on
+            # the runner's loop always see a consistent view.
+            threading.Thread(
+                target=asyncio.run,
+                args=(self._discovery_loop(),),
+                name='host-agent-discovery',
+                daemon=True,
+            ).start()
+        else:
+            self._discovery_task = loop.create_task(self._discovery_loop())
+
+    async def _discovery_loop(self):
+        next_refresh = time.monotonic() + self.refresh_interval
+        while True:
+            now = time.monotonic()
+            due = {
+                address
+                for address in self.pending_addresses
+                if self._retry_at.get(address, 0.0) <= now
+            }
+            if now >= next_refresh:
+                due.update(self._address_names)
+                next_refresh = now + self.refresh_interval
+            if due:
+                await asyncio.gather(
+                    *(self._resolve_address(address) for address in due)
+                )
+
+            wake_at = min(
+                [next_refresh]
+                + [self._retry_at[address] for address in self.pending_addresses]
+            )
+            await asyncio.sleep(max(0.0, wake_at - time.monotonic()))
+
+    async def _resolve_address(self, address: str):
+        try:
+            card = await asyncio.wait_for(
+                self._resolvers[address].get_agent_card_async(),
+                self.discovery_timeout,
+            )
+        except Exception as e:
+            if address in self._address_names:
+                # Keep using the card we have; the next refresh tries again.
+                logger.warning(f'Refreshing agent card for {address} failed: {e}')
+                return
+            delay = self._retry_delay.get(address, self.retry_interval)
+            self._retry_delay[address] = min(delay * 2, self.max_retry_interval)
+            self._retry_at[address] = time.monotonic() + delay
+            self.pending_addresses.add(address)
+            logger.warning(
+                f'Could not resolve agent card for {address} ({e!r}), '
+                f'retrying in {delay:.0f}s'
+            )
+            return
+
+        self.pending_addresses.discard(address)
+        self._retry_at.pop(address, None)
+        self._retry_delay.pop(address, None)
+        previous_name = self._address_names.get(address)
+        self._address_names[address] = card.name
+        self._register(card, replaces=previous_name)
 
     def register_agent_card(self, card: AgentCard):
-        remote_connection = RemoteAgentConnections(card)
-        self.remote_agent_connections[card.name] = remote_connection
-        self.cards[card.name] = card
-        agent_info = []
-        for ra in self.list_remote_agents():
-            agent_info.append(json.dumps(ra))
-        self.agents = '\n'.join(agent_info)
+        self._register(card)
+
+    def _register(self, card: AgentCard, replaces: str | None = None):
+        with self._registry_lock:
+            unchanged = (
+                replaces in (None, card.name)
+                and card.name in self.cards
+                and self.cards[card.name] == card
+            )
+            if unchanged:
+                return
+            # Build new mappings and swap them in, so concurrent readers
+            # never iterate a dict while it is being modified.
+            connections = dict(self.remote_agent_connections)
+            cards = dict(self.cards)
+            if replaces is not None and replaces != card.name:
+                connections.pop(replaces, None)
+                cards.pop(replaces, None)
+                self.skill_index.remove(replaces)
+            connection = connections.get(card.name)
+            if connection is not None and connection.card.url == card.url:
+                # Same endpoint: keep the pooled client and pending tasks.
+                connection.card = card
+            else:
+                connections[card.name] = RemoteAgentConnections(
+                    card, self.task_registry
+                )
+            cards[card.name] = card
+            self.remote_agent_connections = connections
+            self.cards = cards
+            self.skill_index.add(card)
+        logger.info(f'Registered remote agent {card.name} at {card.url}')
 
     def create_agent(self) -> Agent:
         return Agent(
@@ -70,11 +269,17 @@ class HostAgent:
             tools=[
                 self.list_remote_agents,
                 self.send_task,
+                self.send_tasks,
+                self.check_pending_task_states,
+                self.read_full_result,
             ],
         )
 
     def root_instruction(self, context: ReadonlyContext) -> str:
         current_agent = self.check_state(context)
+        agents = self.render_agents(
+            current_query(context), current_agent['active_agent']
+        )
         return f"""You are an expert delegator that can delegate the user request to the
 appropriate remote agents.
 
@@ -85,21 +290,68 @@ can use to delegate the task.
 Execution:
 - For actionable tasks, you can use `create_task` to assign tasks to remote agents to perform.
 Be sure to include the remote agent name when you respond to the user.
+- When a request needs several agents, use `send_tasks` to send all of their
+tasks at once instead of one after another.
 
 You can use `check_pending_task_states` to check the states of the pending
 tasks.
 
+Long agent responses are truncated. If you need the rest of one, use
+`read_full_result` with the artifact name given in the response.
+
 Please rely on tools to address the request, and don't make up the response. If you are not sure, please ask the user for more details.
 Focus on the most recent parts of the conversation primarily.
 
 If there is an active agent, send the request to that agent with the update task tool.
 
 Agents:
-{self.agents}
+{agents}
 
 Current agent: {current_agent['active_agent']}
 """
 
+    def render_agents(self, query: str, active_agent: str = 'None') -> str:
+        """Describes the remote agents most relevant to query for the prompt.
+
+        The active agent is always included. When the index is narrowed down,
+        a note points the model at list_remote_agents for the full list.
+        """
+        with self._registry_lock:
+            cards = self.cards
+            narrowed = len(cards) > self.prompt_top_k
+            # Queries that differ only in stopwords, case or punctuation
+            # select the same agents.
+            terms = ' '.join(sorted(set(tokenize(query)))) if narrowed else ''
+            key = (self.skill_index.version, terms, active_agent)
+            rendered = self._prompt_cache.get(key)
+            if rendered is not None:
+                self._prompt_cache.move_to_end(key)
+                return rendered
+
+            if not narrowed:
+                names = list(cards)
+            else:
+                names = self.skill_index.search(terms, self.prompt_top_k)
+                if active_agent in cards and active_agent not in names:
+                    names = [active_agent] + names[: self.prompt_top_k - 1]
+            lines = [
+                json.dumps(
+                    {'name': name, 'description': cards[name].description}
+                )
+                for name in names
+            ]
+            if len(names) < len(cards):
+                lines.append(
+                    f'({len(cards) - len(names)} more agent(s) available, '
+                    'use `list_remote_agents` to see all of them.)'
+                )
+            rendered = '\n'.join(lines)
+
+            self._prompt_cache[key] = rendered
+            if len(self._prompt_cache) > PROMPT_CACHE_SIZE:
+                self._prompt_cache.popitem(last=False)
+            return rendered
+
     def check_state(self, context: ReadonlyContext):
         state = context.state
         if (
@@ -150,17 +402,422 @@ Current agent: {current_agent['active_agent']}
         if agent_name not in self.remote_agent_connections:
             raise ValueError(f'Agent {agent_name} not found')
         state = tool_context.state
+        # A task in progress has to be continued where it was started.
+        if not any(
+            info['agent'] == agent_name
+            for info in state.get('outstanding_tasks', {}).values()
+        ):
+            agent_name = self.route(agent_name)
         state['agent'] = agent_name
         card = self.cards[agent_name]
         client = self.remote_agent_connections[agent_name]
         if not client:
             raise ValueError(f'Client not available for {agent_name}')
-        if 'task_id' in state:
-            taskId = state['task_id']
-        else:
-            taskId = str(uuid.uuid4())
+        request = self._build_request(
+            card, message, state, state.get('task_id', str(uuid.uuid4()))
+        )
+        with deadline_scope(turn_deadline(state)):
+            task = await client.send_task(
+                request, self.task_callback, self.agent_timeout(agent_name)
+            )
+        outstanding = dict(state.get('outstanding_tasks', {}))
+        update_outstanding(outstanding, agent_name, task)
+        state['outstanding_tasks'] = outstanding
+        # Assume completion unless a state returns that isn't complete
+        state['session_active'] = (
+            task.status.state not in TERMINAL_TASK_STATES
+        )
+        if task.status.state == TaskState.INPUT_REQUIRED:
+            # Force user input back
+            tool_context.actions.skip_summarization = True
+            tool_context.actions.escalate = True
+        elif task.status.state == TaskState.CANCELED:
+            # Open question, should we return some info for cancellation instead
+            raise ValueError(f'Agent {agent_name} task {task.id} is cancelled')
+        elif task.status.state == TaskState.FAILED:
+            # Raise error for failure
+            raise ValueError(f'Agent {agent_name} task {task.id} failed')
+        return await self.budgeted_response(agent_name, task, tool_context)
+
+    async def send_tasks(
+        self,
+        agent_names: list[str],
+        messages: list[str],
+        tool_context: ToolContext,
+    ):
+        """Sends tasks to several remote agents at the same time.
+
+        Use this instead of consecutive send_task calls when a request needs
+        independent contributions from more than one agent. Every agent gets
+        its own deadline; agents that miss it are reported as timed out
+        together with whatever they had produced so far.
+
+        Args:
+          agent_names: The names of the agents to send tasks to.
+          messages: The message for each agent, in the order of agent_names.
+          tool_context: The tool context this method runs in.
+
+        Returns:
+          One entry per agent in the order the results arrived, with the
+          agent name, task id, task state and response.
+        """
+        if len(agent_names) != len(messages):
+            raise ValueError('agent_names and messages must have equal length')
+        for agent_name in agent_names:
+            if agent_name not in self.remote_agent_connections:
+                raise ValueError(f'Agent {agent_name} not found')
+        state = tool_context.state
+        outstanding = dict(state.get('outstanding_tasks', {}))
+
+        runs = []
+        for agent_name, message in zip(agent_names, messages, strict=True):
+            task_id = next(
+                (
+                    task_id
+                    for task_id, info in outstanding.items()
+                    if info['agent'] == agent_name
+                    and info['state'] == TaskState.INPUT_REQUIRED
+                ),
+                None,
+            )
+            if task_id is None:
+                # Only new tasks can go to a peer; one waiting for input
+                # has to be answered by the agent that asked.
+                agent_name = self.route(agent_name)
+                task_id = str(uuid.uuid4())
+            request = self._build_request(
+                self.cards[agent_name], message, state, task_id
+            )
+            with deadline_scope(turn_deadline(state)):
+                # The task copies the context, and with it the deadline.
+                runs.append(
+                    asyncio.create_task(self._gather_task(agent_name, request))
+                )
+
+        results = []
+        for pending, run in enumerate(asyncio.as_completed(runs)):
+            agent_name, task, error = await run
+            if error and error != 'timeout':
+                outstanding.pop(task.id, None)
+            else:
+                update_outstanding(outstanding, agent_name, task)
+            result = {
+                'agent': agent_name,
+                'task_id': task.id,
+                'state': task.status.state,
+                # Results still to come get an equal share of the turn.
+                'response': await self.budgeted_response(
+                    agent_name, task, tool_context, share=len(runs) - pending
+                ),
+            }
+            if error == 'timeout':
+                result['state'] = 'timeout'
+            elif error:
+                result['state'] = 'error'
+                result['error'] = error
+            results.append(result)
+
+        state['outstanding_tasks'] = outstanding
+        state['session_active'] = bool(outstanding)
+        waiting = [
+            info['agent']
+            for info in outstanding.values()
+            if info['state'] == TaskState.INPUT_REQUIRED
+        ]
+        if len(waiting) == 1:
+            # Route the user's answer to the one agent that asked for it.
+            state['agent'] = waiting[0]
+        return results
+
+    async def check_pending_task_states(self, tool_context: ToolContext):
+        """Checks the states of all tasks still pending on remote agents.
+
+        Answers from what the remote agents already reported through their
+        streams and push notifications; only tasks that have been quiet for
+        a while are queried, all at once.
+
+        Args:
+          tool_context: The tool context this method runs in.
+
+        Returns:
+          One entry per task with the agent name, task id, state, seconds
+          since the last update and the response so far. Finished tasks are
+          reported once and then dropped from the pending list.
+        """
+        state = tool_context.state
+        outstanding = dict(state.get('outstanding_tasks', {}))
+        entries = self.task_registry.lookup(task_ids=list(outstanding))
+        await self.task_registry.refresh(
+            entries, self.remote_agent_connections
+        )
+        now = time.monotonic()
+        results = []
+        for reported, entry in enumerate(entries):
+            update_outstanding(outstanding, entry.agent_name, entry.task)
+            results.append(
+                {
+                    'agent': entry.agent_name,
+                    'task_id': entry.task.id,
+                    'state': entry.task.status.state,
+                    'seconds_since_update': round(now - entry.updated_at),
+                    'response': await self.budgeted_response(
+                        entry.agent_name,
+                        entry.task,
+                        tool_context,
+                        share=len(entries) - reported,
+                    ),
+                }
+            )
+        state['outstanding_tasks'] = outstanding
+        state['session_active'] = bool(outstanding)
+        return results
+
+    async def read_full_result(
+        self, artifact_name: str, start: int, tool_context: ToolContext
+    ):
+        """Reads more of an agent response that was truncated.
+
+        Args:
+          artifact_name: The artifact name given in the truncated response.
+          start: Character offset to continue from, 0 for the beginning.
+          tool_context: The tool context this method runs in.
+
+        Returns:
+          The content from start on, as much as the budget allows, and
+          next_start to continue from, or None once everything was read.
+          If the budget of this turn is used up, the status is
+          'budget_exhausted' and no content is returned.
+        """
+        artifact = await tool_context.load_artifact(artifact_name)
+        if artifact is None or artifact.text is None:
+            raise ValueError(f'No result named {artifact_name}')
+        budget = self._remaining_budget(self.result_token_budget, tool_context)
+        text = artifact.text
+        if budget == 0 and start < len(text):
+            return {
+                'status': 'budget_exhausted',
+                'error': (
+                    'The budget for agent results in this turn is used up. '
+                    'Answer with what you have, or continue reading from '
+                    'next_start in a later turn.'
+                ),
+                'next_start': start,
+                'total_characters': len(text),
+            }
+        end = len(text) if budget is None else start + budget * CHARS_PER_TOKEN
+        content = text[start:end]
+        self._charge(tool_context, estimate_tokens(content))
+        return {
+            'status': 'ok',
+            'content': content,
+            'next_start': end if end < len(text) else None,
+            'total_characters': len(text),
+        }
+
+    async def budgeted_response(
+        self,
+        agent_name: str,
+        task: Task,
+        tool_context: ToolContext,
+        share: int = 1,
+    ) -> list:
+        """task_response, cut to the agent's share of the token budgets.
+
+        Text and data beyond the budget are replaced by a note pointing to
+        an artifact with the full text. References to file artifacts are
+        always kept.
+
+        Args:
+          agent_name: The agent that produced task.
+          task: The task to report.
+          tool_context: The tool context this method runs in.
+          share: Number of results, this one included, still to be reported
+            in this turn; each gets an equal part of what is left.
+        """
+        response = await task_response(task, tool_context)
+        budget = self._remaining_budget(
+            self.agent_token_budgets.get(agent_name, self.result_token_budget),
+            tool_context,
+            share,
+        )
+        content = [item for item in response if not isinstance(item, DataPart)]
+        text = '\n\n'.join(
+            item if isinstance(item, str) else json.dumps(item, default=str)
+            for item in content
+        )
+        tokens = estimate_tokens(text)
+        if budget is None or tokens <= budget:
+            self._charge(tool_context, tokens)
+            return response
+
+        artifact_name = f'{agent_name}-{task.id}-result.txt'
+        await tool_context.save_artifact(artifact_name, types.Part(text=text))
+        shown = text[: budget * CHARS_PER_TOKEN]
+        self._charge(tool_context, budget)
+        logger.info(
+            f'Truncated result of {agent_name} task {task.id} from {tokens} '
+            f'to {budget} tokens'
+        )
+        return [
+            shown,
+            {
+                'truncated': True,
+                'shown_tokens': budget,
+                'total_tokens': tokens,
+                'full_result_artifact': artifact_name,
+                'next_start': len(shown),
+            },
+            *(item for item in response if isinstance(item, DataPart)),
+        ]
+
+    def _remaining_budget(
+        self, budget: int | None, tool_context: ToolContext, share: int = 1
+    ) -> int | None:
+        if self.turn_token_budget is None:
+            return budget
+        left = max(0, self.turn_token_budget - self._turn_usage(tool_context))
+        left //= max(1, share)
+        return left if budget is None else min(budget, left)
+
+    def _turn_usage(self, tool_context: ToolContext) -> int:
+        usage = tool_context.state.get('result_tokens')
+        if not usage or usage['invocation_id'] != tool_context.invocation_id:
+            return 0
+        return usage['used']
+
+    def _charge(self, tool_context: ToolContext, tokens: int):
+        tool_context.state['result_tokens'] = {
+            'invocation_id': tool_context.invocation_id,
+            'used': self._turn_usage(tool_context) + tokens,
+        }
+
+    async def handle_push_notification(self, request: Request) -> Response:
+        """Records a push notification sent by a remote agent."""
+        body = await request.body()
+        data = json.loads(body)
+        entry = self.task_registry.tasks.get(data.get('id'))
+        connection = (
+            self.remote_agent_connections.get(entry.agent_name)
+            if entry is not None
+            else None
+        )
+        if connection is None:
+            logger.warning(
+                f'Push notification for unknown task {data.get("id")}'
+            )
+            return Response(status_code=404)
+        try:
+            receiver_auth = await self._receiver_auth(connection.card)
+            verified = await receiver_auth.verify_push_notification(
+                request, body
+            )
+        except Exception as e:
+            logger.warning(f'Error verifying push notification: {e}')
+            verified = False
+        if not verified:
+            return Response(status_code=401)
+        try:
+            task = Task(**data)
+        except ValidationError as e:
+            logger.warning(f'Invalid push notification: {e}')
+            return Response(status_code=400)
+        connection.track(task, source='push')
+        return Response(status_code=200)
+
+    async def handle_push_notification_validation(
+        self, request: Request
+    ) -> Response:
+        """Answers the ownership check remote agents make before pushing."""
+        validation_token = request.query_params.get('validationToken')
+        if not validation_token:
+            return Response(status_code=400)
+        return Response(content=validation_token, status_code=200)
+
+    async def _receiver_auth(
+        self, card: AgentCard
+    ) -> PushNotificationReceiverAuth:
+        receiver_auth = self._receiver_auths.get(card.name)
+        if receiver_auth is None:
+            receiver_auth = PushNotificationReceiverAuth()
+            await receiver_auth.load_jwks(
+                f'{card.url.rstrip("/")}/.well-known/jwks.json'
+            )
+            self._receiver_auths[card.name] = receiver_auth
+        return receiver_auth
+
+    async def _gather_task(
+        self, agent_name: str, request: TaskSendParams
+    ) -> tuple[str, Task, str | None]:
+        collector = _TaskCollector(request, self.task_callback)
+        client = self.remote_agent_connections[agent_name]
+        try:
+            await client.send_task(
+                request, collector, self.agent_timeout(agent_name)
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                f'Agent {agent_name} missed its deadline for task {request.id}'
+            )
+            return agent_name, collector.task, 'timeout'
+        except Exception as e:
+            logger.error(f'Agent {agent_name} task {request.id} failed: {e}')
+            return agent_name, collector.task, str(e)
+        return agent_name, collector.task, None
+
+    def agent_timeout(self, agent_name: str) -> float:
+        """Seconds a delegated task to agent_name may take.
+
+        Derived from the agent's observed p99 latency once enough calls have
+        been made, and never longer than task_timeout.
+        """
+        connection = self.remote_agent_connections[agent_name]
+        return connection.health.timeout(self.task_timeout)
+
+    def route(self, agent_name: str) -> str:
+        """Picks the agent to delegate to in place of agent_name.
+
+        If another agent advertises one of the same skills and is clearly
+        healthier (see AgentHealth.score), it is used instead. An agent with
+        an open circuit breaker is always avoided when a peer is available.
+        Agents not called yet are assumed to be as healthy as the average
+        of the others.
+        """
+        connections = self.remote_agent_connections
+        known = [
+            connection.health.score()
+            for connection in connections.values()
+            if connection.health.calls and connection.health.available
+        ]
+        prior = sum(known) / len(known) if known else 0.0
+        skills = {skill.id for skill in self.cards[agent_name].skills or []}
+        requested_score = connections[agent_name].health.score(prior)
+        best_name, best_score = agent_name, math.inf
+        for name, connection in connections.items():
+            if name == agent_name or not skills & {
+                skill.id for skill in connection.card.skills or []
+            }:
+                continue
+            score = connection.health.score(prior)
+            if score < best_score:
+                best_name, best_score = name, score
+        if best_score * REROUTE_MARGIN < requested_score:
+            logger.info(
+                f'Routing task for {agent_name} to healthier peer {best_name}'
+            )
+            return best_name
+        return agent_name
+
+    def agent_health(self) -> dict[str, dict]:
+        """Latency, error rate and circuit state of every remote agent."""
+        return {
+            name: connection.health.snapshot()
+            for name, connection in self.remote_agent_connections.items()
+        }
+
+    def _build_request(
+        self, card: AgentCard, message: str, state, task_id: str
+    ) -> TaskSendParams:
         sessionId = state['session_id']
-        task: Task
         messageId = ''
         metadata = {}
         if 'input_message_metadata' in state:
@@ -170,8 +827,14 @@ Current agent: {current_agent['active_agent']}
         if not messageId:
             messageId = str(uuid.uuid4())
         metadata.update(conversation_id=sessionId, message_id=messageId)
-        request: TaskSendParams = TaskSendParams(
-            id=taskId,
+        pushNotification = None
+        if self.push_notification_url and card.capabilities.pushNotifications:
+            pushNotification = PushNotificationConfig(
+                url=self.push_notification_url,
+                authentication=AuthenticationInfo(schemes=['bearer']),
+            )
+        return TaskSendParams(
+            id=task_id,
             sessionId=sessionId,
             message=Message(
                 role='user',
@@ -179,47 +842,87 @@ Current agent: {current_agent['active_agent']}
                 metadata=metadata,
             ),
             acceptedOutputModes=['text', 'text/plain', 'image/png'],
-            # pushNotification=None,
+            pushNotification=pushNotification,
             metadata={'conversation_id': sessionId},
         )
-        task = await client.send_task(request, self.task_callback)
-        # Assume completion unless a state returns that isn't complete
-        state['session_active'] = task.status.state not in [
-            TaskState.COMPLETED,
-            TaskState.CANCELED,
-            TaskState.FAILED,
-            TaskState.UNKNOWN,
-        ]
-        if task.status.state == TaskState.INPUT_REQUIRED:
-            # Force user input back
-            tool_context.actions.skip_summarization = True
-            tool_context.actions.escalate = True
-        elif task.status.state == TaskState.CANCELED:
-            # Open question, should we return some info for cancellation instead
-            raise ValueError(f'Agent {agent_name} task {task.id} is cancelled')
-        elif task.status.state == TaskState.FAILED:
-            # Raise error for failure
-            raise ValueError(f'Agent {agent_name} task {task.id} failed')
-        response = []
-        if task.status.message:
-            # Assume the information is in the task message.
-            response.extend(
-                convert_parts(task.status.message.parts, tool_context)
-            )
-        if task.artifacts:
-            for artifact in task.artifacts:
-                response.extend(convert_parts(artifact.parts, tool_context))
-        return response
 
 
-def convert_parts(parts: list[Part], tool_context: ToolContext):
+class _TaskCollector:
+    """Task callback that keeps the latest known state of one remote task.
+
+    Lets send_tasks report partial results for agents that time out, and
+    forwards every update to the host's own task callback.
+    """
+
+    def __init__(
+        self, request: TaskSendParams, forward: TaskUpdateCallback | None
+    ):
+        self.forward = forward
+        self.task = Task(
+            id=request.id,
+            sessionId=request.sessionId,
+            status=TaskStatus(state=TaskState.SUBMITTED),
+            history=[request.message],
+        )
+
+    def __call__(self, update: TaskCallbackArg, card: AgentCard) -> Task:
+        self.task = merge_task_update(self.task, update)
+        if self.forward:
+            self.forward(update, card)
+        return self.task
+
+
+def update_outstanding(
+    outstanding: dict[str, dict[str, str]], agent_name: str, task: Task
+):
+    """Keeps unfinished tasks in a session's outstanding_tasks mapping."""
+    if task.status.state in TERMINAL_TASK_STATES:
+        outstanding.pop(task.id, None)
+    else:
+        outstanding[task.id] = {
+            'agent': agent_name,
+            'state': task.status.state,
+        }
+
+
+async def task_response(task: Task, tool_context: ToolContext) -> list:
+    response = []
+    if task.status.message:
+        # Assume the information is in the task message.
+        response.extend(
+            await convert_parts(task.status.message.parts, tool_context)
+        )
+    if task.artifacts:
+        for artifact in task.artifacts:
+            response.extend(await convert_parts(artifact.parts, tool_context))
+    return response
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def turn_deadline(state) -> float | None:
+    """Deadline the client attached to the current user message, if any."""
+    return parse_deadline(metadata=state.get('input_message_metadata'))
+
+
+def current_query(context: ReadonlyContext) -> str:
+    """Text of the user message that started the current turn."""
+    content = context.user_content
+    if not content or not content.parts:
+        return ''
+    return ' '.join(part.text for part in content.parts if part.text)
+
+
+async def convert_parts(parts: list[Part], tool_context: ToolContext):
     rval = []
     for p in parts:
-        rval.append(convert_part(p, tool_context))
+        rval.append(await convert_part(p, tool_context))
     return rval
 
 
-def convert_part(part: Part, tool_context: ToolContext):
+async def convert_part(part: Part, tool_context: ToolContext):
     if part.type == 'text':
         return part.text
     if part.type == 'data':
@@ -228,13 +931,21 @@ def convert_part(part: Part, tool_context: ToolContext):
         # Repackage A2A FilePart to google.genai Blob
         # Currently not considering plain text as files
         file_id = part.file.name
-        file_bytes = base64.b64decode(part.file.bytes)
-        file_part = types.Part(
-            inline_data=types.Blob(
-                mime_type=part.file.mimeType, data=file_bytes
+        if part.file.uri:
+            # Already stored by the remote agent, e.g. in its blob store.
+            file_part = types.Part(
+                file_data=types.FileData(
+                    mime_type=part.file.mimeType, file_uri=part.file.uri
+                )
             )
-        )
-        tool_context.save_artifact(file_id, file_part)
+        else:
+            file_part = types.Part(
+                inline_data=types.Blob(
+                    mime_type=part.file.mimeType,
+                    data=decode_file_bytes(part.file.bytes),
+                )
+            )
+        await tool_context.save_artifact(file_id, file_part)
         tool_context.actions.skip_summarization = True
         tool_context.actions.escalate = True
         return DataPart(data={'artifact-file-id': file_id})
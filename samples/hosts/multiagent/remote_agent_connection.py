@@ -1,3 +1,5 @@
+import asyncio
+import time
 import uuid
 
 from collections.abc import Callable
@@ -12,6 +14,14 @@ from common.types import (
     TaskStatus,
     TaskStatusUpdateEvent,
 )
+from common.utils.deadline import (
+    DeadlineExceededError,
+    deadline_scope,
+    remaining_timeout,
+)
+
+from .agent_health import AgentHealth
+from .task_registry import TERMINAL_TASK_STATES, PendingTaskRegistry
 
 
 TaskCallbackArg = Task | TaskStatusUpdateEvent | TaskArtifactUpdateEvent
@@ -21,9 +31,16 @@ TaskUpdateCallback = Callable[[TaskCallbackArg, AgentCard], Task]
 class RemoteAgentConnections:
     """A class to hold the connections to the remote agents."""
 
-    def __init__(self, agent_card: AgentCard):
+    def __init__(
+        self,
+        agent_card: AgentCard,
+        task_registry: PendingTaskRegistry | None = None,
+        health: AgentHealth | None = None,
+    ):
         self.agent_client = A2AClient(agent_card)
         self.card = agent_card
+        self.task_registry = task_registry
+        self.health = health or AgentHealth()
 
         self.conversation_name = None
         self.conversation = None
@@ -32,11 +49,94 @@ class RemoteAgentConnections:
     def get_agent(self) -> AgentCard:
         return self.card
 
+    def track(
+        self,
+        update: TaskCallbackArg,
+        session_id: str | None = None,
+        source: str = 'stream',
+    ):
+        """Records a task or task event of this agent.
+
+        Keeps pending_tasks to the ids of unfinished tasks and forwards the
+        update to the task registry.
+        """
+        status = getattr(update, 'status', None)
+        if status is not None:
+            if status.state in TERMINAL_TASK_STATES:
+                self.pending_tasks.discard(update.id)
+            else:
+                self.pending_tasks.add(update.id)
+        if self.task_registry is not None:
+            self.task_registry.record(
+                self.card.name, update, session_id, source
+            )
+
     async def send_task(
         self,
         request: TaskSendParams,
         task_callback: TaskUpdateCallback | None,
+        timeout: float | None = None,
+    ) -> Task | None:
+        """Sends a task and records the outcome in self.health.
+
+        The timeout is shortened to the enclosing deadline, if any, and sent
+        along as the remote agent's deadline.
+
+        Raises:
+            AgentUnavailableError: The agent's circuit breaker is open.
+            DeadlineExceededError: The enclosing deadline ran out first.
+            asyncio.TimeoutError: No final result within timeout seconds.
+        """
+        effective_timeout = remaining_timeout(timeout)
+        # A timeout imposed by the caller's deadline says nothing about the
+        # agent's health.
+        caller_bound = effective_timeout is not None and (
+            timeout is None or effective_timeout < timeout
+        )
+        self.health.acquire()
+        started = time.monotonic()
+        try:
+            with deadline_scope(
+                time.time() + effective_timeout
+                if effective_timeout is not None
+                else None
+            ):
+                task = await asyncio.wait_for(
+                    self._send_task(request, task_callback), effective_timeout
+                )
+        except (asyncio.CancelledError, DeadlineExceededError):
+            self.health.record_cancelled()
+            raise
+        except asyncio.TimeoutError as e:
+            if caller_bound:
+                self.health.record_cancelled()
+                raise DeadlineExceededError(
+                    f'Deadline exceeded waiting for {self.card.name}'
+                ) from e
+            self.health.record_failure(time.monotonic() - started)
+            raise
+        except Exception:
+            self.health.record_failure(time.monotonic() - started)
+            raise
+        self.health.record_success(time.monotonic() - started)
+        return task
+
+    async def _send_task(
+        self,
+        request: TaskSendParams,
+        task_callback: TaskUpdateCallback | None,
     ) -> Task | None:
+        # Record the task up front so it can be queried even if no response
+        # ever arrives.
+        self.track(
+            Task(
+                id=request.id,
+                sessionId=request.sessionId,
+                status=TaskStatus(state=TaskState.SUBMITTED),
+            ),
+            request.sessionId,
+            source='send',
+        )
         if self.card.capabilities.streaming:
             task = None
             if task_callback:
@@ -72,6 +172,7 @@ class RemoteAgentConnections:
                     if 'message_id' in m.metadata:
                         m.metadata['last_message_id'] = m.metadata['message_id']
                     m.metadata['message_id'] = str(uuid.uuid4())
+                self.track(response.result, request.sessionId)
                 if task_callback:
                     task = task_callback(response.result, self.card)
                 if hasattr(response.result, 'final') and response.result.final:
@@ -95,6 +196,7 @@ class RemoteAgentConnections:
                 m.metadata['last_message_id'] = m.metadata['message_id']
             m.metadata['message_id'] = str(uuid.uuid4())
 
+        self.track(response.result, request.sessionId)
         if task_callback:
             task_callback(response.result, self.card)
         return response.result
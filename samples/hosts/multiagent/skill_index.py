@@ -0,0 +1,121 @@
+import math
+import re
+
+from collections import Counter
+
+from common.types import AgentCard
+
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = frozenset(
+    'a an and are as at be by can do for from how i in is it me my of on or '
+    'please the to what with you your'.split()
+)
+
+
+def tokenize(text: str | None) -> list[str]:
+    if not text:
+        return []
+    return [
+        token
+        for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in STOPWORDS
+    ]
+
+
+class SkillIndex:
+    """BM25 index over the agent cards known to the host.
+
+    Every card is indexed as one document made of its name, description and
+    the names, descriptions, tags and examples of its skills. Names and tags
+    are weighted higher than free text since they are short and specific.
+    """
+
+    def __init__(
+        self, k1: float = 1.2, b: float = 0.75, field_weight: int = 2
+    ):
+        self.k1 = k1
+        self.b = b
+        self.field_weight = field_weight
+        self.version = 0
+        self._term_frequencies: dict[str, Counter] = {}
+        self._document_frequencies: Counter = Counter()
+        self._lengths: dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, card: AgentCard):
+        """Index a card, replacing any earlier card with the same name."""
+        self.remove(card.name)
+        terms = Counter(self._card_terms(card))
+        self._term_frequencies[card.name] = terms
+        self._document_frequencies.update(terms.keys())
+        length = sum(terms.values())
+        self._lengths[card.name] = length
+        self._total_length += length
+        self.version += 1
+
+    def remove(self, name: str):
+        terms = self._term_frequencies.pop(name, None)
+        if terms is None:
+            return
+        for term in terms:
+            self._document_frequencies[term] -= 1
+            if not self._document_frequencies[term]:
+                del self._document_frequencies[term]
+        self._total_length -= self._lengths.pop(name)
+        self.version += 1
+
+    def search(self, query: str | None, top_k: int) -> list[str]:
+        """Returns the names of the top_k cards most relevant to query.
+
+        Cards that share no term with the query are left out, so the result
+        can be shorter than top_k or empty.
+        """
+        query_terms = set(tokenize(query))
+        if not query_terms or not self._lengths:
+            return []
+        count = len(self._lengths)
+        average_length = self._total_length / count or 1.0
+        idf = {
+            term: math.log(
+                1
+                + (count - self._document_frequencies[term] + 0.5)
+                / (self._document_frequencies[term] + 0.5)
+            )
+            for term in query_terms
+            if self._document_frequencies[term]
+        }
+        scores = {}
+        for name, terms in self._term_frequencies.items():
+            score = 0.0
+            norm = self.k1 * (
+                1 - self.b + self.b * self._lengths[name] / average_length
+            )
+            for term, weight in idf.items():
+                frequency = terms.get(term)
+                if frequency:
+                    score += (
+                        weight * frequency * (self.k1 + 1) / (frequency + norm)
+                    )
+            if score > 0:
+                scores[name] = score
+        return sorted(scores, key=lambda name: (-scores[name], name))[:top_k]
+
+    def _card_terms(self, card: AgentCard) -> list[str]:
+        weighted = [card.name]
+        text = [card.description]
+        for skill in card.skills or []:
+            weighted.append(skill.name)
+            weighted.extend(skill.tags or [])
+            text.append(skill.description)
+            text.extend(skill.examples or [])
+        terms = []
+        for field in weighted:
+            terms.extend(tokenize(field) * self.field_weight)
+        for field in text:
+            terms.extend(tokenize(field))
+        return terms
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import time
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from common.types import (
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+)
+
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_TASK_STATES = (
+    TaskState.COMPLETED,
+    TaskState.CANCELED,
+    TaskState.FAILED,
+    TaskState.UNKNOWN,
+)
+
+
+def merge_task_update(
+    task: Task, update: Task | TaskStatusUpdateEvent | TaskArtifactUpdateEvent
+) -> Task:
+    """Applies a task, status update or artifact update to task."""
+    if isinstance(update, Task):
+        return update
+    if isinstance(update, TaskStatusUpdateEvent):
+        task.status = update.status
+    elif isinstance(update, TaskArtifactUpdateEvent):
+        task.artifacts = [*(task.artifacts or []), update.artifact]
+    return task
+
+
+@dataclass
+class PendingTask:
+    agent_name: str
+    task: Task
+    source: str
+    updated_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def done(self) -> bool:
+        return self.task.status.state in TERMINAL_TASK_STATES
+
+
+class PendingTaskRegistry:
+    """Latest known state of every task delegated to a remote agent.
+
+    The registry is fed passively: streaming events and send results are
+    recorded as they pass through RemoteAgentConnections, and push
+    notifications are recorded when the remote agent delivers them. Only
+    tasks nobody has heard about for stale_after seconds are queried with
+    tasks/get, concurrently and at most once at a time per task.
+    """
+
+    def __init__(
+        self,
+        stale_after: float = 30.0,
+        retention: float = 3600.0,
+        max_concurrent_queries: int = 8,
+    ):
+        """Initialize the registry.
+
+        Args:
+            stale_after: Seconds after which the recorded state of an
+                unfinished task is refreshed from the remote agent.
+            retention: Seconds finished tasks are kept for reporting.
+            max_concurrent_queries: Maximum number of tasks/get requests
+                in flight during a refresh.
+        """
+        self.stale_after = stale_after
+        self.retention = retention
+        self.max_concurrent_queries = max_concurrent_queries
+        self.tasks: dict[str, PendingTask] = {}
+        self._queries: dict[str, asyncio.Future] = {}
+        self._next_prune = 0.0
+
+    def record(
+        self,
+        agent_name: str,
+        update: Task | TaskStatusUpdateEvent | TaskArtifactUpdateEvent,
+        session_id: str | None = None,
+        source: str = 'stream',
+    ) -> PendingTask:
+        """Records a task or task event received from agent_name."""
+        entry = self.tasks.get(update.id)
+        if entry is None:
+            # Events can arrive before the task itself, e.g. on a stream.
+            task = merge_task_update(
+                Task(
+                    id=update.id,
+                    sessionId=session_id,
+                    status=TaskStatus(state=TaskState.WORKING),
+                ),
+                update,
+            )
+            entry = PendingTask(agent_name=agent_name, task=task, source=source)
+            self.tasks[update.id] = entry
+        else:
+            entry.task = merge_task_update(entry.task, update)
+            entry.agent_name = agent_name
+            entry.source = source
+            entry.updated_at = time.monotonic()
+        if entry.task.sessionId is None:
+            entry.task.sessionId = session_id
+        self._prune()
+        return entry
+
+    def lookup(
+        self, task_ids: list[str] | None = None, session_id: str | None = None
+    ) -> list[PendingTask]:
+        """Returns the recorded tasks with the given ids or session."""
+        if task_ids is not None:
+            entries = [self.tasks[i] for i in task_ids if i in self.tasks]
+        else:
+            entries = list(self.tasks.values())
+        if session_id is not None:
+            entries = [e for e in entries if e.task.sessionId == session_id]
+        return entries
+
+    async def refresh(
+        self, entries: list[PendingTask], connections: dict[str, Any]
+    ) -> None:
+        """Queries the remote agents for unfinished, stale entries.
+
+        Args:
+            entries: Candidates, typically the result of lookup().
+            connections: RemoteAgentConnections by agent name.
+        """
+        now = time.monotonic()
+        stale = [
+            entry
+            for entry in entries
+            if not entry.done
+            and now - entry.updated_at >= self.stale_after
+            and entry.agent_name in connections
+        ]
+        if not stale:
+            return
+        semaphore = asyncio.Semaphore(self.max_concurrent_queries)
+        await asyncio.gather(
+            *(
+                self._query(entry, connections[entry.agent_name], semaphore)
+                for entry in stale
+            )
+        )
+
+    async def _query(self, entry: PendingTask, connection, semaphore):
+        task_id = entry.task.id
+        query = self._queries.get(task_id)
+        if query is not None:
+            # Another caller is already asking about this task.
+            await asyncio.shield(query)
+            return
+        query = asyncio.get_running_loop().create_future()
+        self._queries[task_id] = query
+        try:
+            async with semaphore:
+                response = await connection.agent_client.get_task(
+                    {'id': task_id, 'historyLength': 0}
+                )
+            if response.result is not None:
+                connection.track(response.result, source='poll')
+        except Exception as e:
+            logger.warning(
+                f'Could not query task {task_id} on {entry.agent_name}: {e}'
+            )
+        finally:
+            del self._queries[task_id]
+            query.set_result(None)
+
+    def _prune(self):
+        now = time.monotonic()
+        if now < self._next_prune:
+            return
+        self._next_prune = now + min(self.retention, 60.0)
+        cutoff = now - self.retention
+        expired = [
+            task_id
+            for task_id, entry in self.tasks.items()
+            if entry.done and entry.updated_at < cutoff
+        ]
+        for task_id in expired:
+            del self.tasks[task_id]
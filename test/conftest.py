@@ -0,0 +1,11 @@
+import os
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The function app imports the samples as samples.common...; the hosts
+# import them as common... with samples/ on the path.
+for path in (ROOT, os.path.join(ROOT, 'samples')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
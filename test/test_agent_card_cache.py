@@ -0,0 +1,89 @@
+import asyncio
+import importlib
+import json
+
+import pytest
+
+
+def test_function_allows_stale_while_revalidate(monkeypatch):
+    pytest.importorskip('azure.functions')
+    import azure.functions as func
+
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    agent_card = importlib.import_module('AgentCard')
+    url = 'http://agent/api/.well-known/agent-card.json'
+
+    response = asyncio.run(
+        agent_card.main(func.HttpRequest('GET', url, body=b''))
+    )
+    assert response.status_code == 200
+    assert json.loads(response.get_body())['url'] == 'http://agent/api/v1'
+    assert 'stale-while-revalidate=3600' in response.headers['Cache-Control']
+
+    revalidated = asyncio.run(
+        agent_card.main(
+            func.HttpRequest(
+                'GET',
+                url,
+                body=b'',
+                headers={'If-None-Match': response.headers['ETag']},
+            )
+        )
+    )
+    assert revalidated.status_code == 304
+
+
+def test_resolver_serves_stale_card_while_refreshing(monkeypatch):
+    httpx = pytest.importorskip('httpx')
+    # Both still speak the pre-v1 types; skip where they are unavailable.
+    card_resolver = pytest.importorskip(
+        'common.client.card_resolver', exc_type=ImportError
+    )
+    server = pytest.importorskip(
+        'samples.common.server.server', exc_type=ImportError
+    )
+    from samples.common.types import AgentCapabilities, AgentCard
+
+    card = AgentCard(
+        name='remote',
+        url='http://swr-agent/',
+        version='1.0',
+        capabilities=AgentCapabilities(),
+        skills=[],
+    )
+    app = server.A2AServer(agent_card=card, task_manager=object()).app
+    requests = []
+
+    async def record(request):
+        requests.append(request.headers.get('If-None-Match'))
+
+    now = [1000.0]
+    monkeypatch.setattr(card_resolver.time, 'time', lambda: now[0])
+
+    async def run():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            event_hooks={'request': [record]},
+        ) as client:
+            resolver = card_resolver.A2ACardResolver(
+                'http://swr-agent', httpx_client=client
+            )
+            assert (await resolver.get_agent_card_async()).name == 'remote'
+
+            # Past max-age but within stale-while-revalidate: the cached
+            # card comes back at once and is revalidated in the background.
+            now[0] += server.AGENT_CARD_MAX_AGE + 1
+            assert (await resolver.get_agent_card_async()).name == 'remote'
+            assert len(requests) == 1
+            await asyncio.gather(
+                *card_resolver.A2ACardResolver._refreshes[
+                    asyncio.get_running_loop()
+                ].values()
+            )
+            assert len(requests) == 2 and requests[1] is not None
+
+            # The 304 renewed the card, so it is fresh again.
+            assert (await resolver.get_agent_card_async()).name == 'remote'
+            assert len(requests) == 2
+
+    asyncio.run(run())
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from samples.common.utils.deadline import (
+    DeadlineExceededError,
+    caused_by_deadline,
+    deadline_errors,
+    deadline_scope,
+    shorten_request_timeout,
+)
+
+
+def test_wrapped_deadline_errors_are_unwrapped():
+    try:
+        try:
+            raise DeadlineExceededError('Request deadline exceeded')
+        except DeadlineExceededError as e:
+            raise RuntimeError('connection error') from e
+    except RuntimeError as e:
+        wrapped = e
+    assert caused_by_deadline(wrapped)
+    assert not caused_by_deadline(RuntimeError('connection error'))
+
+    with pytest.raises(DeadlineExceededError) as raised:
+        with deadline_errors():
+            raise wrapped
+    assert raised.value.__cause__ is wrapped
+
+    with pytest.raises(ValueError):
+        with deadline_errors():
+            raise ValueError('unrelated')
+
+
+def test_deadline_passing_inside_the_openai_sdk():
+    openai = pytest.importorskip('openai')
+
+    async def slow_failure(request):
+        await asyncio.sleep(0.2)
+        return httpx.Response(500, json={'error': {'message': 'busy'}})
+
+    async def run():
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(slow_failure),
+            event_hooks={'request': [shorten_request_timeout]},
+        ) as http_client:
+            client = openai.AsyncOpenAI(
+                api_key='test',
+                base_url='http://llm/v1',
+                max_retries=1,
+                http_client=http_client,
+            )
+            with deadline_scope(time.time() + 0.1):
+                # The SDK retries after the deadline passed. Depending on
+                # its version, the hook's error comes back as it is or
+                # wrapped in an APIConnectionError.
+                with deadline_errors():
+                    await client.chat.completions.create(
+                        model='test',
+                        messages=[{'role': 'user', 'content': 'hi'}],
+                    )
+
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(run())
@@ -0,0 +1,22 @@
+import base64
+import binascii
+import os
+
+import pytest
+
+from samples.common.utils import file_parts
+
+
+@pytest.mark.parametrize('threshold', [file_parts.SPILL_THRESHOLD, 16])
+def test_decode_file_bytes(monkeypatch, threshold):
+    monkeypatch.setattr(file_parts, 'SPILL_THRESHOLD', threshold)
+    content = os.urandom(1000)
+    encoded = base64.encodebytes(content).decode()
+
+    assert file_parts.decode_file_bytes(encoded) == content
+
+
+def test_invalid_data_leaves_no_file_behind(tmp_path):
+    with pytest.raises(binascii.Error):
+        file_parts.decode_base64_to_file('abc', directory=str(tmp_path))
+    assert not list(tmp_path.iterdir())
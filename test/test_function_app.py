@@ -0,0 +1,72 @@
+import asyncio
+import importlib
+import json
+
+import pytest
+
+
+pytest.importorskip('azure.functions')
+pytest.importorskip('semantic_kernel')
+
+
+@pytest.fixture(autouse=True)
+def openai_api_key(monkeypatch):
+    # The travel agent is created at import time and insists on a key.
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+
+
+@pytest.mark.parametrize('module', ['AgentCard', 'HttpTrigger', 'Jwks'])
+def test_function_imports(module):
+    importlib.import_module(module)
+
+
+def test_jwks_serves_the_signing_key():
+    http_trigger = importlib.import_module('HttpTrigger')
+    jwks = importlib.import_module('Jwks')
+
+    response = asyncio.run(jwks.main(None))
+
+    keys = json.loads(response.get_body())['keys']
+    assert [key['kid'] for key in keys] == [
+        http_trigger.notification_sender_auth.private_key_jwk.key_id
+    ]
+
+
+def test_deadline_passing_inside_the_sdk_maps_to_504(monkeypatch):
+    from azure import functions as func
+    from samples.common.utils.deadline import DeadlineExceededError
+
+    http_trigger = importlib.import_module('HttpTrigger')
+
+    async def invoke_stream(*args, **kwargs):
+        # What an SDK makes of the error shorten_request_timeout raises.
+        try:
+            raise DeadlineExceededError('Request deadline exceeded')
+        except DeadlineExceededError as e:
+            raise RuntimeError('Connection error.') from e
+        yield
+
+    monkeypatch.setattr(
+        type(http_trigger.travel_agent.agent), 'invoke_stream', invoke_stream
+    )
+    body = {
+        'jsonrpc': '2.0',
+        'id': 1,
+        'method': 'SendStreamingMessage',
+        'params': [
+            {
+                'message': {
+                    'role': 'user',
+                    'messageId': 'message',
+                    'parts': [{'text': 'Plan a trip'}],
+                }
+            }
+        ],
+    }
+    request = func.HttpRequest(
+        'POST', 'http://agent/api/v1', body=json.dumps(body).encode()
+    )
+
+    response = asyncio.run(http_trigger.main(request))
+
+    assert response.status_code == 504
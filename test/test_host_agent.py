@@ -0,0 +1,154 @@
+import asyncio
+import base64
+import types
+
+import pytest
+
+
+pytest.importorskip('google.adk')
+# The host still speaks the pre-v1 types; skip where they are unavailable.
+host_agent = pytest.importorskip(
+    'hosts.multiagent.host_agent', exc_type=ImportError
+)
+
+import httpx
+
+from common.types import (
+    FileContent,
+    FilePart,
+    Message,
+    Task,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+from google.adk import Agent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.artifacts import InMemoryArtifactService
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools.tool_context import ToolContext
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+
+async def make_tool_context() -> ToolContext:
+    session_service = InMemorySessionService()
+    session = await session_service.create_session(
+        app_name='host', user_id='user'
+    )
+    return ToolContext(
+        InvocationContext(
+            artifact_service=InMemoryArtifactService(),
+            session_service=session_service,
+            invocation_id='invocation',
+            agent=Agent(name='host'),
+            session=session,
+        )
+    )
+
+
+def completed_task(text: str) -> Task:
+    return Task(
+        id='task',
+        sessionId='session',
+        status=TaskStatus(
+            state=TaskState.COMPLETED,
+            message=Message(role='agent', parts=[TextPart(text=text)]),
+        ),
+    )
+
+
+def test_truncated_result_is_saved_and_read_back():
+    async def run():
+        tool_context = await make_tool_context()
+        host = host_agent.HostAgent(
+            [], result_token_budget=5, turn_token_budget=None
+        )
+        text = 'abcdefghij' * 10
+
+        response = await host.budgeted_response(
+            'remote', completed_task(text), tool_context
+        )
+        shown, note = response
+        assert shown == text[: 5 * host_agent.CHARS_PER_TOKEN]
+        assert note['truncated']
+
+        rest = await host.read_full_result(
+            note['full_result_artifact'], note['next_start'], tool_context
+        )
+        assert rest['status'] == 'ok'
+        assert shown + rest['content'] == text[: len(shown) * 2]
+
+    asyncio.run(run())
+
+
+def test_unknown_result_is_reported():
+    async def run():
+        tool_context = await make_tool_context()
+        host = host_agent.HostAgent([])
+        with pytest.raises(ValueError):
+            await host.read_full_result('missing', 0, tool_context)
+
+    asyncio.run(run())
+
+
+def test_file_parts_are_saved_as_artifacts():
+    async def run():
+        tool_context = await make_tool_context()
+        part = FilePart(
+            file=FileContent(
+                name='report.txt',
+                mimeType='text/plain',
+                bytes=base64.b64encode(b'report').decode(),
+            )
+        )
+
+        converted = await host_agent.convert_part(part, tool_context)
+
+        assert converted.data == {'artifact-file-id': 'report.txt'}
+        artifact = await tool_context.load_artifact('report.txt')
+        assert artifact.inline_data.data == b'report'
+
+    asyncio.run(run())
+
+
+def test_invalid_push_notification_is_rejected():
+    class Verified:
+        async def verify_push_notification(self, request, body):
+            return True
+
+    async def receiver_auth(card):
+        return Verified()
+
+    async def run():
+        host = host_agent.HostAgent([])
+        host.task_registry.record('remote', completed_task('done'))
+        tracked = []
+        host.remote_agent_connections['remote'] = types.SimpleNamespace(
+            card=None,
+            track=lambda task, source: tracked.append(task),
+        )
+        host._receiver_auth = receiver_auth
+        app = Starlette(
+            routes=[
+                Route(
+                    '/push',
+                    host.handle_push_notification,
+                    methods=['POST'],
+                )
+            ]
+        )
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url='http://host'
+        ) as client:
+            invalid = await client.post('/push', json={'id': 'task'})
+            valid = await client.post(
+                '/push',
+                content=completed_task('done').model_dump_json(),
+            )
+
+        assert invalid.status_code == 400
+        assert valid.status_code == 200
+        assert [task.id for task in tracked] == ['task']
+
+    asyncio.run(run())
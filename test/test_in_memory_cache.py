@@ -0,0 +1,80 @@
+import os
+import threading
+import time
+
+import pytest
+
+from samples.common.utils.in_memory_cache import InMemoryCache
+
+
+@pytest.fixture
+def cache():
+    cache = InMemoryCache()
+    yield cache
+    cache.stop_snapshots()
+    cache._snapshot_config = None
+    cache.clear()
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_fork_while_a_thread_holds_a_shard_lock(cache):
+    cache.set('key', 'value')
+    locked = threading.Event()
+    release = threading.Event()
+
+    def hold_lock():
+        with cache._shard('key').lock:
+            locked.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    locked.wait()
+    try:
+        pid = os.fork()
+        if pid == 0:
+            # The holder thread does not exist here; without fresh locks
+            # this would block forever.
+            try:
+                cache.set('key', 'child')
+                os._exit(0 if cache.get('key') == 'child' else 1)
+            finally:
+                os._exit(2)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            done, status = os.waitpid(pid, os.WNOHANG)
+            if done:
+                break
+            time.sleep(0.01)
+        else:
+            os.kill(pid, 9)
+            os.waitpid(pid, 0)
+            pytest.fail('child deadlocked on an inherited cache lock')
+        assert os.waitstatus_to_exitcode(status) == 0
+    finally:
+        release.set()
+        holder.join()
+    assert cache.get('key') == 'value'
+
+
+def test_snapshots_stop_and_resume(cache, tmp_path):
+    path = str(tmp_path / 'cache.snapshot')
+    cache.set('key', 'value')
+
+    cache.enable_snapshots(path, interval=0.01)
+    deadline = time.monotonic() + 5
+    while not os.path.exists(path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert os.path.exists(path)
+
+    cache.stop_snapshots()
+    assert cache._snapshot_thread is None
+    os.unlink(path)
+    time.sleep(0.05)
+    assert not os.path.exists(path)
+
+    cache.start_snapshots()
+    deadline = time.monotonic() + 5
+    while not os.path.exists(path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert os.path.exists(path)
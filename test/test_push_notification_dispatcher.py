@@ -0,0 +1,76 @@
+import asyncio
+
+import httpx
+import pytest
+
+pytest.importorskip('jwt')
+
+from samples.common.utils.push_notification_dispatcher import (
+    PushNotificationDispatcher,
+)
+
+
+class FlakySenderAuth:
+    """Fails the first post to http://down/ with a transport error."""
+
+    def __init__(self):
+        self.failed = False
+        self.delivered: list[tuple[str, str, str]] = []
+
+    async def post_push_notification(self, client, url, data):
+        if url == 'http://down/' and not self.failed:
+            self.failed = True
+            raise httpx.ConnectError('unreachable')
+        self.delivered.append((url, data['id'], data['status']['state']))
+
+
+def task(task_id: str, state: str) -> dict:
+    return {'id': task_id, 'status': {'state': state}}
+
+
+def test_retries_do_not_block_the_worker():
+    async def run():
+        sender_auth = FlakySenderAuth()
+        dispatcher = PushNotificationDispatcher(sender_auth, workers=1)
+        dispatcher._backoff_delay = lambda attempt: 0.2
+        dispatcher.enqueue('a', 'http://down/', task('a', 'completed'))
+        await asyncio.sleep(0.05)
+        # The only worker is free while 'a' waits for its retry.
+        dispatcher.enqueue('b', 'http://up/', task('b', 'completed'))
+        await asyncio.sleep(0.05)
+        assert sender_auth.delivered == [('http://up/', 'b', 'completed')]
+
+        await dispatcher.close()
+        assert sender_auth.delivered[-1] == ('http://down/', 'a', 'completed')
+
+    asyncio.run(run())
+
+
+def test_newer_update_is_sent_in_place_of_a_pending_retry():
+    async def run():
+        sender_auth = FlakySenderAuth()
+        dispatcher = PushNotificationDispatcher(sender_auth, workers=2)
+        dispatcher._backoff_delay = lambda attempt: 0.1
+        dispatcher.enqueue('a', 'http://down/', task('a', 'working'))
+        await asyncio.sleep(0.02)
+        dispatcher.enqueue('a', 'http://down/', task('a', 'completed'))
+
+        await dispatcher.close()
+        assert sender_auth.delivered == [('http://down/', 'a', 'completed')]
+        assert not dispatcher._latest_seq
+
+    asyncio.run(run())
+
+
+def test_close_without_drain_cancels_retries():
+    async def run():
+        sender_auth = FlakySenderAuth()
+        dispatcher = PushNotificationDispatcher(sender_auth)
+        dispatcher._backoff_delay = lambda attempt: 10
+        dispatcher.enqueue('a', 'http://down/', task('a', 'completed'))
+        await asyncio.sleep(0.02)
+
+        await asyncio.wait_for(dispatcher.close(drain=False), 1)
+        assert sender_auth.delivered == []
+
+    asyncio.run(run())
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+
+# The server package still speaks the pre-v1 types; skip where they are
+# unavailable.
+scheduler = pytest.importorskip(
+    'samples.common.server.scheduler', exc_type=ImportError
+)
+AgentRunScheduler = scheduler.AgentRunScheduler
+RunPriority = scheduler.RunPriority
+
+
+async def record(order: list[str], name: str, duration: float = 0.01):
+    await asyncio.sleep(duration)
+    order.append(name)
+
+
+def test_interactive_runs_go_first():
+    async def run():
+        runs = AgentRunScheduler(max_concurrency=1)
+        order = []
+        runs.submit(record(order, 'first'), 'a')
+        runs.submit(record(order, 'background'), 'b', RunPriority.BACKGROUND)
+        runs.submit(record(order, 'interactive'), 'c')
+        await runs.shutdown()
+        return order
+
+    assert asyncio.run(run()) == ['first', 'interactive', 'background']
+
+
+def test_waiting_background_run_is_not_starved():
+    async def run():
+        runs = AgentRunScheduler(max_concurrency=1, max_background_wait=0.05)
+        order = []
+        runs.submit(record(order, 'first'), 'a')
+        background = runs.submit(
+            record(order, 'background'), 'b', RunPriority.BACKGROUND
+        )
+        # More interactive work keeps arriving than the slot can take.
+        for i in range(20):
+            runs.submit(record(order, f'interactive-{i}'), f's{i}')
+        await asyncio.wait_for(background, 1)
+        await runs.shutdown()
+        return order
+
+    order = asyncio.run(run())
+    assert 1 < order.index('background') < 20